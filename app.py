@@ -1,6 +1,7 @@
 
 import streamlit as st
 from components.auth import check_authentication, login_form, signup_form, init_session_state
+from components.tracing import start_rerun, end_rerun
 from config import APP_NAME, APP_ICON, PAGE_ICON, LAYOUT
 
 # Page configuration
@@ -79,6 +80,7 @@ st.markdown("""
 def main():
     """Main application"""
     init_session_state()
+    start_rerun('home')
     
     if not check_authentication():
         # Show login/signup page
@@ -106,6 +108,10 @@ def main():
                 st.switch_page("pages/Create_Campaign.py")
             if st.button("📈 Manage Campaigns", key="nav_campaigns"):
                 st.switch_page("pages/Campaigns.py")
+            if st.button("📨 Message Explorer", key="nav_explorer"):
+                st.switch_page("pages/Message_Explorer.py")
+            if st.session_state.user.get('is_staff') and st.button("🩺 Diagnostics", key="nav_diagnostics"):
+                st.switch_page("pages/Diagnostics.py")
             
             st.markdown("---")
             
@@ -125,13 +131,14 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
-        # Get real metrics from API
-        from components.api_client import APIClient
-        api = APIClient()
+        # Get real metrics from API (cached per user and shared with the Dashboard)
+        from components.auth import user_key_for
+        from components.data_loader import load_stats_offline
+        from components.offline_cache import show_freshness
         
         try:
-            stats_response = api.get_stats()
-            stats = stats_response.get('statistics', {}) if stats_response.get('success') else {}
+            stats, freshness = load_stats_offline(st.session_state.auth_token, user_key_for(st.session_state.user))
+            show_freshness(freshness, "statistics")
         except Exception as e:
             st.error(f"Failed to load statistics: {str(e)}")
             stats = {}
@@ -186,5 +193,7 @@ def main():
         #     if st.button("📈 Manage Campaigns", key="manage_campaigns_btn"):
         #         st.switch_page("pages/Campaigns.py")
 
+    end_rerun()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Bytes transferred per campaign-list refresh: full refetch vs incremental delta sync.
+
+Run from the repository root:
+    python -m benchmarks.campaign_sync --campaigns 10000 --refreshes 20 --changes 25
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('API_BASE_URL', 'http://127.0.0.1')
+
+from benchmarks.mock_backend import MockBackend  # noqa: E402
+from components.api_client import APIClient  # noqa: E402
+from components.campaign_sync import CampaignStore, sync_campaigns  # noqa: E402
+
+
+def measure(backend: MockBackend, refresh, refreshes: int, changes: int) -> dict:
+    """Run refresh() after each simulated change and average the traffic it caused"""
+    total_bytes = total_requests = 0
+    total_time = 0.0
+    for _ in range(refreshes):
+        backend.dataset.advance(seconds=30, running_updates=changes)
+        backend.reset_counters()
+        started = time.perf_counter()
+        refresh()
+        total_time += time.perf_counter() - started
+        total_bytes += backend.bytes_sent
+        total_requests += backend.requests
+    return {
+        'bytes_per_refresh': total_bytes // refreshes,
+        'requests_per_refresh': total_requests / refreshes,
+        'ms_per_refresh': total_time * 1000 / refreshes,
+    }
+
+
+def run(campaigns: int, refreshes: int, changes: int) -> dict:
+    results = {}
+
+    backend = MockBackend(campaigns).start()
+    api = APIClient(token="bench", base_url=backend.url)
+    try:
+        results['full refetch (page size 20)'] = measure(
+            backend, lambda: api.get_all_campaigns(), refreshes, changes)
+
+        store = CampaignStore()
+        backend.reset_counters()
+        sync_campaigns(api, store, force=True)
+        results['initial full sync'] = {'bytes_per_refresh': backend.bytes_sent,
+                                        'requests_per_refresh': backend.requests,
+                                        'ms_per_refresh': None}
+        results['delta sync'] = measure(
+            backend, lambda: sync_campaigns(api, store, force=True), refreshes, changes)
+    finally:
+        backend.stop()
+
+    # Same workload against a backend that ignores updated_since
+    backend = MockBackend(campaigns, supports_delta=False).start()
+    api = APIClient(token="bench", base_url=backend.url)
+    try:
+        store = CampaignStore()
+        sync_campaigns(api, store, force=True)
+        results['fallback (no delta support)'] = measure(
+            backend, lambda: sync_campaigns(api, store, force=True), refreshes, changes)
+    finally:
+        backend.stop()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--campaigns', type=int, default=10_000)
+    parser.add_argument('--refreshes', type=int, default=10)
+    parser.add_argument('--changes', type=int, default=25, help="Running campaigns updated between refreshes")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.campaigns, args.refreshes, args.changes)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.campaigns:,} campaigns, {args.changes} changed between refreshes")
+    print(f"{'strategy':<30} {'bytes/refresh':>15} {'requests':>10} {'ms':>10}")
+    for name, row in results.items():
+        ms = f"{row['ms_per_refresh']:.1f}" if row['ms_per_refresh'] is not None else '-'
+        print(f"{name:<30} {row['bytes_per_refresh']:>15,} {row['requests_per_refresh']:>10.1f} {ms:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Per-rerun cost of the Dashboard charts: rebuilding every figure vs the figure cache.
+
+Each rerun builds (or looks up) the figures and then does the work st.plotly_chart
+does for every chart: validate the figure and serialize it to a JSON spec.
+
+Run from the repository root:
+    python -m benchmarks.chart_render --reruns 200 --days 30
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('API_BASE_URL', 'http://127.0.0.1')
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly.io  # noqa: E402
+import plotly.tools  # noqa: E402
+
+from components.charts import (cached_figure, status_pie, delivery_bar, messages_trend,  # noqa: E402
+                               success_rate_trend)
+
+
+def dashboard_data(days: int):
+    """Inputs shaped like the Dashboard's: /stats/ breakdowns and a daily trend frame"""
+    rng = np.random.default_rng(0)
+    sent = rng.integers(1_000, 50_000, days)
+    trend_df = pd.DataFrame({
+        'period': pd.date_range('2026-01-01', periods=days, freq='D'),
+        'sent': sent.astype(float),
+        'delivered': (sent * 0.9).astype(float),
+        'overall_success_rate': rng.uniform(85, 95, days),
+        'success_rate': rng.uniform(80, 100, days),
+    })
+    return [
+        (status_pie, {'running': 12, 'paused': 3, 'completed': 250, 'pending': 7, 'failed': 4}),
+        (delivery_bar, {'Sent': 1_250_000, 'Delivered': 1_130_000, 'Pending': 120_000}),
+        (messages_trend, trend_df),
+        (success_rate_trend, {'trend': trend_df, 'period_label': 'Day'}),
+    ]
+
+
+def serialize(figure) -> str:
+    """What st.plotly_chart does with a figure on every rerun"""
+    figure = plotly.tools.return_figure_from_figure_or_data(figure, validate_figure=True)
+    return plotly.io.to_json(figure, validate=False)
+
+
+def measure(charts, reruns: int, get_figure) -> dict:
+    build = serial = 0.0
+    spec_bytes = 0
+    for _ in range(reruns):
+        for builder, data in charts:
+            started = time.perf_counter()
+            figure = get_figure(builder, data)
+            built = time.perf_counter()
+            spec_bytes = len(serialize(figure))
+            build += built - started
+            serial += time.perf_counter() - built
+    return {
+        'build_ms_per_rerun': build * 1000 / reruns,
+        'serialize_ms_per_rerun': serial * 1000 / reruns,
+        'total_ms_per_rerun': (build + serial) * 1000 / reruns,
+        'last_spec_bytes': spec_bytes,
+    }
+
+
+def run(reruns: int, days: int) -> dict:
+    charts = dashboard_data(days)
+    # Warm imports and plotly's validators so neither side pays first-use costs
+    for builder, data in charts:
+        serialize(builder(data))
+    return {
+        'rebuild every rerun': measure(charts, reruns, lambda builder, data: builder(data)),
+        'figure cache': measure(charts, reruns, cached_figure),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=200)
+    parser.add_argument('--days', type=int, default=30, help="Points in the trend charts")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.reruns, args.days)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"4 Dashboard charts, {args.days}-point trends, {args.reruns} reruns")
+    print(f"{'strategy':<22} {'build ms':>10} {'serialize ms':>13} {'total ms':>10}")
+    for name, row in results.items():
+        print(f"{name:<22} {row['build_ms_per_rerun']:>10.2f} {row['serialize_ms_per_rerun']:>13.2f} "
+              f"{row['total_ms_per_rerun']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
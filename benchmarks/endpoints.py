@@ -0,0 +1,119 @@
+"""GET latency and errors with one backend replica vs balanced, health-checked replicas.
+
+Starts three mock replicas over one dataset and sends campaign list requests
+from concurrent workers while the first replica is healthy, slow, erratic
+(random stalls) or down. Strategies: every request to the first replica (what
+a single API_BASE_URL does), balanced across all three, and balanced with
+hedged GETs. Reported per scenario and strategy: latency percentiles, errors,
+and the share of requests each replica answered.
+
+Run from the repository root:
+    python -m benchmarks.endpoints --requests 400 --workers 8
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault('API_BASE_URL', 'http://127.0.0.1')
+
+from benchmarks.mock_backend import MockBackend, MockDataset  # noqa: E402
+from components.api_client import APIClient  # noqa: E402
+from components.concurrency import run_concurrently  # noqa: E402
+from components.endpoints import EndpointPool  # noqa: E402
+
+BASE_LATENCY_MS = 20
+BASE_JITTER_MS = 10
+
+# First replica's condition per scenario: (latency_ms, jitter_ms, running)
+SCENARIOS = {
+    'healthy': (BASE_LATENCY_MS, BASE_JITTER_MS, True),
+    'slow': (600, BASE_JITTER_MS, True),
+    'erratic': (BASE_LATENCY_MS, 1500, True),
+    'down': (BASE_LATENCY_MS, BASE_JITTER_MS, False),
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))] if values else float('nan')
+
+
+def run(scenario: str, strategy: str, dataset: MockDataset, requests: int, workers: int,
+        hedge_after: float, timeout: float) -> Dict[str, Any]:
+    latency_ms, jitter_ms, running = SCENARIOS[scenario]
+    replicas = [MockBackend(dataset=dataset, latency_ms=latency_ms, jitter_ms=jitter_ms).start()]
+    replicas += [MockBackend(dataset=dataset, latency_ms=BASE_LATENCY_MS, jitter_ms=BASE_JITTER_MS).start()
+                 for _ in range(2)]
+    urls = [replica.url for replica in replicas]
+    if not running:
+        replicas[0].stop()
+
+    api = APIClient(token="bench", base_url=','.join(urls[:1] if strategy == 'single' else urls), timeout=timeout)
+    # A fresh pool per run, so health learned in one run does not carry over to the next
+    api.pool = EndpointPool(api.endpoints, hedge_after=hedge_after if strategy == 'balanced + hedging' else 0)
+
+    latencies, errors = [], 0
+
+    def get(page: int) -> float:
+        started = time.perf_counter()
+        response = api.get_campaigns(page=page % 20 + 1)
+        if response.get('success') is False:
+            raise RuntimeError(response.get('error'))
+        return time.perf_counter() - started
+
+    for _, seconds, error in run_concurrently(get, range(requests), max_workers=workers):
+        if error is not None:
+            errors += 1
+        else:
+            latencies.append(seconds * 1000)
+    # Hedged losers may still be in flight; give them a moment so the replica counts are complete
+    time.sleep(0.1 if strategy != 'balanced + hedging' else (latency_ms + jitter_ms) / 1000)
+
+    answered = [replica.requests for replica in replicas]
+    for replica in replicas[0 if running else 1:]:
+        replica.stop()
+    total = sum(answered) or 1
+    return {
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies, default=float('nan')),
+        'errors': errors,
+        'backend_requests': sum(answered),
+        'share': [round(count / total, 3) for count in answered],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400, help="GETs per scenario and strategy")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent requests")
+    parser.add_argument('--hedge-after', type=float, default=0.1, help="Seconds before a GET is hedged")
+    parser.add_argument('--timeout', type=float, default=2.0, help="Seconds per request")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    dataset = MockDataset(200)
+    results = {scenario: {strategy: run(scenario, strategy, dataset, args.requests, args.workers,
+                                        args.hedge_after, args.timeout)
+                          for strategy in ('single', 'balanced', 'balanced + hedging')}
+               for scenario in SCENARIOS}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.requests} GETs per run, {args.workers} workers, replicas at {BASE_LATENCY_MS}+{BASE_JITTER_MS} ms, "
+          f"hedging after {args.hedge_after * 1000:.0f} ms")
+    print(f"{'scenario':<9} {'strategy':<19} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'errors':>7} {'backend':>8}  share per replica")
+    for scenario, strategies in results.items():
+        for strategy, row in strategies.items():
+            print(f"{scenario:<9} {strategy:<19} {row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f} "
+                  f"{row['max_ms']:>8.0f} {row['errors']:>7} {row['backend_requests']:>8}  "
+                  f"{' / '.join(f'{share:.0%}' for share in row['share'])}")
+
+
+if __name__ == '__main__':
+    main()
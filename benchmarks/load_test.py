@@ -0,0 +1,324 @@
+"""Multi-session load test: N simulated users against a real `streamlit run` server.
+
+AppTest runs one script at a time per process, so it cannot show what
+concurrent sessions do to each other (shared caches, the script-runner
+threads, the GIL, memory per session). This starts the app with
+`streamlit run` against the mock backend and drives it over the browser's
+websocket protocol (benchmarks/streamlit_client.py). Each simulated user logs
+in, then repeatedly picks a flow with think time in between:
+
+  dashboard  open the Dashboard, press Refresh
+  browse     open Campaigns, page forward, toggle Show All
+  manage     open a campaign from the list and leave Auto Refresh on for a few cycles
+  create     fill in a template name, upload a CSV, validate, create
+
+Concurrency ramps up in stages (new users join, existing ones keep going).
+Reported per stage: reruns/s, rerun latency percentiles (auto-refresh cycles
+separately: they include the page's own 5 s sleep, so only their render time
+is reported), backend requests/s, and the server's resident memory.
+
+Run from the repository root:
+    python -m benchmarks.load_test --users 1 4 16 --stage-seconds 30 --latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+FLOWS = {'dashboard': 3, 'browse': 3, 'manage': 2, 'create': 1}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process, from /proc (Linux only)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def recipients_csv(rows: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    lines = ['phone,has_variables,name']
+    lines += [f"+9198{rng.randrange(10 ** 8):08d},true,User {i}" for i in range(rows)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+class Stage:
+    """Measurements collected while one concurrency level is active"""
+
+    def __init__(self, users: int):
+        self.users = users
+        self.started = time.perf_counter()
+        self.rerun_ms: List[float] = []
+        self.auto_refresh_ms: List[float] = []
+        self.flows: Dict[str, int] = {}
+        self.errors: List[str] = []
+        self.rss_mb: List[float] = []
+        self.backend_requests = 0
+
+    def summary(self, seconds: float) -> Dict[str, Any]:
+        return {
+            'users': self.users,
+            'seconds': seconds,
+            'reruns': len(self.rerun_ms),
+            'reruns_per_s': len(self.rerun_ms) / seconds,
+            'flows': self.flows,
+            'rerun_p50_ms': percentile(self.rerun_ms, 0.50),
+            'rerun_p90_ms': percentile(self.rerun_ms, 0.90),
+            'rerun_p99_ms': percentile(self.rerun_ms, 0.99),
+            'auto_refresh_cycles': len(self.auto_refresh_ms),
+            'auto_refresh_render_p90_ms': percentile(self.auto_refresh_ms, 0.90),
+            'backend_qps': self.backend_requests / seconds,
+            'rss_mb_max': max(self.rss_mb) if self.rss_mb else None,
+            'rss_mb_end': self.rss_mb[-1] if self.rss_mb else None,
+            'errors': len(self.errors),
+            'first_errors': self.errors[:5],
+        }
+
+
+class LoadTest:
+    """Owns the mock backend, the streamlit server and the simulated users"""
+
+    def __init__(self, campaigns: int, latency_ms: float, max_recipients: int, think_s: float,
+                 auto_refresh_cycles: int, upload_rows: int, seed: int):
+        from benchmarks.mock_backend import MockBackend, MockDataset
+        self.backend = MockBackend(dataset=MockDataset(campaigns, max_recipients=max_recipients),
+                                   latency_ms=latency_ms).start()
+        self.think_s = think_s
+        self.auto_refresh_cycles = auto_refresh_cycles
+        self.upload_rows = upload_rows
+        self.seed = seed
+        self.stage: Optional[Stage] = None
+        self.stopping = False
+        self._scratch = tempfile.TemporaryDirectory()
+        self.port = free_port()
+        env = dict(os.environ, API_BASE_URL=self.backend.url,
+                   SNAPSHOT_DB_PATH=os.path.join(self._scratch.name, 'snapshots.sqlite3'),
+                   OFFLINE_CACHE_DB_PATH=os.path.join(self._scratch.name, 'offline_cache.sqlite3'),
+                   SUPPRESSION_DIR=os.path.join(self._scratch.name, 'suppression'))
+        self.server = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', 'app.py', '--server.headless', 'true',
+             '--server.port', str(self.port), '--server.enableXsrfProtection', 'false',
+             '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.url = f'http://127.0.0.1:{self.port}'
+        self._wait_healthy()
+
+    def _wait_healthy(self, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.server.poll() is not None:
+                raise RuntimeError("streamlit server exited during startup")
+            try:
+                urllib.request.urlopen(f'{self.url}/_stcore/health', timeout=1)
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("streamlit server did not become healthy")
+
+    def stop(self) -> None:
+        self.server.terminate()
+        try:
+            self.server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.server.kill()
+        self.backend.stop()
+        self._scratch.cleanup()
+
+    # -- one simulated user ---------------------------------------------
+
+    async def _run(self, session, record: bool = True, **kwargs):
+        result = await session.rerun(**kwargs)
+        self._check(result, record)
+        return result
+
+    def _check(self, result, record: bool = True) -> None:
+        if result.exceptions:
+            raise RuntimeError(result.exceptions[0])
+        if record and self.stage is not None:
+            self.stage.rerun_ms.append(result.seconds * 1000)
+
+    async def _login(self, session, user: int) -> None:
+        await session.connect()
+        await self._run(session, record=False)
+        session.set_text('Username or Email', f'loadtest{user}')
+        session.set_text('Password', 'secret')
+        await self._run(session, triggers=['Login'])
+
+    async def _dashboard(self, session, rng: random.Random) -> None:
+        await self._run(session, page='Dashboard')
+        await self._think(rng)
+        await self._run(session, triggers=['🔄 Refresh'])
+
+    async def _browse(self, session, rng: random.Random) -> None:
+        await self._run(session, page='Campaigns')
+        session.set_index('Select View', 0)
+        await self._run(session)
+        for _ in range(rng.randint(1, 3)):
+            await self._think(rng)
+            await self._run(session, triggers=['▶️ Next'])
+        session.set_bool('Show All', True)
+        await self._run(session)
+        session.set_bool('Show All', False)
+        await self._run(session)
+
+    async def _manage(self, session, rng: random.Random) -> None:
+        await self._run(session, page='Campaigns')
+        session.set_index('Select View', 0)
+        await self._run(session)
+        await self._run(session, triggers=['Manage'])
+        session.set_bool('Auto Refresh', True)
+        result = await session.rerun(follow_reruns=False)
+        self._check(result, record=False)
+        if self.stage is not None:
+            self.stage.rerun_ms.append(result.render_seconds * 1000)
+        for _ in range(self.auto_refresh_cycles):
+            result = await session.next_run()
+            self._check(result, record=False)
+            if self.stage is not None:
+                self.stage.auto_refresh_ms.append(result.render_seconds * 1000)
+        session.set_bool('Auto Refresh', False)
+        await self._run(session)
+
+    async def _create(self, session, rng: random.Random) -> None:
+        await self._run(session, page='Create Campaign')
+        session.set_text('Template Name *', f'loadtest_{rng.randrange(10 ** 6)}')
+        await session.upload('Choose a CSV or Excel file', 'recipients.csv',
+                             recipients_csv(self.upload_rows, rng.randrange(10 ** 6)))
+        await self._run(session)
+        await self._think(rng)
+        await self._run(session, triggers=['🔍 Validate File'])
+        await self._think(rng)
+        await self._run(session, triggers=['🚀 Create Campaign'])
+
+    async def _think(self, rng: random.Random) -> None:
+        if self.think_s > 0:
+            await asyncio.sleep(rng.expovariate(1 / self.think_s))
+
+    async def user(self, index: int) -> None:
+        from benchmarks.streamlit_client import StreamlitSession
+        rng = random.Random(self.seed + index)
+        flows = {'dashboard': self._dashboard, 'browse': self._browse,
+                 'manage': self._manage, 'create': self._create}
+        session = StreamlitSession(self.url)
+        try:
+            await self._login(session, index)
+            while not self.stopping:
+                name = rng.choices(list(FLOWS), weights=list(FLOWS.values()))[0]
+                try:
+                    await flows[name](session, rng)
+                    if self.stage is not None:
+                        self.stage.flows[name] = self.stage.flows.get(name, 0) + 1
+                except (RuntimeError, KeyError) as e:
+                    # KeyError: a widget the flow expected was not rendered
+                    if self.stage is not None:
+                        self.stage.errors.append(f"{name}: {type(e).__name__}: {e}")
+                await self._think(rng)
+        except Exception as e:
+            if self.stage is not None:
+                self.stage.errors.append(f"session {index}: {type(e).__name__}: {e}")
+        finally:
+            session.close()
+
+    # -- stages ---------------------------------------------------------
+
+    async def _sample_rss(self, interval: float) -> None:
+        while not self.stopping:
+            value = rss_mb(self.server.pid)
+            if value is not None and self.stage is not None:
+                self.stage.rss_mb.append(value)
+            await asyncio.sleep(interval)
+
+    async def ramp(self, levels: List[int], stage_seconds: float) -> List[Dict[str, Any]]:
+        results, users = [], []
+        sampler = asyncio.ensure_future(self._sample_rss(0.5))
+        try:
+            for level in levels:
+                self.stage = stage = Stage(level)
+                requests_before = self.backend.requests
+                users += [asyncio.ensure_future(self.user(i)) for i in range(len(users), level)]
+                await asyncio.sleep(stage_seconds)
+                stage.backend_requests = self.backend.requests - requests_before
+                results.append(stage.summary(time.perf_counter() - stage.started))
+        finally:
+            self.stopping = True
+            for task in users + [sampler]:
+                task.cancel()
+            await asyncio.gather(*users, sampler, return_exceptions=True)
+        return results
+
+
+def run(levels: List[int], stage_seconds: float, campaigns: int, latency_ms: float, max_recipients: int,
+        think_s: float, auto_refresh_cycles: int, upload_rows: int, seed: int) -> List[Dict[str, Any]]:
+    test = LoadTest(campaigns, latency_ms, max_recipients, think_s, auto_refresh_cycles, upload_rows, seed)
+    try:
+        return asyncio.run(test.ramp(levels, stage_seconds))
+    finally:
+        test.stop()
+
+
+def _ms(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                        help="Concurrent sessions per stage; users are added, never removed")
+    parser.add_argument('--stage-seconds', type=float, default=30.0)
+    parser.add_argument('--campaigns', type=int, default=2000)
+    parser.add_argument('--max-recipients', type=int, default=5000, help="Spread of recipients per campaign")
+    parser.add_argument('--latency-ms', type=float, default=10.0, help="Injected backend latency per request")
+    parser.add_argument('--think-s', type=float, default=1.0, help="Mean think time between user actions")
+    parser.add_argument('--auto-refresh-cycles', type=int, default=2, help="Refresh cycles per manage flow")
+    parser.add_argument('--upload-rows', type=int, default=500, help="Recipients per uploaded CSV")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.users, args.stage_seconds, args.campaigns, args.latency_ms, args.max_recipients,
+                  args.think_s, args.auto_refresh_cycles, args.upload_rows, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.campaigns:,} campaigns, {args.latency_ms:g} ms backend latency, "
+          f"{args.think_s:g} s mean think time, {args.stage_seconds:g} s per stage")
+    print(f"{'users':>5} {'reruns/s':>9} {'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'auto p90':>9} "
+          f"{'backend qps':>12} {'RSS MB':>7} {'errors':>7}")
+    for row in results:
+        print(f"{row['users']:>5} {row['reruns_per_s']:>9.1f} {_ms(row['rerun_p50_ms']):>7} "
+              f"{_ms(row['rerun_p90_ms']):>7} {_ms(row['rerun_p99_ms']):>7} "
+              f"{_ms(row['auto_refresh_render_p90_ms']):>9} {row['backend_qps']:>12.1f} "
+              f"{_ms(row['rss_mb_max']):>7} {row['errors']:>7}")
+        for error in row['first_errors']:
+            print(f"{'':>5} {error}")
+
+
+if __name__ == '__main__':
+    main()
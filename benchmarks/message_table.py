@@ -0,0 +1,75 @@
+"""Memory and build time of a message table: pd.DataFrame(messages) vs the compact typed table.
+
+Generates messages as the mock backend serves them (phone strings, ISO
+timestamps, a handful of statuses and error messages that embed the phone
+number) in pages, then builds the table both ways: pd.DataFrame over the
+concatenated dicts, as the exports used to, and MessageTableBuilder page by
+page. Reported per column and in total: deep memory usage, plus build time
+and the time to filter failed messages and count them by error.
+
+Run from the repository root:
+    python -m benchmarks.message_table --rows 1000000
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault('API_BASE_URL', 'http://127.0.0.1')
+
+import pandas as pd  # noqa: E402
+from benchmarks.mock_backend import MockDataset  # noqa: E402
+from components.message_table import build_message_table  # noqa: E402
+
+
+def generate_pages(rows: int, page_size: int) -> List[List[Dict[str, Any]]]:
+    dataset = MockDataset(1)
+    campaign = next(iter(dataset.campaigns.values()))
+    messages = [dataset._message(campaign, index) for index in range(rows)]
+    return [messages[start:start + page_size] for start in range(0, rows, page_size)]
+
+
+def measure(build, pages: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    table = build(pages)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    table[table['status'] == 'failed'].groupby('error_message', observed=True).size()
+    query_seconds = time.perf_counter() - started
+    columns = table.memory_usage(deep=True, index=False)
+    return {'build_seconds': build_seconds, 'query_seconds': query_seconds, 'bytes': int(columns.sum()),
+            'column_bytes': {column: int(size) for column, size in columns.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Messages in the table")
+    parser.add_argument('--page-size', type=int, default=1000, help="Messages per API page")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    pages = generate_pages(args.rows, args.page_size)
+    results = {
+        'rows': args.rows,
+        'dataframe': measure(lambda pages: pd.DataFrame([m for page in pages for m in page]), pages),
+        'compact': measure(build_message_table, pages),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    dataframe, compact = results['dataframe'], results['compact']
+    print(f"{args.rows:,} messages in pages of {args.page_size:,}")
+    print(f"{'column':<19} {'DataFrame MB':>13} {'compact MB':>11}")
+    for column in dict.fromkeys([*dataframe['column_bytes'], *compact['column_bytes']]):
+        print(f"{column:<19} {dataframe['column_bytes'].get(column, 0) / 2 ** 20:>13,.1f} "
+              f"{compact['column_bytes'].get(column, 0) / 2 ** 20:>11,.1f}")
+    print(f"{'total':<19} {dataframe['bytes'] / 2 ** 20:>13,.1f} {compact['bytes'] / 2 ** 20:>11,.1f}  "
+          f"({dataframe['bytes'] / compact['bytes']:.1f}x smaller)")
+    print(f"{'build s':<19} {dataframe['build_seconds']:>13.2f} {compact['build_seconds']:>11.2f}")
+    print(f"{'failures by error s':<19} {dataframe['query_seconds']:>13.3f} {compact['query_seconds']:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
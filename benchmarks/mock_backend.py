@@ -0,0 +1,496 @@
+"""In-process stand-in for the Django campaign API used by benchmarks.
+
+Implements every endpoint APIClient calls (/auth/*, /campaigns/*, /stats/,
+/validate-file/) over a deterministic dataset, with request/byte counters and
+optional injected latency.
+
+Usage:
+    from benchmarks.mock_backend import MockBackend
+    backend = MockBackend(campaigns=10_000, latency_ms=20).start()
+    api = APIClient(token="bench", base_url=backend.url)
+    ...
+    backend.stop()
+
+Or standalone, to point the app at it:
+    python -m benchmarks.mock_backend --campaigns 5000 --latency-ms 50 --port 8000
+    API_BASE_URL=http://127.0.0.1:8000/api streamlit run app.py
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+STATUSES = ['draft', 'pending', 'running', 'paused', 'completed', 'failed']
+MESSAGE_STATUSES = ['sent', 'delivered', 'read', 'failed']
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 1000
+FAILURE_REASONS = [
+    "Error 131026: Message undeliverable to {phone}",
+    "Error 131047: Re-engagement message window expired",
+    "Error 131056: Pair rate limit hit",
+    "Error 132001: Template name does not exist",
+    "Error 131000: Something went wrong",
+]
+PHONE_PATTERN = re.compile(r'^\+?\d{10,15}$')
+
+
+def _iso(moment: Optional[datetime]) -> Optional[str]:
+    return moment.isoformat().replace('+00:00', 'Z') if moment else None
+
+
+class MockDataset:
+    """Deterministic campaigns and messages whose counters can be advanced to simulate activity"""
+
+    def __init__(self, campaigns: int = 1000, start: Optional[datetime] = None,
+                 supports_delta: bool = True, max_recipients: int = 5000):
+        self.lock = threading.Lock()
+        self.supports_delta = supports_delta
+        self.max_recipients = max_recipients
+        self.now = start or datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.campaigns: Dict[int, Dict[str, Any]] = {}
+        self.deleted: Dict[int, datetime] = {}
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.tokens: Dict[str, str] = {}
+        for campaign_id in range(1, campaigns + 1):
+            created = self.now - timedelta(minutes=campaigns - campaign_id)
+            status = STATUSES[campaign_id % len(STATUSES)]
+            total = 100 + (campaign_id * 37) % max_recipients
+            sent = total if status == 'completed' else (total * (campaign_id % 10)) // 10
+            self.campaigns[campaign_id] = {
+                'id': campaign_id,
+                'template_name': f"template_{campaign_id % 97}_{campaign_id}",
+                'status': status,
+                'total_recipients': total,
+                'sent_count': sent,
+                'delivered_count': (sent * 9) // 10,
+                'read_count': (sent * 6) // 10,
+                'failed_count': sent // 20,
+                'success_rate': 90.0 if sent else 0.0,
+                'created_at': _iso(created),
+                'started_at': _iso(created + timedelta(seconds=30)) if status != 'draft' else None,
+                'completed_at': _iso(created + timedelta(hours=1)) if status == 'completed' else None,
+                'updated_at': _iso(created),
+            }
+
+    # Auth
+
+    def login(self, username: str) -> Dict[str, Any]:
+        """Any password is accepted; the user is created on first login"""
+        with self.lock:
+            user = self.users.setdefault(username, {
+                'id': len(self.users) + 1, 'username': username, 'email': f"{username}@example.com",
+                'first_name': '', 'last_name': '', 'is_staff': True,
+            })
+            token = uuid.uuid4().hex
+            self.tokens[token] = username
+            return {'success': True, 'token': token, 'user': dict(user)}
+
+    def user_for(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            username = self.tokens.get(token or '')
+            return dict(self.users[username]) if username else None
+
+    # Campaigns
+
+    def advance(self, seconds: float = 1.0, running_updates: int = 10,
+                send_rate: Optional[float] = None) -> List[int]:
+        """Move the clock and progress some running campaigns; returns the updated ids.
+
+        Each progressed campaign sends 2% of its recipients, or, with
+        send_rate, that many messages per second of the advance.
+        """
+        with self.lock:
+            self.now += timedelta(seconds=seconds)
+            running = [c for c in self.campaigns.values() if c['status'] == 'running']
+            updated = []
+            for campaign in running[:running_updates]:
+                remaining = campaign['total_recipients'] - campaign['sent_count']
+                if send_rate is not None:
+                    step = min(remaining, int(send_rate * seconds))
+                else:
+                    step = min(remaining, max(1, campaign['total_recipients'] // 50))
+                self._set_sent(campaign, campaign['sent_count'] + step)
+                if campaign['sent_count'] >= campaign['total_recipients']:
+                    campaign['status'] = 'completed'
+                    campaign['completed_at'] = _iso(self.now)
+                campaign['updated_at'] = _iso(self.now)
+                updated.append(campaign['id'])
+            return updated
+
+    @staticmethod
+    def _set_sent(campaign: Dict[str, Any], sent: int) -> None:
+        campaign['sent_count'] = sent
+        campaign['delivered_count'] = (sent * 9) // 10
+        campaign['read_count'] = (sent * 6) // 10
+        campaign['failed_count'] = sent // 20
+        campaign['success_rate'] = 90.0 if sent else 0.0
+
+    def delete(self, campaign_id: int) -> None:
+        """Delete a campaign and remember a tombstone for delta syncs"""
+        with self.lock:
+            if self.campaigns.pop(campaign_id, None) is not None:
+                self.deleted[campaign_id] = self.now
+
+    def list_campaigns(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Paginated campaign list, newest first"""
+        with self.lock:
+            rows = sorted(self.campaigns.values(), key=lambda c: c['created_at'], reverse=True)
+            deleted_ids = []
+            if params.get('updated_since') and self.supports_delta:
+                since = datetime.fromisoformat(params['updated_since'].replace('Z', '+00:00'))
+                rows = [c for c in rows
+                        if datetime.fromisoformat(c['updated_at'].replace('Z', '+00:00')) >= since]
+                deleted_ids = [i for i, when in self.deleted.items() if when >= since]
+            if params.get('status'):
+                rows = [c for c in rows if c['status'] == params['status']]
+            if params.get('search'):
+                needle = params['search'].lower()
+                rows = [c for c in rows if needle in c['template_name'].lower()]
+            rows = [dict(c) for c in rows]
+
+        page = int(params.get('page', 1))
+        page_size = min(int(params.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        start = (page - 1) * page_size
+        body = {
+            'count': len(rows),
+            'next': f"?page={page + 1}" if start + page_size < len(rows) else None,
+            'previous': f"?page={page - 1}" if page > 1 else None,
+            'results': rows[start:start + page_size],
+        }
+        if params.get('updated_since') and self.supports_delta and page == 1:
+            body['deleted_ids'] = deleted_ids
+        return body
+
+    def get_campaign(self, campaign_id: int) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            campaign = self.campaigns.get(campaign_id)
+            return dict(campaign) if campaign else None
+
+    def create_campaign(self, template_name: str, recipients: int) -> Dict[str, Any]:
+        with self.lock:
+            campaign_id = max(self.campaigns, default=0) + 1
+            self.campaigns[campaign_id] = campaign = {
+                'id': campaign_id, 'template_name': template_name, 'status': 'pending',
+                'total_recipients': recipients, 'sent_count': 0, 'delivered_count': 0, 'read_count': 0,
+                'failed_count': 0, 'success_rate': 0.0, 'created_at': _iso(self.now),
+                'started_at': None, 'completed_at': None, 'updated_at': _iso(self.now),
+            }
+            return dict(campaign)
+
+    def transition(self, campaign_id: int, action: str) -> Tuple[int, Dict[str, Any]]:
+        """start/pause/resume/check-status with the backend's status rules"""
+        allowed = {'start': (['pending', 'paused'], 'running'), 'pause': (['running'], 'paused'),
+                   'resume': (['paused'], 'running')}
+        with self.lock:
+            campaign = self.campaigns.get(campaign_id)
+            if campaign is None:
+                return 404, {'error': 'Campaign not found'}
+            if action == 'check-status':
+                pending = max(0, campaign['total_recipients'] - campaign['sent_count'])
+                if campaign['status'] == 'running' and not pending:
+                    campaign['status'] = 'completed'
+                    campaign['completed_at'] = campaign['updated_at'] = _iso(self.now)
+                    return 200, {'success': True, 'updated': True, 'message': 'Status updated to completed'}
+                return 200, {'success': True, 'updated': False, 'pending_messages': pending,
+                             'message': f"Campaign is {campaign['status']}"}
+            statuses, new_status = allowed[action]
+            if campaign['status'] not in statuses:
+                return 400, {'error': f"Cannot {action} a campaign that is {campaign['status']}"}
+            campaign['status'] = new_status
+            if action == 'start' and not campaign['started_at']:
+                campaign['started_at'] = _iso(self.now)
+            campaign['updated_at'] = _iso(self.now)
+            return 200, {'success': True, 'message': f"Campaign {action} successful",
+                         'campaign': dict(campaign)}
+
+    def campaign_statistics(self, campaign_id: int) -> Optional[Dict[str, Any]]:
+        campaign = self.get_campaign(campaign_id)
+        if campaign is None:
+            return None
+        sent = campaign['sent_count']
+        return {'success': True, 'statistics': {
+            'total_recipients': campaign['total_recipients'],
+            'sent': sent,
+            'delivered': campaign['delivered_count'],
+            'read': campaign['read_count'],
+            'failed': campaign['failed_count'],
+            'pending': campaign['total_recipients'] - sent,
+            'success_rate': campaign['success_rate'],
+        }}
+
+    # Messages
+
+    def _message(self, campaign: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """Message number `index` of a campaign, generated deterministically"""
+        created = datetime.fromisoformat(campaign['created_at'].replace('Z', '+00:00'))
+        sent_at = created + timedelta(seconds=30 + index * 0.5)
+        failed = index % 20 == 0
+        status = 'failed' if failed else MESSAGE_STATUSES[index % 3]
+        phone = f"+91{9000000000 + (campaign['id'] * 7919 + index * 104729) % 999999999}"
+        return {
+            'id': campaign['id'] * 1_000_000 + index,
+            'phone_number': phone,
+            'status': status,
+            'created_at': campaign['created_at'],
+            'sent_at': _iso(sent_at),
+            'delivered_at': _iso(sent_at + timedelta(seconds=2 + index % 7)) if status in ('delivered', 'read') else None,
+            'read_at': _iso(sent_at + timedelta(seconds=60 + index % 300)) if status == 'read' else None,
+            'failed_at': _iso(sent_at + timedelta(seconds=1)) if failed else None,
+            'error_message': FAILURE_REASONS[index % len(FAILURE_REASONS)].format(phone=phone) if failed else None,
+        }
+
+    def list_messages(self, campaign_id: int, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        campaign = self.get_campaign(campaign_id)
+        if campaign is None:
+            return None
+        rows = (self._message(campaign, i) for i in range(campaign['sent_count']))
+        if params.get('status'):
+            rows = (m for m in rows if m['status'] == params['status'])
+        if params.get('search'):
+            rows = (m for m in rows if params['search'] in m['phone_number'])
+        rows = list(rows)
+        ordering = params.get('ordering')
+        if ordering:
+            field = ordering.lstrip('-')
+            rows.sort(key=lambda m: m.get(field) or '', reverse=ordering.startswith('-'))
+
+        page = int(params.get('page', 1))
+        page_size = min(int(params.get('page_size', 50)), MAX_PAGE_SIZE)
+        start = (page - 1) * page_size
+        return {
+            'count': len(rows),
+            'next': f"?page={page + 1}" if start + page_size < len(rows) else None,
+            'previous': f"?page={page - 1}" if page > 1 else None,
+            'results': rows[start:start + page_size],
+        }
+
+    # Stats and files
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate statistics like /stats/"""
+        with self.lock:
+            campaigns = list(self.campaigns.values())
+        by_status: Dict[str, int] = {}
+        for campaign in campaigns:
+            by_status[campaign['status']] = by_status.get(campaign['status'], 0) + 1
+        sent = sum(c['sent_count'] for c in campaigns)
+        delivered = sum(c['delivered_count'] for c in campaigns)
+        return {
+            'success': True,
+            'statistics': {
+                'total_campaigns': len(campaigns),
+                'active_campaigns': by_status.get('running', 0),
+                'total_messages_sent': sent,
+                'total_messages_delivered': delivered,
+                'overall_success_rate': (delivered / sent * 100) if sent else 0.0,
+                'campaigns_by_status': by_status,
+            },
+        }
+
+    @staticmethod
+    def validate_rows(content: bytes) -> Dict[str, Any]:
+        """Check a CSV of recipients: first column is the phone number, header optional"""
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8', errors='replace'))))
+        if rows and not PHONE_PATTERN.match(rows[0][0].strip() if rows[0] else ''):
+            rows = rows[1:]  # Header
+        errors = []
+        for line, row in enumerate(rows, start=2):
+            phone = row[0].strip() if row else ''
+            if not PHONE_PATTERN.match(phone):
+                errors.append({'row': line, 'phone_number': phone, 'error': 'Invalid phone number'})
+        return {
+            'success': True,
+            'file_info': {'total_rows': len(rows), 'valid_rows': len(rows) - len(errors),
+                          'invalid_rows': len(errors)},
+            'validation_errors': errors[:100],
+        }
+
+
+def _form_fields(content_type: str, body: bytes) -> Dict[str, Any]:
+    """Parse a multipart/form-data body into {name: str or bytes}"""
+    if not content_type.startswith('multipart/form-data'):
+        return {}
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        payload = part.get_payload(decode=True) or b''
+        fields[name] = payload if part.get_filename() else payload.decode()
+    return fields
+
+
+class MockBackend:
+    """HTTP server exposing a MockDataset under /api, with request and byte counters.
+
+    latency_ms (plus up to jitter_ms) is slept before every reply to mimic a
+    remote backend.
+    """
+
+    def __init__(self, campaigns: int = 1000, dataset: Optional[MockDataset] = None,
+                 supports_delta: bool = True, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.dataset = dataset or MockDataset(campaigns, supports_delta=supports_delta)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.address = (host, port)
+        self.stats_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.calls: Dict[str, int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def reset_counters(self) -> None:
+        with self.stats_lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.calls = {}
+
+    def _record(self, route: str, size: int) -> None:
+        with self.stats_lock:
+            self.requests += 1
+            self.bytes_sent += size
+            self.calls[route] = self.calls.get(route, 0) + 1
+
+    def route(self, method: str, path: str, params: Dict[str, str], token: Optional[str] = None,
+              form: Optional[Dict[str, Any]] = None):
+        """Return (status, body, route name) for a request"""
+        form = form or {}
+        dataset = self.dataset
+
+        if path.startswith('/api/auth/'):
+            action = path[len('/api/auth/'):].strip('/')
+            if method == 'POST' and action in ('login', 'signup'):
+                return 200, dataset.login(form.get('username') or 'bench'), f'auth_{action}'
+            if method == 'POST' and action == 'logout':
+                return 200, {'success': True, 'message': 'Logged out'}, 'auth_logout'
+            if method == 'GET' and action == 'user':
+                user = dataset.user_for(token) or {'id': 0, 'username': token or 'anonymous', 'is_staff': True}
+                return 200, {'success': True, 'user': user}, 'auth_user'
+
+        if path == '/api/stats/' and method == 'GET':
+            return 200, dataset.stats(), 'stats'
+        if path == '/api/validate-file/' and method == 'POST':
+            return 200, dataset.validate_rows(form.get('file') or b''), 'validate_file'
+        if path == '/api/campaigns/':
+            if method == 'GET':
+                return 200, dataset.list_campaigns(params), 'campaigns'
+            if method == 'POST':
+                if not form.get('template_name'):
+                    return 400, {'error': 'template_name is required'}, 'create_campaign'
+                recipients = dataset.validate_rows(form.get('file') or b'')['file_info']['valid_rows']
+                campaign = dataset.create_campaign(form['template_name'], recipients)
+                return 201, {'success': True, 'message': 'Campaign created', 'campaign': campaign}, 'create_campaign'
+
+        match = re.fullmatch(r'/api/campaigns/(\d+)/(?:([\w-]+)/)?', path)
+        if match:
+            campaign_id, action = int(match.group(1)), match.group(2)
+            if method == 'GET' and action is None:
+                campaign = dataset.get_campaign(campaign_id)
+                return (200, campaign, 'campaign') if campaign else (404, {'detail': 'Not found.'}, 'campaign')
+            if method == 'GET' and action == 'statistics':
+                body = dataset.campaign_statistics(campaign_id)
+                return (200, body, 'statistics') if body else (404, {'detail': 'Not found.'}, 'statistics')
+            if method == 'GET' and action == 'messages':
+                body = dataset.list_messages(campaign_id, params)
+                return (200, body, 'messages') if body else (404, {'detail': 'Not found.'}, 'messages')
+            if method == 'POST' and action in ('start', 'pause', 'resume', 'check-status'):
+                status, body = dataset.transition(campaign_id, action)
+                return status, body, action.replace('-', '_')
+        return 404, {'detail': 'Not found.'}, 'unknown'
+
+    def start(self) -> 'MockBackend':
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method):
+                parsed = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                content_type = self.headers.get('Content-Type', '')
+                if content_type.startswith('application/json') and body:
+                    form = json.loads(body)
+                else:
+                    form = _form_fields(content_type, body)
+                authorization = self.headers.get('Authorization', '')
+                token = authorization[len('Token '):] if authorization.startswith('Token ') else None
+
+                status, reply, route = backend.route(method, parsed.path, params, token, form)
+                if backend.latency_ms or backend.jitter_ms:
+                    time.sleep((backend.latency_ms + random.random() * backend.jitter_ms) / 1000)
+                payload = json.dumps(reply).encode()
+                # Count before replying so the client never observes a response that is not counted yet
+                backend._record(route, len(payload))
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up on the request, e.g. a hedged GET that another replica answered
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+        self._server = ThreadingHTTPServer(self.address, Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the mock campaign API")
+    parser.add_argument('--campaigns', type=int, default=1000)
+    parser.add_argument('--max-recipients', type=int, default=5000, help="Spread of recipients (and messages) per campaign")
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--tick', type=float, default=0.0,
+                        help="Advance running campaigns every N seconds (0 = static data)")
+    args = parser.parse_args()
+
+    dataset = MockDataset(args.campaigns, max_recipients=args.max_recipients)
+    backend = MockBackend(dataset=dataset, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          host=args.host, port=args.port).start()
+    print(f"Mock API with {args.campaigns:,} campaigns at {backend.url}")
+    try:
+        while True:
+            time.sleep(args.tick or 3600)
+            if args.tick:
+                dataset.advance(seconds=args.tick)
+    except KeyboardInterrupt:
+        backend.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""End-to-end page benchmark: drives app.py and each page headlessly with AppTest.
+
+For every scenario the caches are cleared, the page is rendered once cold and
+then rerun warm several times against the mock backend. Reported per page:
+rerun time (first and warm p50/p95), backend calls per rerun (including
+background work the rerun starts, e.g. prefetches), and peak Python memory
+allocated during a rerun (tracemalloc, measured in a separate pass so it does
+not distort the timings).
+
+Run from the repository root:
+    python -m benchmarks.pages --campaigns 5000 --latency-ms 20 --reruns 10
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+_scratch = tempfile.TemporaryDirectory()
+# Keep the pages' local stores out of data/, and the real suppression list out of the measurements
+os.environ.setdefault('SNAPSHOT_DB_PATH', os.path.join(_scratch.name, 'snapshots.sqlite3'))
+os.environ.setdefault('OFFLINE_CACHE_DB_PATH', os.path.join(_scratch.name, 'offline_cache.sqlite3'))
+os.environ.setdefault('SUPPRESSION_DIR', os.path.join(_scratch.name, 'suppression'))
+
+
+# (name, script, session state, optional interaction run before the measured reruns)
+def scenarios(running_campaign: int) -> List[tuple]:
+    def show_all(at):
+        at.session_state['show_all_campaigns'] = True
+
+    return [
+        ('login', 'app.py', None, None),
+        ('home', 'app.py', {}, None),
+        ('Dashboard', 'pages/Dashboard.py', {}, None),
+        ('Campaigns (page 1)', 'pages/Campaigns.py', {}, None),
+        ('Campaigns (show all)', 'pages/Campaigns.py', {}, show_all),
+        ('Campaigns (manage)', 'pages/Campaigns.py',
+         {'selected_campaign': running_campaign, 'show_manage': True}, None),
+        ('Create_Campaign', 'pages/Create_Campaign.py', {}, None),
+        ('Message_Explorer', 'pages/Message_Explorer.py', {'selected_campaign': running_campaign}, None),
+        # Admins only; the benchmark user is staff, stated here so the scenario does not depend on it
+        ('Diagnostics', 'pages/Diagnostics.py', {'user': {'username': 'bench', 'is_staff': True}}, None),
+    ]
+
+
+class PageBenchmark:
+    """Runs scenarios against one mock backend"""
+
+    def __init__(self, campaigns: int, latency_ms: float, max_recipients: int):
+        from benchmarks.mock_backend import MockBackend, MockDataset
+        self.backend = MockBackend(dataset=MockDataset(campaigns, max_recipients=max_recipients),
+                                   latency_ms=latency_ms).start()
+        os.environ['API_BASE_URL'] = self.backend.url
+        self.token = self.backend.dataset.login('bench')['token']
+        self.running_campaign = next(c['id'] for c in self.backend.dataset.campaigns.values()
+                                     if c['status'] == 'running')
+
+    def stop(self) -> None:
+        self.backend.stop()
+
+    def _settle(self, timeout: float = 2.0, quiet: float = 0.1) -> None:
+        """Wait until background requests started by a rerun have finished"""
+        deadline = time.monotonic() + timeout
+        last = self.backend.requests
+        while time.monotonic() < deadline:
+            time.sleep(quiet)
+            if self.backend.requests == last:
+                return
+            last = self.backend.requests
+
+    def _reset(self) -> None:
+        """Cold start for the next scenario: empty caches and no background workers"""
+        import streamlit as st
+        from components.snapshots import stop_snapshot_recorder
+        from components.sweeper import stop_sweeper
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        stop_snapshot_recorder('bench')
+        stop_sweeper(self.token)
+        self._settle()
+
+    def _app(self, script: str, state: Optional[Dict[str, Any]], setup: Optional[Callable]):
+        from streamlit.testing.v1 import AppTest
+        at = AppTest.from_file(script, default_timeout=120)
+        if state is not None:
+            at.session_state['authenticated'] = True
+            at.session_state['auth_token'] = self.token
+            at.session_state['user'] = {'username': 'bench', 'is_staff': True}
+            for key, value in state.items():
+                at.session_state[key] = value
+        if setup is not None:
+            setup(at)
+        return at
+
+    def _rerun(self, at) -> Dict[str, float]:
+        self.backend.reset_counters()
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        self._settle()
+        if at.exception:
+            raise RuntimeError(f"Page raised: {at.exception[0].value}")
+        return {'ms': elapsed * 1000, 'calls': self.backend.requests}
+
+    def _peak_mb(self, at) -> float:
+        tracemalloc.start()
+        try:
+            at.run()
+            return tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    def run_scenario(self, script: str, state, setup, reruns: int) -> Dict[str, Any]:
+        self._reset()
+        at = self._app(script, state, setup)
+        first = self._rerun(at)
+        warm = [self._rerun(at) for _ in range(reruns)]
+        warm_ms = sorted(w['ms'] for w in warm)
+
+        # Memory in a separate pass: tracemalloc slows everything down
+        self._reset()
+        at = self._app(script, state, setup)
+        first_peak = self._peak_mb(at)
+        warm_peak = self._peak_mb(at)
+        self._settle()
+
+        return {
+            'first_ms': first['ms'],
+            'warm_p50_ms': statistics.median(warm_ms),
+            'warm_p95_ms': warm_ms[min(len(warm_ms) - 1, int(len(warm_ms) * 0.95))],
+            'first_calls': first['calls'],
+            'warm_calls_per_rerun': statistics.mean(w['calls'] for w in warm),
+            'first_peak_mb': first_peak,
+            'warm_peak_mb': warm_peak,
+        }
+
+
+def run(campaigns: int, latency_ms: float, max_recipients: int, reruns: int,
+        only: Optional[List[str]] = None) -> Dict[str, Any]:
+    bench = PageBenchmark(campaigns, latency_ms, max_recipients)
+    results = {}
+    try:
+        for name, script, state, setup in scenarios(bench.running_campaign):
+            if only and not any(o.lower() in name.lower() for o in only):
+                continue
+            results[name] = bench.run_scenario(script, state, setup, reruns)
+    finally:
+        bench._reset()
+        bench.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--campaigns', type=int, default=2000)
+    parser.add_argument('--max-recipients', type=int, default=5000, help="Spread of recipients (and messages) per campaign")
+    parser.add_argument('--latency-ms', type=float, default=10.0, help="Injected backend latency per request")
+    parser.add_argument('--reruns', type=int, default=5, help="Warm reruns per page")
+    parser.add_argument('--only', nargs='*', help="Run only scenarios whose name contains one of these")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.campaigns, args.latency_ms, args.max_recipients, args.reruns, args.only)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.campaigns:,} campaigns, {args.latency_ms:g} ms backend latency, {args.reruns} warm reruns")
+    print(f"{'page':<22} {'first ms':>9} {'warm p50':>9} {'warm p95':>9} {'calls 1st':>10} "
+          f"{'calls/rerun':>12} {'peak MB 1st':>12} {'peak MB warm':>13}")
+    for name, row in results.items():
+        print(f"{name:<22} {row['first_ms']:>9.0f} {row['warm_p50_ms']:>9.0f} {row['warm_p95_ms']:>9.0f} "
+              f"{row['first_calls']:>10} {row['warm_calls_per_rerun']:>12.1f} "
+              f"{row['first_peak_mb']:>12.1f} {row['warm_peak_mb']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Throughput of starting many large campaigns at once vs through the start scheduler.
+
+Runs against the mock backend in simulated time: every running campaign sends
+at the provider's rate, and the clock only moves when the simulation advances
+it, so an hour of sending takes seconds. Optionally some campaigns are started
+directly, outside the scheduler, as the Campaigns page or a bulk action would;
+their sending counts against the budget too. Reported per strategy: sent
+recipients per simulated minute across all campaigns (peak and mean), minutes
+above the budget (any amount over counts), time until every campaign
+completed, and the control calls made to queued campaigns.
+
+Run from the repository root:
+    python -m benchmarks.start_scheduler --campaigns 20 --recipients 5000 --budget 2000 --provider-rate 600 --outside 1
+"""
+import argparse
+import json
+import os
+import tempfile
+from typing import Any, Dict, List
+
+os.environ.setdefault('API_BASE_URL', 'http://127.0.0.1')
+
+from benchmarks.mock_backend import MockBackend  # noqa: E402
+from components.api_client import APIClient  # noqa: E402
+from components.scheduler import ScheduleStore, StartScheduler  # noqa: E402
+
+
+def per_minute(samples: List[tuple]) -> List[int]:
+    """Recipients sent in each simulated minute, from (seconds, cumulative sent) samples"""
+    minutes: Dict[int, int] = {}
+    for (t0, s0), (t1, s1) in zip(samples, samples[1:]):
+        minutes[int(t0 // 60)] = minutes.get(int(t0 // 60), 0) + (s1 - s0)
+    return [minutes[m] for m in sorted(minutes)]
+
+
+def simulate(strategy: str, campaigns: int, outside: int, recipients: int, budget: float, provider_rate: float,
+             tick: float, max_minutes: int) -> Dict[str, Any]:
+    backend = MockBackend(campaigns=0).start()
+    dataset = backend.dataset
+    api = APIClient(token="bench", base_url=backend.url)
+    ids = [dataset.create_campaign(f"bulk_{i}", recipients)['id'] for i in range(campaigns)]
+    outside_ids = [dataset.create_campaign(f"manual_{i}", recipients)['id'] for i in range(outside)]
+    origin = dataset.now.timestamp()
+    clock = lambda: dataset.now.timestamp()
+    sent_total = lambda: sum(dataset.campaigns[i]['sent_count'] for i in ids + outside_ids)
+    calls = {'start': 0, 'pause': 0, 'resume': 0}
+    for campaign_id in outside_ids:
+        api.start_campaign(campaign_id)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler = None
+        if strategy == 'all at once':
+            for campaign_id in ids:
+                api.start_campaign(campaign_id)
+            calls['start'] = len(ids)
+        else:
+            store = ScheduleStore(os.path.join(tmp, 'scheduler.sqlite3'))
+            for campaign_id in ids:
+                store.add(campaign_id, origin, now=origin)
+            scheduler = StartScheduler(api, store, budget_per_minute=budget, tick_seconds=tick, clock=clock)
+
+        samples = [(0.0, sent_total())]
+        finished_at = None
+        while clock() - origin < max_minutes * 60:
+            if scheduler is not None:
+                for action in scheduler.tick()['actions']:
+                    calls[action['action']] += 1
+            dataset.advance(seconds=tick, running_updates=len(dataset.campaigns), send_rate=provider_rate / 60)
+            samples.append((clock() - origin, sent_total()))
+            if all(dataset.campaigns[i]['status'] == 'completed' for i in ids + outside_ids):
+                finished_at = clock() - origin
+                break
+        if scheduler is not None:
+            scheduler.store.close()
+    backend.stop()
+
+    minutes = per_minute(samples)
+    # The last minute is usually partial, so it is left out of the mean
+    full = minutes[:-1] or minutes
+    return {
+        'peak_per_minute': max(minutes, default=0),
+        'mean_per_minute': sum(full) / len(full) if full else 0,
+        'minutes_over_budget': sum(1 for m in minutes if m > budget),
+        'minutes_to_complete': finished_at / 60 if finished_at is not None else None,
+        'control_calls': calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--campaigns', type=int, default=20, help="Campaigns queued (or, without the scheduler, started)")
+    parser.add_argument('--outside', type=int, default=0, help="Campaigns started directly, outside the scheduler")
+    parser.add_argument('--recipients', type=int, default=5000, help="Recipients per campaign")
+    parser.add_argument('--budget', type=float, default=2000, help="Recipients per minute across all campaigns")
+    parser.add_argument('--provider-rate', type=float, default=600, help="Recipients per minute one running campaign sends")
+    parser.add_argument('--tick', type=float, default=15, help="Seconds between scheduler ticks")
+    parser.add_argument('--max-minutes', type=int, default=600, help="Simulated time limit")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = {strategy: simulate(strategy, args.campaigns, args.outside, args.recipients, args.budget, args.provider_rate,
+                                  args.tick, args.max_minutes)
+               for strategy in ('all at once', 'scheduler')}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.campaigns} + {args.outside} outside campaigns x {args.recipients:,} recipients, budget {args.budget:,.0f}/min, "
+          f"provider {args.provider_rate:,.0f}/min per campaign, {args.tick:.0f}s ticks")
+    print(f"{'strategy':<14} {'peak/min':>10} {'mean/min':>10} {'min>budget':>11} {'minutes':>9} {'start/pause/resume':>20}")
+    for name, row in results.items():
+        done = f"{row['minutes_to_complete']:.1f}" if row['minutes_to_complete'] is not None else '-'
+        calls = row['control_calls']
+        print(f"{name:<14} {row['peak_per_minute']:>10,} {row['mean_per_minute']:>10,.0f} "
+              f"{row['minutes_over_budget']:>11} {done:>9} "
+              f"{calls['start']:>8}/{calls['pause']}/{calls['resume']}")
+
+
+if __name__ == '__main__':
+    main()
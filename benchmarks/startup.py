@@ -0,0 +1,136 @@
+"""Cold-start cost per page: import time and time to first render in a fresh process.
+
+Every measurement runs in a new interpreter, like the first request after a
+deploy or scale-out. The page's top-level imports are timed first, then the
+page is rendered once with streamlit's AppTest against the mock backend (the
+first render includes anything imported lazily), then rendered again warm.
+
+Run from the repository root:
+    python -m benchmarks.startup --runs 3
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# (label, script, authenticated)
+PAGES = [
+    ('login', 'app.py', False),
+    ('home', 'app.py', True),
+    ('Dashboard', 'pages/Dashboard.py', True),
+    ('Campaigns', 'pages/Campaigns.py', True),
+    ('Create_Campaign', 'pages/Create_Campaign.py', True),
+    ('Message_Explorer', 'pages/Message_Explorer.py', True),
+    ('Diagnostics', 'pages/Diagnostics.py', True),
+]
+
+
+def top_level_imports(script: str) -> str:
+    """The script's module-level import statements as source code"""
+    with open(script) as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure_child(script: str, authenticated: bool) -> dict:
+    """Runs inside the fresh interpreter"""
+    started = time.perf_counter()
+    import streamlit  # noqa: F401  Baseline every page pays, reported separately
+    streamlit_s = time.perf_counter() - started
+
+    modules_before = len(sys.modules)
+    started = time.perf_counter()
+    exec(compile(top_level_imports(script), script, 'exec'), {})
+    import_s = time.perf_counter() - started
+    imported = len(sys.modules) - modules_before
+
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(script, default_timeout=60)
+    if authenticated:
+        at.session_state['authenticated'] = True
+        at.session_state['auth_token'] = 'bench'
+        at.session_state['user'] = {'username': 'bench', 'is_staff': True}
+
+    started = time.perf_counter()
+    at.run()
+    first_render_s = time.perf_counter() - started
+    started = time.perf_counter()
+    at.run()
+    warm_render_s = time.perf_counter() - started
+
+    return {
+        'streamlit_import_ms': streamlit_s * 1000,
+        'page_import_ms': import_s * 1000,
+        'modules_imported': imported,
+        'first_render_ms': first_render_s * 1000,
+        'warm_render_ms': warm_render_s * 1000,
+        'heavy_modules_loaded': sorted(m for m in ('pandas', 'numpy', 'sqlite3')
+                                       if m in sys.modules),
+        'exceptions': [str(e.value) for e in at.exception],
+    }
+
+
+def run(runs: int) -> dict:
+    from benchmarks.mock_backend import MockBackend
+    backend = MockBackend(campaigns=1000).start()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            env = dict(os.environ, API_BASE_URL=backend.url,
+                       SNAPSHOT_DB_PATH=os.path.join(scratch, 'snapshots.sqlite3'),
+                       OFFLINE_CACHE_DB_PATH=os.path.join(scratch, 'offline_cache.sqlite3'),
+                       SUPPRESSION_DIR=os.path.join(scratch, 'suppression'))
+            for label, script, authenticated in PAGES:
+                samples = []
+                for _ in range(runs):
+                    output = subprocess.run(
+                        [sys.executable, '-m', 'benchmarks.startup', '--child', script]
+                        + (['--authenticated'] if authenticated else []),
+                        env=env, capture_output=True, text=True, check=True
+                    ).stdout
+                    samples.append(json.loads(output.strip().splitlines()[-1]))
+                row = {key: statistics.median(s[key] for s in samples)
+                       for key in samples[0] if isinstance(samples[0][key], (int, float))}
+                row['heavy_modules_loaded'] = samples[-1]['heavy_modules_loaded']
+                row['exceptions'] = samples[-1]['exceptions']
+                results[label] = row
+    finally:
+        backend.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3, help="Fresh processes per page (median is reported)")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--authenticated', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_child(args.child, args.authenticated)))
+        return
+
+    results = run(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Median of {args.runs} fresh processes per page (streamlit itself: "
+          f"{statistics.median(r['streamlit_import_ms'] for r in results.values()):.0f} ms, not included)")
+    print(f"{'page':<18} {'import ms':>10} {'modules':>8} {'first render ms':>16} {'warm ms':>8}  heavy modules")
+    for label, row in results.items():
+        print(f"{label:<18} {row['page_import_ms']:>10.0f} {row['modules_imported']:>8.0f} "
+              f"{row['first_render_ms']:>16.0f} {row['warm_render_ms']:>8.0f}  "
+              f"{', '.join(row['heavy_modules_loaded']) or '-'}")
+        if row['exceptions']:
+            print(f"{'':<18} exceptions: {row['exceptions']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""Minimal headless Streamlit client speaking the browser's websocket protocol.
+
+Used by the load test to drive a real `streamlit run` server: each
+StreamlitSession is one browser tab with its own server-side session state.
+Widgets are addressed by label, as a user would see them.
+"""
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from tornado.httpclient import AsyncHTTPClient
+from tornado.websocket import websocket_connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.Common_pb2 import FileUploaderState, UploadedFileInfo
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+FINISHED_EARLY_FOR_RERUN = ForwardMsg.ScriptFinishedStatus.Value('FINISHED_EARLY_FOR_RERUN')
+
+
+class RunResult:
+    """What one script run sent back"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.finished: Optional[float] = None
+        self.last_delta: Optional[float] = None
+        self.status: Optional[int] = None
+        self.elements = 0
+        self.exceptions: List[str] = []
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def render_seconds(self) -> float:
+        """Run start to last element; excludes time the script spends sleeping after rendering"""
+        return ((self.last_delta or self.finished or time.perf_counter()) - self.started)
+
+    @property
+    def reran(self) -> bool:
+        return self.status == FINISHED_EARLY_FOR_RERUN
+
+
+class StreamlitSession:
+    """One browser-like session against a running Streamlit server"""
+
+    def __init__(self, server_url: str):
+        self.server_url = server_url.rstrip('/')
+        self.ws = None
+        self.session_id: Optional[str] = None
+        self.pages: Dict[str, str] = {}  # page name -> page_script_hash
+        self.page_hash = ''
+        self.widgets: Dict[str, WidgetState] = {}  # widget id -> last value we sent
+        self.labels: Dict[str, str] = {}  # label -> widget id, from the latest run
+        self.buttons: Dict[str, str] = {}
+        self._rendered: set = set()
+        self._file_urls: Dict[str, Any] = {}
+
+    async def connect(self) -> None:
+        url = self.server_url.replace('http', 'ws', 1) + '/_stcore/stream'
+        self.ws = await websocket_connect(url, subprotocols=['streamlit'], max_message_size=256 * 2 ** 20)
+
+    def close(self) -> None:
+        if self.ws is not None:
+            self.ws.close()
+
+    async def _send(self, message: BackMsg) -> None:
+        await self.ws.write_message(message.SerializeToString(), binary=True)
+
+    def _track_element(self, element) -> None:
+        kind = element.WhichOneof('type')
+        if kind is None:
+            return
+        proto = getattr(element, kind)
+        if kind == 'exception':
+            self._current.exceptions.append(f"{proto.type}: {proto.message}")
+            return
+        widget_id = getattr(proto, 'id', '')
+        label = getattr(proto, 'label', '')
+        if widget_id:
+            self._rendered.add(widget_id)
+        if widget_id and label:
+            self.labels.setdefault(label, widget_id)
+            if kind == 'button':
+                self.buttons.setdefault(label, widget_id)
+
+    async def _read_run(self, result: RunResult, follow_reruns: bool) -> RunResult:
+        """Consume messages until the run (and, optionally, the reruns it requested) finishes"""
+        self._current = result
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("Streamlit server closed the websocket")
+            message = ForwardMsg()
+            message.ParseFromString(raw)
+            kind = message.WhichOneof('type')
+            if kind == 'new_session':
+                if message.new_session.initialize.session_id:
+                    self.session_id = message.new_session.initialize.session_id
+                self.page_hash = message.new_session.page_script_hash
+                self.labels, self.buttons, self._rendered = {}, {}, set()
+            elif kind == 'navigation':
+                for page in message.navigation.app_pages:
+                    self.pages[page.page_name] = page.page_script_hash
+            elif kind == 'delta':
+                result.last_delta = time.perf_counter()
+                if message.delta.WhichOneof('type') == 'new_element':
+                    result.elements += 1
+                    self._track_element(message.delta.new_element)
+            elif kind == 'file_urls_response':
+                self._file_urls[message.file_urls_response.response_id] = message.file_urls_response
+            elif kind == 'script_finished':
+                result.finished = time.perf_counter()
+                result.status = message.script_finished
+                if result.reran and follow_reruns:
+                    continue
+                # Like the browser, forget values of widgets the last run did not render
+                self.widgets = {k: v for k, v in self.widgets.items() if k in self._rendered}
+                return result
+
+    async def rerun(self, page: Optional[str] = None, triggers: Optional[List[str]] = None,
+                    follow_reruns: bool = True) -> RunResult:
+        """Run the current page, or the one named as in the sidebar, optionally clicking buttons by label"""
+        if page is not None and self.pages[page] != self.page_hash:
+            self.page_hash = self.pages[page]
+            self.widgets = {}
+        states = list(self.widgets.values())
+        for label in triggers or []:
+            states.append(WidgetState(id=self.buttons[label], trigger_value=True))
+        message = BackMsg()
+        message.rerun_script.CopyFrom(ClientState(query_string='', page_script_hash=self.page_hash))
+        message.rerun_script.widget_states.widgets.extend(states)
+        result = RunResult(time.perf_counter())
+        await self._send(message)
+        return await self._read_run(result, follow_reruns)
+
+    async def next_run(self, follow_reruns: bool = False) -> RunResult:
+        """Wait for a run the server starts on its own (e.g. a script calling st.rerun in a loop)"""
+        return await self._read_run(RunResult(time.perf_counter()), follow_reruns)
+
+    def set_text(self, label: str, value: str) -> None:
+        self.widgets[self.labels[label]] = WidgetState(id=self.labels[label], string_value=value)
+
+    def set_bool(self, label: str, value: bool) -> None:
+        self.widgets[self.labels[label]] = WidgetState(id=self.labels[label], bool_value=value)
+
+    def set_index(self, label: str, index: int) -> None:
+        self.widgets[self.labels[label]] = WidgetState(id=self.labels[label], int_value=index)
+
+    async def upload(self, label: str, name: str, content: bytes, mime: str = 'text/csv') -> None:
+        """Upload a file into a file_uploader, as the browser does"""
+        request_id = uuid.uuid4().hex
+        message = BackMsg()
+        message.file_urls_request.request_id = request_id
+        message.file_urls_request.file_names.append(name)
+        message.file_urls_request.session_id = self.session_id
+        await self._send(message)
+        while request_id not in self._file_urls:
+            raw = await self.ws.read_message()
+            reply = ForwardMsg()
+            reply.ParseFromString(raw)
+            if reply.WhichOneof('type') == 'file_urls_response':
+                self._file_urls[reply.file_urls_response.response_id] = reply.file_urls_response
+        response = self._file_urls.pop(request_id)
+        if response.error_msg:
+            raise RuntimeError(response.error_msg)
+        urls = response.file_urls[0]
+
+        boundary = uuid.uuid4().hex
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{name}\"\r\n"
+                f"Content-Type: {mime}\r\n\r\n").encode() + content + f"\r\n--{boundary}--\r\n".encode()
+        upload_url = urls.upload_url if urls.upload_url.startswith('http') else self.server_url + urls.upload_url
+        await AsyncHTTPClient().fetch(upload_url, method='PUT', body=body,
+                                      headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+        widget_id = self.labels[label]
+        state = FileUploaderState(max_file_id=0)
+        state.uploaded_file_info.append(UploadedFileInfo(name=name, size=len(content), file_id=urls.file_id,
+                                                         file_urls=urls))
+        self.widgets[widget_id] = WidgetState(id=widget_id, file_uploader_state_value=state)
@@ -0,0 +1,95 @@
+"""Size and lookup speed of the suppression list.
+
+Builds a list of random numbers in a temporary directory, then screens
+batches of which a given fraction is suppressed. Reported: build time, bytes
+on disk and held in memory (the Bloom filter), Bloom false positive rate,
+lookup rate with and without normalizing the phone strings, and the time to
+screen a whole CSV upload.
+
+Run from the repository root:
+    python -m benchmarks.suppression --numbers 20000000 --rows 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault('API_BASE_URL', 'http://127.0.0.1')
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from components.suppression import SuppressionList, normalize_phones, screen_upload  # noqa: E402
+
+FIRST_NUMBER = 910000000000
+NUMBER_RANGE = 9_000_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--numbers', type=int, default=20_000_000, help="Suppressed numbers")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Rows per screened batch")
+    parser.add_argument('--hit-rate', type=float, default=0.05, help="Fraction of screened rows that are suppressed")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    suppressed = FIRST_NUMBER + rng.choice(NUMBER_RANGE, size=args.numbers, replace=False)
+    hits = int(args.rows * args.hit_rate)
+    batch = np.concatenate([rng.choice(suppressed, size=hits),
+                            FIRST_NUMBER + rng.integers(0, NUMBER_RANGE, size=args.rows - hits)])
+    phones = pd.Series(['+' + str(number) for number in batch])
+    upload = pd.DataFrame({'phone': phones, 'has_variables': 'false', 'variables': '',
+                           'has_media': 'false', 'media_url': ''}).to_csv(index=False).encode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        SuppressionList(tmp).add(suppressed, source='benchmark')
+        build = time.perf_counter() - started
+        disk = {name: os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)}
+
+        # A fresh instance, as another process would see the list
+        suppression = SuppressionList(tmp)
+        numbers, bloom = suppression._load()
+        started = time.perf_counter()
+        found = suppression.contains(batch)
+        lookup = time.perf_counter() - started
+        false_positives = float(bloom.might_contain(batch[hits:]).mean() - found[hits:].mean())
+
+        started = time.perf_counter()
+        suppression.contains(normalize_phones(phones))
+        normalized_lookup = time.perf_counter() - started
+
+        started = time.perf_counter()
+        screening = screen_upload(upload, 'upload.csv', suppression)
+        screen = time.perf_counter() - started
+
+    results = {
+        'numbers': args.numbers,
+        'build_seconds': build,
+        'disk_bytes': disk.get('numbers.npy', 0) + disk.get('bloom.npy', 0),
+        'memory_bytes': int(bloom.array.nbytes),
+        'bloom_false_positive_rate': false_positives,
+        'found': int(found.sum()),
+        'lookup_rows_per_second': args.rows / lookup,
+        'normalize_and_lookup_rows_per_second': args.rows / normalized_lookup,
+        'screen_upload_seconds': screen,
+        'upload_bytes': len(upload),
+        'suppressed_rows': screening['suppressed'],
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.numbers:,} suppressed numbers: built in {build:.1f}s, "
+          f"{results['disk_bytes'] / 2 ** 20:,.1f} MB on disk, {results['memory_bytes'] / 2 ** 20:,.1f} MB in memory, "
+          f"{false_positives:.2%} Bloom false positives")
+    print(f"{args.rows:,} rows, {args.hit_rate:.0%} suppressed: "
+          f"{results['lookup_rows_per_second'] / 1e6:,.1f}M rows/s (int64), "
+          f"{results['normalize_and_lookup_rows_per_second'] / 1e6:,.1f}M rows/s (phone strings)")
+    print(f"Screened a {len(upload) / 2 ** 20:,.1f} MB CSV upload in {screen:.2f}s, "
+          f"{screening['suppressed']:,} rows dropped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,398 @@
+"""Headless bulk operations against the campaign backend, without Streamlit.
+
+Run from the repository root:
+    python cli.py create recipients/ --start
+    python cli.py start --status pending
+    python cli.py pause 12 13 14
+    python cli.py export 12 13 --format xlsx --out reports/
+    python cli.py stats --campaign 12 13
+    python cli.py schedule add 12 13 --at 2026-03-01T09:00
+    python cli.py schedule run --budget 2000
+    python cli.py suppression import opt-outs.csv
+    python cli.py suppression from-failures --min-failures 3
+
+Every command writes JSON lines to stdout: a 'progress' event as each item
+finishes and a 'summary' at the end. The exit status is 1 when any item
+failed. The token comes from --token or CAMPAIGN_API_TOKEN, or from a login
+with --username (password from CAMPAIGN_API_PASSWORD, else prompted).
+"""
+import argparse
+import csv
+import getpass
+import glob
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from components.api_client import APIClient
+from components.bulk import BULK_ACTIONS, run_bulk_action
+from components.concurrency import run_concurrently
+from components.scheduler import ACTIVE_STATES, ScheduleStore, StartScheduler
+from components.suppression import (failing_numbers, get_suppression_list, normalize_phones, read_phone_file,
+                                    screen_upload)
+from config import (API_TIMEOUT, BULK_CALL_TIMEOUT, BULK_RETRIES, CLI_MAX_WORKERS, CLI_RECIPIENT_PATTERNS,
+                    CLI_EXPORT_PAGE_SIZE, SCHEDULER_BUDGET_PER_MINUTE, SCHEDULER_TICK_SECONDS,
+                    SUPPRESSION_MIN_FAILURES, get_api_base_url)
+
+UPLOAD_TYPES = {
+    '.csv': 'text/csv',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.xls': 'application/vnd.ms-excel',
+}
+
+# Message columns in exported reports, as in the Campaigns page export
+EXPORT_COLUMNS = ['phone_number', 'status', 'sent_at', 'delivered_at', 'read_at', 'failed_at', 'error_message']
+
+
+def emit(event: str, **fields) -> None:
+    print(json.dumps({'event': event, **fields}, default=str), flush=True)
+
+
+class Progress:
+    """Counts finished items and emits a progress event for each"""
+
+    def __init__(self, operation: str, total: int):
+        self.operation = operation
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def record(self, result: Dict[str, Any]) -> None:
+        self.done += 1
+        self.failed += 0 if result.get('success') else 1
+        emit('progress', **{**result, 'operation': self.operation, 'done': self.done, 'total': self.total,
+                            'elapsed': round(time.monotonic() - self.started, 3)})
+
+    def summary(self, **fields) -> int:
+        emit('summary', operation=self.operation, total=self.total, succeeded=self.done - self.failed,
+             failed=self.failed, elapsed=round(time.monotonic() - self.started, 3), **fields)
+        return 1 if self.failed else 0
+
+
+def run_items(operation: str, func: Callable[[Any], Dict[str, Any]], items: List[Any], workers: int,
+              describe: Callable[[Any], Dict[str, Any]]) -> int:
+    """Run func over items concurrently; an exception fails only its own item"""
+    progress = Progress(operation, len(items))
+
+    def record(item, result, error):
+        if error is not None:
+            result = {'success': False, 'message': f"{type(error).__name__}: {str(error)}"}
+        progress.record({**describe(item), **result})
+
+    run_concurrently(func, items, max_workers=workers, on_result=record)
+    return progress.summary()
+
+
+def select_campaigns(api: APIClient, ids: List[int], statuses: Optional[List[str]]) -> List[int]:
+    """Explicit ids, else every campaign in one of the statuses"""
+    if ids:
+        return ids
+    response = api.get_all_campaigns()
+    if response.get('success') is False:
+        raise RuntimeError(response.get('error', 'Failed to load campaigns'))
+    return [c['id'] for c in response.get('results', []) if c.get('status') in statuses]
+
+
+def recipient_files(directory: str) -> List[str]:
+    paths = set()
+    for pattern in CLI_RECIPIENT_PATTERNS:
+        paths.update(glob.glob(os.path.join(directory, pattern)))
+    return sorted(paths)
+
+
+def cmd_create(api: APIClient, args) -> int:
+    paths = recipient_files(args.directory)
+    if not paths:
+        raise RuntimeError(f"No recipient files ({', '.join(CLI_RECIPIENT_PATTERNS)}) in {args.directory}")
+
+    suppression = None if args.keep_suppressed else get_suppression_list()
+
+    def create(path: str) -> Dict[str, Any]:
+        # Not retried: the backend cannot tell a retried upload from a second campaign
+        template_name = args.template or os.path.splitext(os.path.basename(path))[0]
+        name, suppressed = os.path.basename(path), 0
+        with open(path, 'rb', buffering=0) as upload:
+            if suppression is not None and len(suppression):
+                screening = screen_upload(upload.read(), name, suppression)
+                suppressed = screening['suppressed']
+                if screening['content'] is not None:
+                    upload, name = io.BytesIO(screening['content']), screening['file_name']
+                else:
+                    upload.seek(0)
+            upload.name = name
+            upload.type = UPLOAD_TYPES.get(os.path.splitext(name)[1].lower(), 'application/octet-stream')
+            if args.validate:
+                validation = api.validate_file(upload)
+                if not validation.get('success'):
+                    return {'success': False, 'message': validation.get('error', 'Validation failed')}
+                invalid = (validation.get('file_info') or {}).get('invalid_rows', 0)
+                if invalid and not args.allow_invalid:
+                    return {'success': False, 'message': f"{invalid} invalid rows", 'file_info': validation.get('file_info')}
+                upload.seek(0)
+            response = api.create_campaign(template_name, upload)
+        if not response.get('success'):
+            return {'success': False, 'message': response.get('error', 'Failed to create campaign')}
+
+        campaign = response.get('campaign', {})
+        result = {'success': True, 'campaign_id': campaign.get('id'), 'template_name': template_name,
+                  'status': campaign.get('status'), 'suppressed': suppressed}
+        if args.start and campaign.get('id') is not None:
+            started = api.start_campaign(campaign['id'])
+            result['started'] = bool(started.get('success'))
+            if not result['started']:
+                result.update(success=False, message=started.get('error', 'Failed to start campaign'))
+        return result
+
+    return run_items('create', create, paths, args.workers, lambda path: {'file': path})
+
+
+def cmd_control(api: APIClient, args) -> int:
+    action = args.command
+    statuses = args.status or BULK_ACTIONS[action]['statuses']
+    campaign_ids = list(dict.fromkeys(select_campaigns(api, args.ids, statuses)))
+    progress = Progress(action, len(campaign_ids))
+    run_bulk_action(api.token, action, campaign_ids, max_workers=args.workers, timeout=args.timeout,
+                    retries=args.retries, base_url=','.join(api.endpoints),
+                    on_result=lambda result: progress.record({
+                        'campaign_id': result['campaign_id'], 'success': result['success'],
+                        'message': result['message'], 'attempts': result['attempts'],
+                        'seconds': round(result['elapsed'], 3)}))
+    return progress.summary()
+
+
+def write_report(api: APIClient, campaign_id: int, out_dir: str, fmt: str,
+                 status: Optional[str]) -> Dict[str, Any]:
+    """Write one campaign's report; CSV is streamed, XLSX is built in memory"""
+    campaign = api.get_campaign(campaign_id)
+    if campaign.get('success') is False or not campaign.get('id'):
+        return {'success': False, 'message': campaign.get('error', 'Campaign not found')}
+    pages = api.iter_campaign_messages(campaign_id, status=status, page_size=CLI_EXPORT_PAGE_SIZE)
+    path = os.path.join(out_dir, f"campaign_{campaign_id}_report.{fmt}")
+    rows = 0
+
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            for messages in pages:
+                writer.writerows(messages)
+                rows += len(messages)
+    else:
+        import pandas as pd
+        from components.message_table import build_message_table, export_frame
+        messages = build_message_table(pages)
+        rows = len(messages)
+        summary = {
+            'Campaign ID': campaign_id,
+            'Template': campaign.get('template_name', ''),
+            'Status': campaign.get('status', ''),
+            'Total Recipients': campaign.get('total_recipients', 0),
+            'Sent': campaign.get('sent_count', 0),
+            'Delivered': campaign.get('delivered_count', 0),
+            'Read': campaign.get('read_count', 0),
+            'Failed': campaign.get('failed_count', 0),
+            'Created At': campaign.get('created_at', ''),
+            'Started At': campaign.get('started_at', ''),
+            'Completed At': campaign.get('completed_at', ''),
+        }
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            pd.DataFrame([summary]).to_excel(writer, sheet_name='Summary', index=False)
+            if rows:
+                export_frame(messages, EXPORT_COLUMNS).to_excel(writer, sheet_name='Messages', index=False)
+
+    return {'success': True, 'path': path, 'rows': rows, 'bytes': os.path.getsize(path)}
+
+
+def cmd_export(api: APIClient, args) -> int:
+    os.makedirs(args.out, exist_ok=True)
+    campaign_ids = select_campaigns(api, args.ids, args.campaign_status)
+    return run_items('export', lambda campaign_id: write_report(api, campaign_id, args.out, args.format,
+                                                                args.message_status),
+                     campaign_ids, args.workers, lambda campaign_id: {'campaign_id': campaign_id})
+
+
+def cmd_stats(api: APIClient, args) -> int:
+    if not args.campaign:
+        response = api.get_stats()
+        if not response.get('success'):
+            raise RuntimeError(response.get('error', 'Failed to load statistics'))
+        emit('stats', statistics=response.get('statistics', {}))
+        return 0
+
+    def statistics(campaign_id: int) -> Dict[str, Any]:
+        response = api.get_campaign_statistics(campaign_id)
+        if not response.get('success'):
+            return {'success': False, 'message': response.get('error', 'Failed to load statistics')}
+        return {'success': True, 'statistics': response.get('statistics', {})}
+
+    return run_items('stats', statistics, args.campaign, args.workers,
+                     lambda campaign_id: {'campaign_id': campaign_id})
+
+
+def cmd_schedule(api: Optional[APIClient], args) -> int:
+    store = ScheduleStore()
+    if args.schedule_command == 'add':
+        start_at = datetime.fromisoformat(args.at).timestamp() if args.at else time.time()
+        for campaign_id in args.ids:
+            store.add(campaign_id, start_at)
+        emit('scheduled', campaign_ids=args.ids, start_at=datetime.fromtimestamp(start_at).isoformat())
+    elif args.schedule_command == 'cancel':
+        cancelled = [campaign_id for campaign_id in args.ids if store.cancel(campaign_id)]
+        emit('cancelled', campaign_ids=cancelled)
+    elif args.schedule_command == 'list':
+        for entry in store.entries(None if args.all else ACTIVE_STATES):
+            emit('entry', **entry)
+    else:
+        scheduler = StartScheduler(api, store, budget_per_minute=args.budget, tick_seconds=args.tick)
+        if args.once:
+            emit('tick', **scheduler.tick())
+            return 0
+        try:
+            scheduler.run(on_tick=lambda report: emit('tick', **report))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def cmd_suppression(api: Optional[APIClient], args) -> int:
+    suppression = get_suppression_list()
+    if args.suppression_command == 'import':
+        for path in args.files:
+            added = suppression.add(read_phone_file(path, path, args.column), source='opt-out import')
+            emit('imported', file=path, added=added)
+    elif args.suppression_command == 'remove':
+        numbers = normalize_phones(args.numbers)
+        emit('removed', removed=suppression.remove(numbers))
+    elif args.suppression_command == 'from-failures':
+        campaign_ids = select_campaigns(api, args.ids, args.campaign_status)
+        found = failing_numbers(api, campaign_ids, min_failures=args.min_failures, page_size=CLI_EXPORT_PAGE_SIZE,
+                                max_workers=args.workers)
+        added = suppression.add(found.pop('numbers'), source='failures')
+        emit('imported', source='failures', added=added, **found)
+        if found['errors']:
+            return 1
+    emit('suppression', **suppression.stats())
+    return 0
+
+
+def resolve_token(args, base_url: str) -> str:
+    if args.token:
+        return args.token
+    if not args.username:
+        raise RuntimeError("Pass --token (or set CAMPAIGN_API_TOKEN) or --username")
+    password = os.getenv('CAMPAIGN_API_PASSWORD') or getpass.getpass(f"Password for {args.username}: ")
+    response = APIClient(token='', base_url=base_url).login(args.username, password)
+    if not response.get('success') or not response.get('token'):
+        raise RuntimeError(response.get('error', 'Invalid credentials'))
+    return response['token']
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Accepted after any command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--api-url', help="Backend URL (default: API_BASE_URL or secrets.toml)")
+    common.add_argument('--token', default=os.getenv('CAMPAIGN_API_TOKEN'), help="API token")
+    common.add_argument('--username', help="Log in as this user when no token is given")
+    common.add_argument('--workers', type=int, default=CLI_MAX_WORKERS, help="Concurrent operations")
+    common.add_argument('--timeout', type=float,
+                        help=f"Seconds per backend request (default: {BULK_CALL_TIMEOUT} for start/pause/resume, "
+                             f"{API_TIMEOUT} otherwise)")
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create = commands.add_parser('create', parents=[common], help="Create a campaign per recipient file in a directory")
+    create.add_argument('directory')
+    create.add_argument('--template', help="Template name for every campaign (default: the file name)")
+    create.add_argument('--validate', action='store_true', help="Validate each file before creating")
+    create.add_argument('--allow-invalid', action='store_true', help="Create even if validation finds invalid rows")
+    create.add_argument('--start', action='store_true', help="Start each campaign once created")
+    create.add_argument('--keep-suppressed', action='store_true',
+                        help="Upload numbers on the suppression list instead of dropping them")
+
+    for action in BULK_ACTIONS:
+        control = commands.add_parser(action, parents=[common], help=f"{action.capitalize()} campaigns")
+        control.add_argument('ids', nargs='*', type=int,
+                             help=f"Campaign ids (default: every campaign in {'/'.join(BULK_ACTIONS[action]['statuses'])})")
+        control.add_argument('--status', action='append', choices=BULK_ACTIONS[action]['statuses'],
+                             help="Only campaigns in this status; repeatable")
+        control.add_argument('--retries', type=int, default=BULK_RETRIES,
+                             help="Retries for timeouts, connection errors and 429/5xx")
+
+    export = commands.add_parser('export', parents=[common], help="Write campaign reports")
+    export.add_argument('ids', nargs='*', type=int, help="Campaign ids (default: every completed campaign)")
+    export.add_argument('--campaign-status', action='append', default=None,
+                        help="Export every campaign in this status; repeatable")
+    export.add_argument('--message-status', help="Only messages in this status")
+    export.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+    export.add_argument('--out', default='reports', help="Output directory")
+
+    stats = commands.add_parser('stats', parents=[common], help="Dump overall or per-campaign statistics")
+    stats.add_argument('--campaign', nargs='+', type=int, help="Campaign ids (default: overall statistics)")
+
+    schedule = commands.add_parser('schedule', help="Queue campaign starts and run the rate-shaping scheduler")
+    schedule_commands = schedule.add_subparsers(dest='schedule_command', required=True)
+    add = schedule_commands.add_parser('add', help="Queue campaigns to start")
+    add.add_argument('ids', nargs='+', type=int)
+    add.add_argument('--at', help="Start time, ISO 8601 (default: now)")
+    cancel = schedule_commands.add_parser('cancel', help="Stop managing campaigns")
+    cancel.add_argument('ids', nargs='+', type=int)
+    listing = schedule_commands.add_parser('list', help="Show the queue")
+    listing.add_argument('--all', action='store_true', help="Include finished and cancelled entries")
+    for sub in (add, cancel, listing):
+        sub.set_defaults(needs_api=False)
+    run = schedule_commands.add_parser('run', parents=[common], help="Start, pause and resume queued campaigns")
+    run.add_argument('--budget', type=float, default=SCHEDULER_BUDGET_PER_MINUTE,
+                     help="Recipients per minute across all scheduled campaigns")
+    run.add_argument('--tick', type=float, default=SCHEDULER_TICK_SECONDS, help="Seconds between rebalances")
+    run.add_argument('--once', action='store_true', help="Rebalance once and exit")
+
+    suppression = commands.add_parser('suppression', help="Maintain the numbers dropped from every upload")
+    suppression_commands = suppression.add_subparsers(dest='suppression_command', required=True)
+    imports = suppression_commands.add_parser('import', help="Add opt-out files (a phone column, or one number per line)")
+    imports.add_argument('files', nargs='+')
+    imports.add_argument('--column', default='phone', help="Column holding the numbers")
+    remove = suppression_commands.add_parser('remove', help="Stop suppressing numbers")
+    remove.add_argument('numbers', nargs='+')
+    show = suppression_commands.add_parser('stats', help="Show the list size and sources")
+    for sub in (imports, remove, show):
+        sub.set_defaults(needs_api=False)
+    failures = suppression_commands.add_parser('from-failures', parents=[common],
+                                               help="Add numbers that failed in earlier campaigns")
+    failures.add_argument('ids', nargs='*', type=int, help="Campaign ids (default: every campaign in --campaign-status)")
+    failures.add_argument('--campaign-status', action='append', default=None,
+                          help="Scan every campaign in this status; repeatable (default: completed)")
+    failures.add_argument('--min-failures', type=int, default=SUPPRESSION_MIN_FAILURES,
+                          help="Campaigns a number must have failed in when the cause is not an opt-out or invalid number")
+    return parser
+
+
+COMMANDS = {'create': cmd_create, 'export': cmd_export, 'stats': cmd_stats, 'schedule': cmd_schedule,
+            'suppression': cmd_suppression,
+            **{action: cmd_control for action in BULK_ACTIONS}}
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    # export and suppression from-failures default to completed campaigns
+    if getattr(args, 'campaign_status', False) is None and not args.ids:
+        args.campaign_status = ['completed']
+    try:
+        if not getattr(args, 'needs_api', True):
+            return COMMANDS[args.command](None, args)
+        if args.timeout is None:
+            args.timeout = BULK_CALL_TIMEOUT if args.command in BULK_ACTIONS else API_TIMEOUT
+        base_url = args.api_url or get_api_base_url()
+        api = APIClient(token=resolve_token(args, base_url), base_url=base_url, timeout=args.timeout)
+        return COMMANDS[args.command](api, args)
+    except Exception as e:
+        emit('error', operation=args.command, message=f"{type(e).__name__}: {str(e)}")
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
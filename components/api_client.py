@@ -1,17 +1,42 @@
 
 import requests
 import streamlit as st
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, Tuple
 import json
-from config import API_BASE_URL
+from config import API_TIMEOUT, get_api_base_url
+from components.endpoints import get_endpoint_pool, parse_endpoints
+from components.tracing import api_span
 
 class APIClient:
     """API Client for communicating with Django backend"""
     
-    def __init__(self):
-        self.base_url = API_BASE_URL
-        self.token = st.session_state.get('auth_token', None)
-    
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout: Optional[float] = API_TIMEOUT):
+        # base_url may list several backend replicas separated by commas; requests are balanced across them
+        self.endpoints = parse_endpoints(base_url or get_api_base_url())
+        self.pool = get_endpoint_pool(self.endpoints)
+        self.base_url = self.endpoints[0]  # URLs are built against the first replica and rerouted per request
+        self.token = token if token is not None else st.session_state.get('auth_token', None)
+        self.timeout = timeout
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request with the client's timeout, traced when the rerun is sampled"""
+        with api_span(method, url, self.base_url) as span:
+            response, endpoint = self.pool.send(method, url[len(self.base_url):], timeout=self.timeout, **kwargs)
+            if span is not None:
+                body = response.request.body
+                span.set(**{'http.status_code': response.status_code,
+                            'http.request.body.size': len(body) if body else 0,
+                            'http.response.body.size': len(response.content),
+                            'server.address': endpoint.url})
+            return response
+    
+    @staticmethod
+    def _upload(file) -> Tuple[str, bytes, str]:
+        """Multipart file field with the upload read into memory, so a request that fails over resends it whole"""
+        content = file.getvalue() if hasattr(file, 'getvalue') else file.read()
+        return file.name, content, file.type
+
     def _get_headers(self) -> Dict[str, str]:
         """Get headers with authentication token"""
         headers = {'Content-Type': 'application/json'}
@@ -24,16 +49,18 @@ class APIClient:
         try:
             data = response.json()
             if response.status_code >= 400:
-                return {'success': False, 'error': data.get('error', 'An error occurred')}
+                return {'success': False, 'error': data.get('error', 'An error occurred'),
+                        'status_code': response.status_code}
             return data
         except json.JSONDecodeError:
-            return {'success': False, 'error': 'Invalid response from server'}
+            return {'success': False, 'error': 'Invalid response from server',
+                    'status_code': response.status_code}
     
     # Authentication APIs
     def login(self, username: str, password: str) -> Dict[str, Any]:
         """Login user"""
         url = f"{self.base_url}/auth/login/"
-        response = requests.post(url, json={
+        response = self._request('POST', url, json={
             'username': username,
             'password': password
         })
@@ -43,7 +70,7 @@ class APIClient:
                first_name: str = "", last_name: str = "") -> Dict[str, Any]:
         """Register new user"""
         url = f"{self.base_url}/auth/signup/"
-        response = requests.post(url, json={
+        response = self._request('POST', url, json={
             'username': username,
             'email': email,
             'password': password,
@@ -56,30 +83,37 @@ class APIClient:
     def logout(self) -> Dict[str, Any]:
         """Logout user"""
         url = f"{self.base_url}/auth/logout/"
-        response = requests.post(url, headers=self._get_headers())
+        response = self._request('POST', url, headers=self._get_headers())
         return self._handle_response(response)
     
     def get_user(self) -> Dict[str, Any]:
         """Get current user details"""
         url = f"{self.base_url}/auth/user/"
-        response = requests.get(url, headers=self._get_headers())
+        response = self._request('GET', url, headers=self._get_headers())
         return self._handle_response(response)
     
     # Campaign APIs
-    def get_campaigns(self, page: int = 1) -> Dict[str, Any]:
-        """Get all campaigns with pagination"""
+    def get_campaigns(self, page: int = 1, page_size: Optional[int] = None,
+                      updated_since: Optional[str] = None, search: Optional[str] = None) -> Dict[str, Any]:
+        """Get all campaigns with pagination, optionally only those changed since a timestamp"""
         url = f"{self.base_url}/campaigns/"
         params = {'page': page}
-        response = requests.get(url, headers=self._get_headers(), params=params)
+        if page_size:
+            params['page_size'] = page_size
+        if updated_since:
+            params['updated_since'] = updated_since
+        if search:
+            params['search'] = search  # Matched against the template name
+        response = self._request('GET', url, headers=self._get_headers(), params=params)
         return self._handle_response(response)
     
-    def get_all_campaigns(self) -> Dict[str, Any]:
+    def get_all_campaigns(self, page_size: Optional[int] = None) -> Dict[str, Any]:
         """Get all campaigns by fetching all pages"""
         all_campaigns = []
         page = 1
         
         while True:
-            response = self.get_campaigns(page=page)
+            response = self.get_campaigns(page=page, page_size=page_size)
             if response.get('results'):
                 all_campaigns.extend(response['results'])
                 if not response.get('next'):  # No more pages
@@ -94,10 +128,14 @@ class APIClient:
             'success': True
         }
     
+    def search_campaigns(self, query: str, limit: int = 20) -> Dict[str, Any]:
+        """Search campaigns by template name, returning at most one page of matches"""
+        return self.get_campaigns(page=1, page_size=limit, search=query)
+    
     def get_campaign(self, campaign_id: int) -> Dict[str, Any]:
         """Get campaign details"""
         url = f"{self.base_url}/campaigns/{campaign_id}/"
-        response = requests.get(url, headers=self._get_headers())
+        response = self._request('GET', url, headers=self._get_headers())
         return self._handle_response(response)
     
     def create_campaign(self, template_name: str, file) -> Dict[str, Any]:
@@ -105,55 +143,81 @@ class APIClient:
         url = f"{self.base_url}/campaigns/"
         headers = {'Authorization': f'Token {self.token}'}
         
-        files = {'file': (file.name, file, file.type)}
+        files = {'file': self._upload(file)}
         data = {'template_name': template_name}
         
-        response = requests.post(url, headers=headers, files=files, data=data)
+        response = self._request('POST', url, headers=headers, files=files, data=data)
         return self._handle_response(response)
     
     def start_campaign(self, campaign_id: int) -> Dict[str, Any]:
         """Start a campaign"""
         url = f"{self.base_url}/campaigns/{campaign_id}/start/"
-        response = requests.post(url, headers=self._get_headers())
-        print("Start campaign :",response,response.status_code, response.text)
+        response = self._request('POST', url, headers=self._get_headers())
         return self._handle_response(response)
     
     def pause_campaign(self, campaign_id: int) -> Dict[str, Any]:
         """Pause a campaign"""
         url = f"{self.base_url}/campaigns/{campaign_id}/pause/"
-        response = requests.post(url, headers=self._get_headers())
+        response = self._request('POST', url, headers=self._get_headers())
         return self._handle_response(response)
     
     def resume_campaign(self, campaign_id: int) -> Dict[str, Any]:
         """Resume a campaign"""
         url = f"{self.base_url}/campaigns/{campaign_id}/resume/"
-        response = requests.post(url, headers=self._get_headers())
+        response = self._request('POST', url, headers=self._get_headers())
         return self._handle_response(response)
     
     def check_campaign_status(self, campaign_id: int) -> Dict[str, Any]:
         """Check and update campaign status"""
         url = f"{self.base_url}/campaigns/{campaign_id}/check-status/"
-        response = requests.post(url, headers=self._get_headers())
+        response = self._request('POST', url, headers=self._get_headers())
         return self._handle_response(response)
     
     def get_campaign_statistics(self, campaign_id: int) -> Dict[str, Any]:
         """Get campaign statistics"""
         url = f"{self.base_url}/campaigns/{campaign_id}/statistics/"
-        response = requests.get(url, headers=self._get_headers())
+        response = self._request('GET', url, headers=self._get_headers())
         return self._handle_response(response)
     
-    def get_campaign_messages(self, campaign_id: int, status: Optional[str] = None) -> Dict[str, Any]:
-        """Get campaign messages"""
+    def get_campaign_messages(self, campaign_id: int, status: Optional[str] = None,
+                              page: Optional[int] = None, limit: Optional[int] = None,
+                              search: Optional[str] = None, ordering: Optional[str] = None) -> Dict[str, Any]:
+        """Get campaign messages, optionally filtered, searched, sorted and limited to one page"""
         url = f"{self.base_url}/campaigns/{campaign_id}/messages/"
+        params = {}
         if status:
-            url += f"?status={status}"
-        response = requests.get(url, headers=self._get_headers())
+            params['status'] = status
+        if page:
+            params['page'] = page
+        if limit:
+            params['page_size'] = limit  # Django REST Framework page size parameter
+        if search:
+            params['search'] = search  # Matched against the phone number
+        if ordering:
+            params['ordering'] = ordering  # e.g. 'sent_at' or '-sent_at'
+        response = self._request('GET', url, headers=self._get_headers(), params=params)
         return self._handle_response(response)
     
+    def iter_campaign_messages(self, campaign_id: int, status: Optional[str] = None,
+                               page_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """Yield campaign messages one page at a time"""
+        page = 1
+        
+        while True:
+            response = self.get_campaign_messages(campaign_id, status=status, page=page, limit=page_size)
+            if response.get('success') is False:
+                raise RuntimeError(response.get('error', 'Failed to load messages'))
+            if not response.get('results'):
+                break
+            yield response['results']
+            if not response.get('next'):  # No more pages
+                break
+            page += 1
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get overall statistics"""
         url = f"{self.base_url}/stats/"
-        response = requests.get(url, headers=self._get_headers())
+        response = self._request('GET', url, headers=self._get_headers())
         return self._handle_response(response)
     
     def validate_file(self, file) -> Dict[str, Any]:
@@ -161,7 +225,7 @@ class APIClient:
         url = f"{self.base_url}/validate-file/"
         headers = {'Authorization': f'Token {self.token}'}
         
-        files = {'file': (file.name, file, file.type)}
+        files = {'file': self._upload(file)}
         
-        response = requests.post(url, headers=headers, files=files)
+        response = self._request('POST', url, headers=headers, files=files)
         return self._handle_response(response)
\ No newline at end of file
@@ -2,6 +2,7 @@
 import streamlit as st
 from components.api_client import APIClient
 import time
+from typing import Any, Dict, Optional
 
 def init_session_state():
     """Initialize session state variables"""
@@ -129,12 +130,22 @@ def logout():
     api = APIClient()
     api.logout()
     
+    # Background work runs with this token, so stop it with the session
+    from components.sweeper import stop_sweeper
+    from components.snapshots import stop_snapshot_recorder
+    stop_sweeper(st.session_state.auth_token)
+    stop_snapshot_recorder(user_key_for(st.session_state.user))
+    
     st.session_state.authenticated = False
     st.session_state.auth_token = None
     st.session_state.user = None
     st.session_state.login_time = None
     st.rerun()
 
+def user_key_for(user: Optional[Dict[str, Any]]) -> str:
+    """Key a user's local data by username, which unlike the token survives re-login"""
+    return (user or {}).get('username') or 'anonymous'
+
 def require_auth():
     """Decorator to require authentication for pages"""
     if not check_authentication():
@@ -0,0 +1,133 @@
+import random
+import time
+import requests
+from typing import Dict, Any, Callable, Iterable, List, Optional
+from components.api_client import APIClient
+from components.concurrency import run_concurrently
+from components.endpoints import request_not_sent
+from config import BULK_MAX_WORKERS, BULK_CALL_TIMEOUT, BULK_RETRIES, BULK_RETRY_BACKOFF
+
+# Bulk actions mapped to the APIClient method, the statuses they apply to and the statuses that show they were
+# applied (a started campaign may already have finished sending by the time it is checked)
+BULK_ACTIONS = {
+    'start': {'method': 'start_campaign', 'statuses': ['pending', 'paused'],
+              'targets': ('running', 'completed', 'failed'), 'label': '▶️ Start'},
+    'pause': {'method': 'pause_campaign', 'statuses': ['running'], 'targets': ('paused',), 'label': '⏸️ Pause'},
+    'resume': {'method': 'resume_campaign', 'statuses': ['paused'],
+               'targets': ('running', 'completed', 'failed'), 'label': '▶️ Resume'},
+}
+
+# HTTP statuses worth retrying; anything else is a definite answer from the backend
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# Of those, the ones that say the backend did not act on the request
+REJECTED_STATUS_CODES = {408, 429}
+
+
+class TransientError(Exception):
+    """A failure that may succeed when retried"""
+
+    def __init__(self, message: str, maybe_applied: bool = False):
+        super().__init__(message)
+        self.maybe_applied = maybe_applied  # The backend may have acted on the request before it failed
+
+
+def eligible_campaigns(action: str, campaigns: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Campaigns whose status allows the action"""
+    statuses = BULK_ACTIONS[action]['statuses']
+    return [c for c in campaigns if c.get('status') in statuses]
+
+
+def _call_with_retries(api: APIClient, action: str, campaign_id: int, retries: int,
+                       backoff: float) -> Dict[str, Any]:
+    """Run one control call, retrying transient failures with exponential backoff.
+
+    Control calls are not idempotent: a start that timed out may still have
+    started the campaign, and sending it again gets "already running". So
+    only failures where the backend cannot have acted (the connection was
+    never made, 408, 429) are simply resent; after any other one the
+    campaign's status is read first, and the call counts as done if it
+    already has one of the action's target statuses.
+    """
+    method = getattr(api, BULK_ACTIONS[action]['method'])
+    targets = BULK_ACTIONS[action]['targets']
+    started = time.monotonic()
+    attempt = 0
+    verify = False
+    while True:
+        attempt += 1
+        try:
+            if verify:
+                try:
+                    campaign = api.get_campaign(campaign_id)
+                except (requests.Timeout, requests.ConnectionError) as e:
+                    raise TransientError(f"{type(e).__name__}: {str(e)}", maybe_applied=True)
+                if campaign.get('success') is False or 'status' not in campaign:
+                    raise TransientError(f"Could not check the campaign status: {campaign.get('error', '')}",
+                                         maybe_applied=True)
+                if campaign['status'] in targets:
+                    return {'success': True, 'message': f"Campaign is {campaign['status']}", 'attempts': attempt,
+                            'elapsed': time.monotonic() - started}
+            try:
+                response = method(campaign_id)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                raise TransientError(f"{type(e).__name__}: {str(e)}", maybe_applied=not request_not_sent(e))
+            if response.get('success') is False and response.get('status_code') in TRANSIENT_STATUS_CODES:
+                raise TransientError(f"HTTP {response['status_code']}: {response.get('error', '')}",
+                                     maybe_applied=response['status_code'] not in REJECTED_STATUS_CODES)
+        except TransientError as e:
+            # Once the backend may have acted, every later attempt checks first
+            verify = verify or e.maybe_applied
+            if attempt > retries:
+                return {'success': False, 'message': str(e), 'attempts': attempt,
+                        'elapsed': time.monotonic() - started}
+            # Jitter keeps many workers from retrying in lockstep
+            time.sleep(backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+            continue
+
+        success = bool(response.get('success'))
+        message = response.get('message') if success else response.get('error', 'Unknown error')
+        return {'success': success, 'message': message or '', 'attempts': attempt,
+                'elapsed': time.monotonic() - started}
+
+
+def run_bulk_action(token: Optional[str], action: str, campaign_ids: Iterable[int],
+                    max_workers: int = BULK_MAX_WORKERS, timeout: float = BULK_CALL_TIMEOUT,
+                    retries: int = BULK_RETRIES, backoff: float = BULK_RETRY_BACKOFF,
+                    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                    base_url: Optional[str] = None) -> Dict[str, Any]:
+    """Apply start/pause/resume to many campaigns concurrently.
+
+    Returns a summary with per-campaign results; on_result is called in the
+    calling thread after each campaign finishes.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Unknown bulk action: {action}")
+
+    api = APIClient(token=token, base_url=base_url, timeout=timeout)
+    started = time.monotonic()
+    campaign_ids = list(dict.fromkeys(campaign_ids))
+    finished: Dict[int, Dict[str, Any]] = {}
+
+    def record(campaign_id, result, error):
+        if error is not None:
+            result = {'success': False, 'message': str(error), 'attempts': 1, 'elapsed': 0.0}
+        result.update({'campaign_id': campaign_id, 'action': action})
+        finished[campaign_id] = result
+        if on_result is not None:
+            on_result(result)
+
+    run_concurrently(
+        lambda campaign_id: _call_with_retries(api, action, campaign_id, retries, backoff),
+        campaign_ids, max_workers=max_workers, on_result=record
+    )
+    results = [finished[campaign_id] for campaign_id in campaign_ids]
+
+    succeeded = sum(1 for r in results if r['success'])
+    return {
+        'action': action,
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'elapsed': time.monotonic() - started,
+        'results': results,
+    }
@@ -0,0 +1,147 @@
+import re
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, Any, List, Optional
+from components.campaign_sync import CampaignStore, sync_campaigns
+from config import CAMPAIGN_INDEX_PAGE_SIZE, CAMPAIGN_INDEX_MAX_ENTRIES, CAMPAIGN_INDEX_TTL
+
+# Counter columns that can be used for sorting
+COUNTER_FIELDS = ['total_recipients', 'sent_count', 'delivered_count', 'read_count',
+                  'failed_count', 'success_rate']
+
+
+class CampaignIndex(CampaignStore):
+    """Columnar in-memory index of a user's campaigns for client-side search, filter and sort"""
+
+    def __init__(self):
+        super().__init__()
+        self._dirty = True
+        self._build()
+
+    def _on_change(self) -> None:
+        self._dirty = True
+
+    def _build(self) -> None:
+        """Rebuild the column arrays from the records"""
+        records = list(self._records.values())
+        self._rows = records
+        self.ids = np.array([r['id'] for r in records], dtype=np.int64)
+        names = [str(r.get('template_name') or '').lower().replace('\n', ' ') for r in records]
+        self.names = np.array(names, dtype=str)
+        # All names in one newline-separated string so substring search runs in C via re
+        self._name_blob = '\n' + '\n'.join(names)
+        self._name_offsets = np.cumsum([0] + [len(n) + 1 for n in names[:-1]], dtype=np.int64)
+        statuses = pd.Categorical([r.get('status') or 'unknown' for r in records])
+        self.status_categories = list(statuses.categories)
+        self.status_codes = np.asarray(statuses.codes, dtype=np.int16)
+        self.created_at = pd.to_datetime(
+            pd.Series([r.get('created_at') for r in records], dtype=object),
+            utc=True, errors='coerce', format='ISO8601'
+        ).dt.tz_localize(None).to_numpy(dtype='datetime64[s]')
+        self.counters = {
+            field: np.array([r.get(field) or 0 for r in records],
+                            dtype=np.float64 if field == 'success_rate' else np.int64)
+            for field in COUNTER_FIELDS
+        }
+        self._dirty = False
+
+    def _ensure_built(self) -> None:
+        """Rebuild the columns if records changed; callers hold the lock"""
+        if self._dirty:
+            self._build()
+
+    def _name_mask(self, search: str, prefix: bool) -> np.ndarray:
+        """Rows whose template name contains (or starts with) the search text"""
+        pattern = re.escape('\n' + search if prefix else search)
+        positions = np.fromiter((m.start() for m in re.finditer(pattern, self._name_blob)), dtype=np.int64)
+        mask = np.zeros(len(self.ids), dtype=bool)
+        if positions.size:
+            # Map blob offsets back to rows; a prefix match starts on the newline before the row
+            mask[np.searchsorted(self._name_offsets, positions + (0 if prefix else -1), side='right') - 1] = True
+        return mask
+
+    def query(self, search: str = "", prefix: bool = False, statuses: Optional[List[str]] = None,
+              created_from=None, created_to=None, sort_by: str = 'created_at',
+              descending: bool = True) -> np.ndarray:
+        """Return row positions matching the filters, in sorted order"""
+        with self.lock:
+            self._ensure_built()
+            mask = np.ones(len(self.ids), dtype=bool)
+
+            search = (search or "").strip().lower()
+            if search:
+                mask &= self._name_mask(search, prefix)
+
+            if statuses:
+                codes = [self.status_categories.index(s) for s in statuses if s in self.status_categories]
+                mask &= np.isin(self.status_codes, codes)
+
+            if created_from is not None:
+                mask &= self.created_at >= np.datetime64(created_from, 's')
+            if created_to is not None:
+                mask &= self.created_at < np.datetime64(created_to, 's')
+
+            rows = np.flatnonzero(mask)
+            if sort_by == 'created_at':
+                keys = self.created_at[rows].astype(np.int64)
+            elif sort_by == 'template_name':
+                keys = self.names[rows]
+            elif sort_by == 'id':
+                keys = self.ids[rows]
+            else:
+                keys = self.counters[sort_by][rows]
+            order = np.argsort(keys, kind='stable')
+            if descending:
+                order = order[::-1]
+            return rows[order]
+
+    def status_facets(self, rows: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Number of campaigns per status, optionally restricted to some rows"""
+        with self.lock:
+            self._ensure_built()
+            codes = self.status_codes if rows is None else self.status_codes[rows]
+            counts = np.bincount(codes, minlength=len(self.status_categories))
+            return {status: int(count) for status, count in zip(self.status_categories, counts)}
+
+    def records(self, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Campaign dicts for the given row positions (all rows when omitted)"""
+        with self.lock:
+            self._ensure_built()
+            if rows is None:
+                return list(self._rows)
+            return [self._rows[i] for i in rows]
+
+
+@st.cache_resource(show_spinner=False, ttl=CAMPAIGN_INDEX_TTL, max_entries=CAMPAIGN_INDEX_MAX_ENTRIES)
+def get_campaign_index(token: Optional[str]) -> CampaignIndex:
+    """Campaign index shared by all sessions of the same login; bounded, since every login has its own token"""
+    return CampaignIndex()
+
+
+def refresh_campaign_index(api, index: CampaignIndex, force: bool = False) -> str:
+    """Bring the index up to date with an incremental sync"""
+    return sync_campaigns(api, index, force=force)
+
+
+def load_campaign_page(api, token: Optional[str], page: int = 1,
+                       page_size: int = CAMPAIGN_INDEX_PAGE_SIZE) -> Dict[str, Any]:
+    """One page of campaigns, newest first.
+
+    Served from the user's campaign index once it has been loaded, so only the
+    delta since the last sync is transferred; falls back to the paginated API.
+    """
+    index = get_campaign_index(token)
+    if not len(index):
+        return api.get_campaigns(page=page)
+
+    refresh_campaign_index(api, index)
+    rows = index.query(sort_by='created_at', descending=True)
+    start = (page - 1) * page_size
+    return {
+        'results': index.records(rows[start:start + page_size]),
+        'count': len(rows),
+        'next': start + page_size < len(rows),
+        'previous': page > 1,
+        'success': True,
+    }
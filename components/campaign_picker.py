@@ -0,0 +1,96 @@
+import logging
+import os
+import streamlit as st
+import streamlit.components.v1 as components
+from typing import Dict, Any, List, Optional, Tuple
+from components.data_loader import search_campaigns
+from config import (CAMPAIGN_SEARCH_MIN_CHARS, CAMPAIGN_SEARCH_DEBOUNCE_MS, CAMPAIGN_SEARCH_LIMIT)
+
+logger = logging.getLogger(__name__)
+
+# Text input that reruns once typing pauses (debounced in the browser) instead of on Enter
+_SEARCH_BOX_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_box')
+if os.path.isfile(os.path.join(_SEARCH_BOX_FRONTEND, 'index.html')):
+    _search_box_component = components.declare_component('campaign_search_box', path=_SEARCH_BOX_FRONTEND)
+else:
+    logger.warning("Campaign search box frontend missing from %s; searching on Enter instead of while typing",
+                   _SEARCH_BOX_FRONTEND)
+    _search_box_component = None
+
+
+def _search_box(key: str) -> str:
+    """Search input that reruns while typing"""
+    label = "Search campaigns"
+    placeholder = "Template name or campaign ID"
+    if _search_box_component is not None:
+        return _search_box_component(label=label, placeholder=placeholder, debounce=CAMPAIGN_SEARCH_DEBOUNCE_MS,
+                                     value=st.session_state.get(key) or "", key=key, default="") or ""
+    return st.text_input(label, placeholder=placeholder, key=key)
+
+
+def _label(campaign: Dict[str, Any]) -> str:
+    return f"{campaign['id']} - {campaign.get('template_name', '')} ({campaign.get('status', '')})"
+
+
+def campaign_picker(api, recent_campaigns: List[Dict[str, Any]],
+                    key: str = "campaign_picker") -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """Search-as-you-type campaign selector.
+
+    Returns the selected campaign id and, when it had to be fetched with
+    get_campaign during this rerun, the fresh campaign details so the caller
+    does not fetch them again.
+    """
+    query = _search_box(f"{key}_query").strip()
+    select_key = f"{key}_select"
+    query_key = f"{key}_select_query"
+    if st.session_state.get(query_key) != query:
+        # New matches: the choice made among the previous ones no longer applies
+        st.session_state.pop(select_key, None)
+        st.session_state[query_key] = query
+    # Prefer the choice already made in this selectbox over the previous selection
+    selected_id = st.session_state.get(select_key) or st.session_state.get('selected_campaign')
+    resolved: Optional[Dict[str, Any]] = None
+
+    if query.isdigit():
+        # A campaign ID resolves directly, wherever it is in the list
+        selected_id = int(query)
+        options = []
+    elif len(query) >= CAMPAIGN_SEARCH_MIN_CHARS:
+        try:
+            options = search_campaigns(api.token, query, CAMPAIGN_SEARCH_LIMIT)
+        except Exception as e:
+            st.error(f"Campaign search failed: {str(e)}")
+            options = []
+        if not options:
+            st.caption(f"No campaigns match \"{query}\"")
+    else:
+        options = list(recent_campaigns[:CAMPAIGN_SEARCH_LIMIT])
+
+    # Make sure the current selection is always offered, even when it is on another page
+    if selected_id and all(c['id'] != selected_id for c in options):
+        try:
+            response = api.get_campaign(selected_id)
+            if response.get('id'):
+                resolved = response
+                options = [response] + options
+            elif query.isdigit():
+                st.caption(f"Campaign {selected_id} not found")
+        except Exception as e:
+            st.warning(f"Could not load campaign {selected_id}: {str(e)}")
+
+    if not options:
+        return None, None
+
+    campaigns_by_id = {c['id']: c for c in options}
+    ids = list(campaigns_by_id.keys())
+    index = ids.index(selected_id) if selected_id in campaigns_by_id else 0
+    if st.session_state.get(select_key) not in campaigns_by_id:
+        st.session_state.pop(select_key, None)  # A choice that is no longer offered falls back to index
+    choice = st.selectbox(
+        "Choose a campaign",
+        options=ids,
+        index=index,
+        format_func=lambda campaign_id: _label(campaigns_by_id[campaign_id]),
+        key=select_key
+    )
+    return choice, resolved if resolved and resolved['id'] == choice else None
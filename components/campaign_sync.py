@@ -0,0 +1,190 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Iterable
+from config import (CAMPAIGN_SYNC_INTERVAL, CAMPAIGN_SYNC_FULL_INTERVAL, CAMPAIGN_SYNC_OVERLAP,
+                    CAMPAIGN_SYNC_MAX_DELTA, CAMPAIGN_SYNC_PAGE_SIZE, CAMPAIGN_SYNC_SCAN_PAGES)
+
+
+class SyncGapError(Exception):
+    """Raised when a delta cannot be trusted and a full resync is needed"""
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp from the API; returns None when missing or invalid"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class CampaignStore:
+    """Local copy of a user's campaigns kept current with incremental syncs"""
+
+    def __init__(self):
+        self.lock = threading.RLock()  # Guards the records; never held while a request is in flight
+        self.sync_lock = threading.Lock()  # One sync of the store at a time
+        self.watermark: Optional[datetime] = None  # Newest updated_at seen so far
+        self.delta_supported: Optional[bool] = None  # None until the backend has been probed
+        self.last_full_refresh = 0.0
+        self.last_refresh = 0.0
+        self.sync_counts = {'full': 0, 'delta': 0, 'scan': 0}
+        self._records: Dict[int, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _on_change(self) -> None:
+        """Hook for subclasses that derive data from the records"""
+
+    def upsert(self, campaigns: Iterable[Dict[str, Any]]) -> int:
+        """Merge campaigns into the store; returns how many rows were added or changed"""
+        changed = 0
+        with self.lock:
+            for campaign in campaigns:
+                campaign_id = campaign.get('id')
+                if campaign_id is None:
+                    continue
+                if self._records.get(campaign_id) != campaign:
+                    self._records[campaign_id] = campaign
+                    changed += 1
+            if changed:
+                self._on_change()
+        return changed
+
+    def delete(self, campaign_ids: Iterable[int]) -> int:
+        """Remove campaigns by id; returns how many were removed"""
+        removed = 0
+        with self.lock:
+            for campaign_id in campaign_ids:
+                if self._records.pop(campaign_id, None) is not None:
+                    removed += 1
+            if removed:
+                self._on_change()
+        return removed
+
+    def replace(self, campaigns: Iterable[Dict[str, Any]]) -> None:
+        """Replace the whole store, dropping campaigns that no longer exist"""
+        with self.lock:
+            self._records = {c['id']: c for c in campaigns if c.get('id') is not None}
+            self.watermark = None
+            self.advance_watermark(self._records.values())
+            self._on_change()
+
+    def advance_watermark(self, campaigns: Iterable[Dict[str, Any]]) -> None:
+        """Move the watermark to the newest updated_at among the campaigns"""
+        for campaign in campaigns:
+            updated_at = parse_timestamp(campaign.get('updated_at'))
+            if updated_at and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+
+    def get(self, campaign_id: int) -> Optional[Dict[str, Any]]:
+        """Return one campaign from the store"""
+        return self._records.get(campaign_id)
+
+    def values(self) -> List[Dict[str, Any]]:
+        """Every campaign in the store"""
+        with self.lock:
+            return list(self._records.values())
+
+
+def _full_sync(api, store: CampaignStore) -> None:
+    """Reload every campaign"""
+    response = api.get_all_campaigns(page_size=CAMPAIGN_SYNC_PAGE_SIZE)
+    if response.get('success') is False:
+        raise RuntimeError(response.get('error', 'Failed to load campaigns'))
+    with store.lock:
+        store.replace(response.get('results', []))
+        if store.watermark is None and len(store):
+            store.delta_supported = False  # Campaigns carry no updated_at to sync from
+        store.last_full_refresh = time.time()
+        store.sync_counts['full'] += 1
+
+
+def _delta_sync(api, store: CampaignStore) -> None:
+    """Fetch and merge campaigns changed since the watermark"""
+    # Overlap the window a little so rows committed with the same timestamp are not missed
+    since = store.watermark - timedelta(seconds=CAMPAIGN_SYNC_OVERLAP)
+    changed: List[Dict[str, Any]] = []
+    deleted: List[int] = []
+    page = 1
+
+    while True:
+        response = api.get_campaigns(page=page, page_size=CAMPAIGN_SYNC_PAGE_SIZE,
+                                     updated_since=since.isoformat())
+        if response.get('success') is False:
+            raise SyncGapError(response.get('error', 'Delta sync rejected'))
+
+        results = response.get('results') or []
+        for campaign in results:
+            updated_at = parse_timestamp(campaign.get('updated_at'))
+            if updated_at is None or updated_at < since:
+                # The backend ignored updated_since; deltas are not available
+                store.delta_supported = False
+                raise SyncGapError("Backend does not support updated_since")
+        changed.extend(results)
+        deleted.extend(response.get('deleted_ids') or [])
+
+        if len(changed) > CAMPAIGN_SYNC_MAX_DELTA:
+            raise SyncGapError("Delta too large")
+        if not response.get('next'):
+            break
+        page += 1
+
+    with store.lock:
+        store.delta_supported = True
+        store.upsert(changed)
+        store.delete(deleted)
+        store.advance_watermark(changed)
+        store.sync_counts['delta'] += 1
+
+
+def _scan_sync(api, store: CampaignStore) -> None:
+    """Fallback without deltas: merge the newest pages until one brings no change"""
+    # Each page is fetched without the lock; upsert() takes it only to merge
+    page = 1
+    while page <= CAMPAIGN_SYNC_SCAN_PAGES:
+        response = api.get_campaigns(page=page)
+        if not response.get('results') or not store.upsert(response['results']):
+            break
+        if not response.get('next'):
+            break
+        page += 1
+    store.sync_counts['scan'] += 1
+
+
+def sync_campaigns(api, store: CampaignStore, force: bool = False) -> str:
+    """Bring the store up to date and return the sync mode that was used.
+
+    Campaigns are fetched without holding store.lock, so sessions reading the
+    store only wait while the results are swapped in or merged. store.sync_lock
+    keeps two sessions from fetching the same changes at once.
+    """
+    # With data to show, a rerun does not wait for another session's sync; it reads what the store has
+    if not store.sync_lock.acquire(blocking=force or not len(store)):
+        return 'skipped'
+    try:
+        now = time.time()
+        if not force and len(store) and now - store.last_refresh < CAMPAIGN_SYNC_INTERVAL:
+            return 'skipped'  # Fresh enough; reruns (e.g. typing in a search box) stay local
+
+        mode = 'full'
+        if not len(store) or now - store.last_full_refresh > CAMPAIGN_SYNC_FULL_INTERVAL:
+            _full_sync(api, store)
+        elif store.delta_supported is False or store.watermark is None:
+            _scan_sync(api, store)
+            mode = 'scan'
+        else:
+            try:
+                _delta_sync(api, store)
+                mode = 'delta'
+            except SyncGapError:
+                _full_sync(api, store)
+
+        store.last_refresh = now
+        return mode
+    finally:
+        store.sync_lock.release()
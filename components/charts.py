@@ -0,0 +1,208 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+import numpy as np
+import pandas as pd
+import streamlit as st
+from config import STATUS_COLORS, CHART_CACHE_ENTRIES
+
+# Plotly is imported inside the builders so pages only pay for it when they draw a chart
+
+_figures: "OrderedDict[str, Any]" = OrderedDict()
+_figures_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _hash_update(digest, value: Any) -> None:
+    """Feed a chart's input data into a hash, type-tagged so e.g. 1 and '1' differ"""
+    if isinstance(value, pd.DataFrame):
+        digest.update(b'df' + repr(list(value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(b'series' + repr(value.name).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(b'nd' + value.dtype.str.encode() + repr(value.shape).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'{')
+        for key in value:
+            _hash_update(digest, key)
+            _hash_update(digest, value[key])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _hash_update(digest, item)
+        digest.update(b']')
+    else:
+        digest.update(type(value).__name__.encode() + b':' + repr(value).encode() + b';')
+
+
+def data_key(builder: Callable, data: Any) -> str:
+    """Cache key for a chart: the builder's name plus a hash of its input data"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{builder.__module__}.{builder.__qualname__}".encode())
+    _hash_update(digest, data)
+    return digest.hexdigest()
+
+
+def cached_figure(builder: Callable[[Any], Any], data: Any):
+    """Figure for the data, built only when this builder has not seen the same data yet"""
+    key = data_key(builder, data)
+    with _figures_lock:
+        figure = _figures.get(key)
+        if figure is not None:
+            _figures.move_to_end(key)
+            _stats['hits'] += 1
+            return figure
+        _stats['misses'] += 1
+
+    figure = builder(data)
+    with _figures_lock:
+        _figures[key] = figure
+        while len(_figures) > CHART_CACHE_ENTRIES:
+            _figures.popitem(last=False)
+    return figure
+
+
+def render_chart(builder: Callable[[Any], Any], data: Any, **kwargs) -> None:
+    """Draw a cached figure with st.plotly_chart"""
+    st.plotly_chart(cached_figure(builder, data), **kwargs)
+
+
+def chart_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters and current size of the figure cache"""
+    with _figures_lock:
+        return {**_stats, 'entries': len(_figures)}
+
+
+# Dashboard charts
+
+def status_pie(status_data: Dict[str, int]):
+    """Campaign status distribution"""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go.Pie(
+        labels=list(status_data.keys()),
+        values=list(status_data.values()),
+        hole=0.3,
+        marker_colors=[STATUS_COLORS.get(k, '#999') for k in status_data.keys()]
+    )])
+    fig.update_layout(
+        height=300,
+        margin=dict(t=0, b=0, l=0, r=0),
+        showlegend=True
+    )
+    return fig
+
+
+def delivery_bar(delivery_data: Dict[str, int]):
+    """Sent / delivered / pending totals"""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[
+        go.Bar(
+            x=list(delivery_data.keys()),
+            y=list(delivery_data.values()),
+            marker_color=['#2196F3', '#4CAF50', '#FF9800']
+        )
+    ])
+    fig.update_layout(
+        height=300,
+        margin=dict(t=0, b=0, l=0, r=0),
+        yaxis_title="Messages",
+        showlegend=False
+    )
+    return fig
+
+
+def messages_trend(trend_df: pd.DataFrame):
+    """Messages sent and delivered per bucket"""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[
+        go.Bar(x=trend_df['period'], y=trend_df['sent'], name='Sent', marker_color='#2196F3'),
+        go.Bar(x=trend_df['period'], y=trend_df['delivered'], name='Delivered', marker_color='#4CAF50'),
+    ])
+    fig.update_layout(
+        height=300,
+        margin=dict(t=0, b=0, l=0, r=0),
+        barmode='group',
+        yaxis_title="Messages"
+    )
+    return fig
+
+
+def success_rate_trend(data: Dict[str, Any]):
+    """Per-bucket and overall success rate from {'trend': trend frame, 'period_label': 'Hour' or 'Day'}"""
+    import plotly.graph_objects as go
+    trend_df = data['trend']
+    fig = go.Figure(data=[
+        go.Scatter(x=trend_df['period'], y=trend_df['success_rate'], name=f"Per {data['period_label'].lower()}",
+                   mode='lines+markers', line_color='#4CAF50'),
+        go.Scatter(x=trend_df['period'], y=trend_df['overall_success_rate'], name='Overall',
+                   mode='lines', line=dict(color='#999', dash='dot')),
+    ])
+    fig.update_layout(
+        height=300,
+        margin=dict(t=0, b=0, l=0, r=0),
+        yaxis_title="Success Rate (%)",
+        yaxis_range=[0, 100]
+    )
+    return fig
+
+
+# Campaign analytics charts
+
+def latency_histogram(histogram: Dict[str, List[float]]):
+    """Latency distribution from histogram edges and counts"""
+    import plotly.graph_objects as go
+    edges = histogram['edges']
+    fig = go.Figure(data=[go.Bar(
+        x=[(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])],
+        y=histogram['counts'],
+        marker_color='#2196F3'
+    )])
+    fig.update_layout(
+        height=250,
+        margin=dict(t=0, b=0, l=0, r=0),
+        xaxis_title="Latency (seconds)",
+        yaxis_title="Messages",
+        showlegend=False
+    )
+    return fig
+
+
+def latency_curve(curve: Dict[str, List[Any]]):
+    """Median and p90 latency over time"""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[
+        go.Scatter(x=curve['bucket'], y=curve['p50'], name="Median",
+                   line_color='#4CAF50'),
+        go.Scatter(x=curve['bucket'], y=curve['p90'], name="p90",
+                   line_color='#FF9800')
+    ])
+    fig.update_layout(
+        height=250,
+        margin=dict(t=0, b=0, l=0, r=0),
+        yaxis_title="Latency (seconds)"
+    )
+    return fig
+
+
+def failure_causes_bar(categories: List[Dict[str, Any]]):
+    """Failed messages per cause, largest first"""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go.Bar(
+        x=[c['count'] for c in categories],
+        y=[c['category'] for c in categories],
+        orientation='h',
+        marker_color=STATUS_COLORS.get('failed')
+    )])
+    fig.update_layout(
+        height=300,
+        margin=dict(t=0, b=0, l=0, r=0),
+        xaxis_title="Messages",
+        yaxis=dict(autorange="reversed"),
+        showlegend=False
+    )
+    return fig
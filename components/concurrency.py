@@ -0,0 +1,73 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+from components.tracing import propagate
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        """Block until a call is allowed"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def run_concurrently(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int = 4,
+                     rate_limiter: Optional[RateLimiter] = None,
+                     on_result: Optional[Callable[[Any, Any, Optional[Exception]], None]] = None
+                     ) -> List[Tuple[Any, Any, Optional[Exception]]]:
+    """Call func for every item on a bounded worker pool.
+
+    Returns (item, result, error) tuples in input order; an exception raised
+    for one item is captured in its tuple instead of aborting the others.
+    on_result is called in the calling thread as each item finishes, so it
+    may safely update Streamlit elements.
+    """
+    def call(item):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return item, func(item), None
+        except Exception as e:
+            return item, None, e
+
+    items = list(items)
+    if not items:
+        return []
+    results: List[Optional[Tuple[Any, Any, Optional[Exception]]]] = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))),
+                            thread_name_prefix="worker") as executor:
+        futures = {executor.submit(propagate(call), item): position for position, item in enumerate(items)}
+        for future in as_completed(futures):
+            results[futures[future]] = outcome = future.result()
+            if on_result is not None:
+                on_result(*outcome)
+    return results
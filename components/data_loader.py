@@ -0,0 +1,277 @@
+import time
+import streamlit as st
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple
+from components.api_client import APIClient
+from components.offline_cache import (Freshness, get_offline_cache, write_behind, submit_fetch,
+                                      fetch_or_cached)
+from components import prefetch
+from config import (MESSAGE_SAMPLE_SIZE, MESSAGE_SAMPLE_TTL, MESSAGE_PAGE_TTL,
+                    MESSAGE_PAGE_CACHE_ENTRIES, ANALYTICS_PAGE_SIZE, ANALYTICS_MEMORY_BUDGET_MB,
+                    ANALYTICS_TTL, FAILURE_PREFIX_DIGITS, FAILURE_TOP_N, CAMPAIGN_SEARCH_TTL,
+                    DASHBOARD_STATS_TTL, DASHBOARD_CAMPAIGNS_TTL, DASHBOARD_MAX_WORKERS,
+                    CAMPAIGN_INDEX_PAGE_SIZE, OFFLINE_FRESH_WAIT, OFFLINE_SYNC_PAGE_SIZE)
+
+# analytics, failures and campaign_index pull in numpy/pandas, so they are
+# imported inside the loaders that need them; the home page never does.
+
+# Runs the dashboard's independent backend calls side by side
+_dashboard_executor = ThreadPoolExecutor(max_workers=DASHBOARD_MAX_WORKERS, thread_name_prefix="dashboard")
+
+
+# Loaders taking `_user_key` write what they fetch to the offline cache under
+# that key; the leading underscore keeps it out of st.cache_data's cache key.
+
+@st.cache_data(ttl=DASHBOARD_STATS_TTL, show_spinner=False)
+def load_stats(token: Optional[str], _user_key: Optional[str] = None) -> Dict[str, Any]:
+    """Overall statistics, shared per user by the home page and the Dashboard"""
+    api = APIClient(token=token)
+    response = api.get_stats()
+    if not response.get('success'):
+        raise RuntimeError(response.get('error', 'Failed to load statistics'))
+    stats = response.get('statistics', {})
+    if _user_key:
+        write_behind(get_offline_cache().put_stats, _user_key, 'overall', stats)
+    return stats
+
+
+@st.cache_data(ttl=DASHBOARD_CAMPAIGNS_TTL, show_spinner=False)
+def load_recent_campaigns(token: Optional[str], _user_key: Optional[str] = None) -> Dict[str, Any]:
+    """First page of campaigns, newest first, cached per user"""
+    from components.campaign_index import load_campaign_page
+    api = APIClient(token=token)
+    response = load_campaign_page(api, token)
+    if response.get('success') is False:
+        raise RuntimeError(response.get('error', 'Failed to load campaigns'))
+    if _user_key:
+        write_behind(get_offline_cache().put_campaigns, _user_key, response.get('results') or [])
+    return response
+
+
+def load_stats_offline(token: Optional[str], user_key: str) -> Tuple[Dict[str, Any], Freshness]:
+    """Overall statistics, or the offline copy while the backend is slow or down"""
+    future = submit_fetch(('stats', token), load_stats, token, user_key)
+    return fetch_or_cached(future, lambda: get_offline_cache().get_stats(user_key, 'overall'))
+
+
+def load_dashboard_data(token: Optional[str], user_key: Optional[str] = None) -> Dict[str, Any]:
+    """Statistics and recent campaigns, fetched concurrently.
+
+    Each part is cached on its own, so a rerun only refetches the part whose
+    TTL expired. Failures are returned per part instead of raised. With a
+    user_key, a part that is slow or failing comes from the offline cache
+    and its Freshness is returned under 'freshness'.
+    """
+    cache = get_offline_cache()
+    parts = {
+        'stats': (load_stats, lambda: cache.get_stats(user_key, 'overall')),
+        'campaigns': (load_recent_campaigns, lambda: cache.campaign_page(user_key, 1, CAMPAIGN_INDEX_PAGE_SIZE)),
+    }
+    futures = {part: submit_fetch((part, token), loader, token, user_key, executor=_dashboard_executor)
+               for part, (loader, _) in parts.items()}
+    deadline = time.monotonic() + OFFLINE_FRESH_WAIT
+    data: Dict[str, Any] = {'stats': {}, 'campaigns': {'results': []}, 'errors': {}, 'freshness': {}}
+    for part, future in futures.items():
+        try:
+            if user_key:
+                wait = max(0.0, deadline - time.monotonic())
+                data[part], data['freshness'][part] = fetch_or_cached(future, parts[part][1], wait)
+            else:
+                data[part] = future.result()
+        except Exception as e:
+            data['errors'][part] = str(e)
+    return data
+
+
+def clear_dashboard_data(token: Optional[str]) -> None:
+    """Drop a user's cached dashboard data so the next load hits the backend"""
+    load_stats.clear(token)
+    load_recent_campaigns.clear(token)
+
+
+@st.cache_data(ttl=CAMPAIGN_SEARCH_TTL, max_entries=256, show_spinner=False)
+def search_campaigns(token: Optional[str], query: str, limit: int) -> List[Dict[str, Any]]:
+    """Campaigns whose template name matches the query, cached per user and query"""
+    api = APIClient(token=token)
+    response = api.search_campaigns(query, limit=limit)
+    if response.get('success') is False:
+        raise RuntimeError(response.get('error', 'Failed to search campaigns'))
+    return (response.get('results') or [])[:limit]
+
+
+@st.cache_data(ttl=MESSAGE_SAMPLE_TTL, show_spinner=False)
+def load_message_sample(token: Optional[str], campaign_id: int,
+                        limit: int = MESSAGE_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+    """Load the first messages of a campaign, cached per user and campaign"""
+    api = APIClient(token=token)
+    response = api.get_campaign_messages(campaign_id, limit=limit)
+    if response.get('success') is False:
+        # Raise instead of returning so the failure is not cached
+        raise RuntimeError(response.get('error', 'Failed to load messages'))
+    # Older backends ignore the page size, so never keep more than requested
+    return (response.get('results') or [])[:limit]
+
+
+@st.cache_data(ttl=MESSAGE_PAGE_TTL, max_entries=MESSAGE_PAGE_CACHE_ENTRIES, show_spinner=False)
+def load_message_page(token: Optional[str], campaign_id: int, page: int, page_size: int,
+                      status: Optional[str] = None, search: Optional[str] = None,
+                      ordering: Optional[str] = None, _user_key: Optional[str] = None) -> Dict[str, Any]:
+    """Load one server-side page of campaign messages"""
+    api = APIClient(token=token)
+    response = api.get_campaign_messages(campaign_id, status=status, page=page, limit=page_size,
+                                         search=search, ordering=ordering)
+    if response.get('success') is False:
+        raise RuntimeError(response.get('error', 'Failed to load messages'))
+    page_data = {
+        'results': (response.get('results') or [])[:page_size],
+        'count': response.get('count', 0),
+        'next': bool(response.get('next')),
+    }
+    if _user_key:
+        cache = get_offline_cache()
+        write_behind(cache.put_messages, _user_key, campaign_id, page_data['results'])
+        if not search:
+            write_behind(cache.put_message_total, _user_key, campaign_id, status, page_data['count'])
+    return page_data
+
+
+def load_message_page_offline(token: Optional[str], user_key: str, campaign_id: int, page: int,
+                              page_size: int, status: Optional[str] = None, search: Optional[str] = None,
+                              ordering: Optional[str] = None) -> Tuple[Dict[str, Any], Freshness]:
+    """A page of messages, or the same query run against the offline copy"""
+    args = (token, campaign_id, page, page_size, status, search, ordering)
+    future = submit_fetch(('messages',) + args, load_message_page, *args, user_key)
+    return fetch_or_cached(future, lambda: get_offline_cache().query_messages(
+        user_key, campaign_id, page, page_size, status, search, ordering))
+
+
+def query_saved_messages(user_key: str, campaign_id: int, page: int, page_size: int,
+                         status: Optional[str] = None, search: Optional[str] = None,
+                         ordering: Optional[str] = None) -> Tuple[Dict[str, Any], Freshness]:
+    """A page of messages straight from a campaign saved with save_campaign_messages()"""
+    cache = get_offline_cache()
+    hit = cache.query_messages(user_key, campaign_id, page, page_size, status, search, ordering)
+    page_data = hit[0] if hit else {'results': [], 'count': 0, 'next': False, 'total': 0}
+    return page_data, Freshness(cache.synced_at(user_key, campaign_id) or time.time(), stale=True)
+
+
+def save_campaign_messages(token: Optional[str], user_key: str, campaign_id: int,
+                           on_page: Optional[Callable[[int], None]] = None) -> int:
+    """Copy every message of a campaign into the offline cache; returns how many were saved"""
+    api = APIClient(token=token)
+    cache = get_offline_cache()
+    started = time.time()
+    saved = 0
+    for messages in api.iter_campaign_messages(campaign_id, page_size=OFFLINE_SYNC_PAGE_SIZE):
+        saved += cache.put_messages(user_key, campaign_id, messages, fetched_at=started)
+        if on_page is not None:
+            on_page(saved)
+    cache.put_message_total(user_key, campaign_id, None, saved)
+    cache.mark_synced(user_key, campaign_id, saved, started)
+    return saved
+
+
+def _claim_or_fetch(key: Hashable, fetch: Callable[..., Any], *args) -> Future:
+    """A prefetched result for key if one is waiting, else a (possibly shared) backend fetch"""
+    return prefetch.claim(key) or submit_fetch(key, fetch, *args)
+
+
+def _fetch_campaign_page(api: APIClient, token: Optional[str], user_key: str, page: int) -> Dict[str, Any]:
+    from components.campaign_index import load_campaign_page
+    response = load_campaign_page(api, token, page)
+    if response.get('success') is False:
+        raise RuntimeError(response.get('error', 'Failed to load campaigns'))
+    write_behind(get_offline_cache().put_campaigns, user_key, response.get('results') or [])
+    return response
+
+
+def _fetch_campaign(api: APIClient, user_key: str, campaign_id: int) -> Dict[str, Any]:
+    campaign = api.get_campaign(campaign_id)
+    if campaign.get('success') is False:
+        raise RuntimeError(campaign.get('error', 'Failed to load campaign'))
+    write_behind(get_offline_cache().put_campaigns, user_key, [campaign])
+    return campaign
+
+
+def _fetch_campaign_statistics(api: APIClient, user_key: str, campaign_id: int) -> Dict[str, Any]:
+    response = api.get_campaign_statistics(campaign_id)
+    if not response.get('success'):
+        raise RuntimeError(response.get('error', 'Failed to load statistics'))
+    statistics = response.get('statistics', {})
+    write_behind(get_offline_cache().put_stats, user_key, f'campaign:{campaign_id}', statistics)
+    return statistics
+
+
+def load_campaign_page_offline(api: APIClient, token: Optional[str], user_key: str,
+                               page: int) -> Tuple[Dict[str, Any], Freshness]:
+    """A page of the campaign list, or the offline copy of it"""
+    key = ('campaign page', token, page)
+    claimed = prefetch.claim(key)
+    future = claimed or submit_fetch(key, _fetch_campaign_page, api, token, user_key, page)
+    response, freshness = fetch_or_cached(
+        future, lambda: get_offline_cache().campaign_page(user_key, page, CAMPAIGN_INDEX_PAGE_SIZE))
+    if claimed is None and not freshness.stale:
+        # A click on this page first reruns with the same page; that rerun reuses this response
+        prefetch.hold(key, response)
+    return response, freshness
+
+
+def load_campaign_offline(api: APIClient, user_key: str, campaign_id: int) -> Tuple[Dict[str, Any], Freshness]:
+    """One campaign's details, or the offline copy of them"""
+    future = _claim_or_fetch(('campaign', api.token, campaign_id), _fetch_campaign, api, user_key, campaign_id)
+    return fetch_or_cached(future, lambda: get_offline_cache().get_campaign(user_key, campaign_id))
+
+
+def load_campaign_statistics_offline(api: APIClient, user_key: str,
+                                     campaign_id: int) -> Tuple[Dict[str, Any], Freshness]:
+    """One campaign's statistics, or the offline copy of them"""
+    future = _claim_or_fetch(('campaign statistics', api.token, campaign_id), _fetch_campaign_statistics,
+                             api, user_key, campaign_id)
+    return fetch_or_cached(future, lambda: get_offline_cache().get_stats(user_key, f'campaign:{campaign_id}'))
+
+
+def prefetch_campaign_pages(api: APIClient, token: Optional[str], user_key: str, page: int,
+                            total_pages: int) -> None:
+    """Warm the pages either side of the one on screen, next page first"""
+    for neighbour in (page + 1, page - 1):
+        if 1 <= neighbour <= total_pages:
+            prefetch.warm(('campaign page', token, neighbour), _fetch_campaign_page, api, token, user_key, neighbour)
+
+
+def prefetch_campaign(api: APIClient, user_key: str, campaign_id: int) -> None:
+    """Warm what the manage view loads for a campaign: its details and statistics"""
+    prefetch.warm(('campaign', api.token, campaign_id), _fetch_campaign, api, user_key, campaign_id)
+    prefetch.warm(('campaign statistics', api.token, campaign_id), _fetch_campaign_statistics,
+                  api, user_key, campaign_id)
+
+
+def prefetch_message_page(token: Optional[str], campaign_id: int, page: int, page_size: int,
+                          status: Optional[str] = None, search: Optional[str] = None,
+                          ordering: Optional[str] = None, user_key: Optional[str] = None) -> None:
+    """Warm the message page cache in the background"""
+    # load_message_page caches its own result, so the prefetch does not hold it
+    prefetch.warm(('message page prefetch', token, campaign_id, page, page_size, status, search, ordering),
+                  load_message_page, token, campaign_id, page, page_size, status, search, ordering, user_key,
+                  keep=False)
+
+
+@st.cache_data(ttl=ANALYTICS_TTL, max_entries=16, show_spinner=False)
+def load_latency_report(token: Optional[str], campaign_id: int, version: Tuple) -> Dict[str, Any]:
+    """Compute delivery latency analytics for a campaign.
+
+    `version` should change whenever the campaign counters change so new
+    deliveries invalidate the cached report before the TTL expires.
+    """
+    api = APIClient(token=token)
+    pages = api.iter_campaign_messages(campaign_id, page_size=ANALYTICS_PAGE_SIZE)
+    from components.analytics import compute_latency_report
+    return compute_latency_report(pages, ANALYTICS_MEMORY_BUDGET_MB)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_failure_breakdown(token: Optional[str], campaign_id: int, failed_count: int) -> Dict[str, Any]:
+    """Aggregate a campaign's failed messages; cached until failed_count changes"""
+    api = APIClient(token=token)
+    pages = api.iter_campaign_messages(campaign_id, status='failed', page_size=ANALYTICS_PAGE_SIZE)
+    from components.failures import compute_failure_breakdown
+    return compute_failure_breakdown(pages, FAILURE_PREFIX_DIGITS, FAILURE_TOP_N)
@@ -0,0 +1,380 @@
+"""Load balancing across backend replicas with passive health checks.
+
+API_BASE_URL may list several replicas separated by commas. Every request
+made through an EndpointPool updates its endpoint's moving-average latency,
+outstanding request count and consecutive failure count; there are no probe
+requests. Requests go to the endpoint with the lowest latency x (outstanding
++ 1), so a replica that slows down or piles up work loses traffic at once.
+After API_BREAKER_FAILURES consecutive failures (connection errors,
+timeouts, 5xx) its circuit opens: it gets no traffic for API_BREAKER_COOLDOWN
+seconds, then a single trial GET decides whether it closes again. A failed
+request is charged the full timeout as its latency, so a replica that refuses
+connections at once never looks fast. GETs are idempotent, so they fail over
+to another replica and, when the first one has not answered within
+API_HEDGE_AFTER seconds, are sent to a second one as well; the first good
+response wins. The first request runs on the caller's thread and only the
+hedge goes to a shared worker pool; when the hedge wins, the first request's
+connection is shut down so the caller returns at once. Other methods only fail over when the connection could not be
+established, since the request then never reached the server. Pools are shared by every client in the
+process, so health learned by one session benefits all of them.
+"""
+import heapq
+import itertools
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from components.tracing import propagate
+from config import (API_EWMA_WEIGHT, API_BREAKER_FAILURES, API_BREAKER_COOLDOWN, API_HEDGE_AFTER,
+                    API_HEDGE_WORKERS)
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Threads for the second requests of hedged GETs; a losing hedge finishes in the background and still updates
+# its endpoint's health
+_hedge_executor = ThreadPoolExecutor(max_workers=API_HEDGE_WORKERS, thread_name_prefix="api-hedge")
+
+
+class _HedgeTimer:
+    """One thread that runs callbacks once their delay has passed, so waiting to hedge ties up no worker"""
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> list:
+        entry = [time.monotonic() + delay, next(self._order), callback]
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="api-hedge-timer", daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, entry)
+            self._condition.notify()
+        return entry
+
+    @staticmethod
+    def cancel(entry: list) -> None:
+        entry[2] = None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                callback = heapq.heappop(self._heap)[2]
+            if callback is not None:
+                try:
+                    callback()
+                except Exception:
+                    pass  # A hedge that cannot be sent leaves the first request to answer on its own
+
+
+_hedge_timer = _HedgeTimer()
+
+
+class _AbortableAdapter(HTTPAdapter):
+    """Transport whose in-flight request can be cut off from another thread by shutting down its sockets"""
+
+    def __init__(self):
+        self.aborted = False
+        self._connections: List[Any] = []
+        self._connections_lock = threading.Lock()
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: self._recording(pool_class)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()}
+
+    def _recording(self, pool_class):
+        adapter = self
+
+        class RecordingPool(pool_class):
+            def _new_conn(self):
+                connection = super()._new_conn()
+                with adapter._connections_lock:
+                    if adapter.aborted:
+                        raise NewConnectionError(connection, "Request abandoned for a faster replica")
+                    adapter._connections.append(connection)
+                return connection
+
+        return RecordingPool
+
+    def abort(self) -> None:
+        with self._connections_lock:
+            self.aborted = True
+            connections = list(self._connections)
+        for connection in connections:
+            sock = getattr(connection, 'sock', None)
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass  # Already closed
+
+
+def parse_endpoints(spec: str) -> List[str]:
+    """Base URLs from a comma-separated API_BASE_URL, without trailing slashes"""
+    return [url.strip().rstrip('/') for url in spec.split(',') if url.strip()]
+
+
+def request_not_sent(error: Exception) -> bool:
+    """Whether a failed request never reached the server (connection refused or timed out, DNS failure)"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason says how the connection failed;
+    # NewConnectionError (refused, unreachable, DNS) is a ConnectTimeoutError
+    return isinstance(getattr(error.args[0], 'reason', None), ConnectTimeoutError)
+
+
+def _timeout_seconds(timeout: Any) -> Optional[float]:
+    """Longest a request with requests' timeout argument (seconds or (connect, read)) can take"""
+    if isinstance(timeout, (tuple, list)):
+        return sum(t for t in timeout if t is not None) or None
+    return timeout
+
+
+class Endpoint:
+    """Passive health of one backend replica"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None  # Moving average of response times, in seconds
+        self.answered_at = 0.0  # When latency was last updated
+        self.outstanding = 0
+        self.failures = 0  # Consecutive
+        self.state = 'closed'  # closed: in rotation, open: ejected, half-open: one trial request in flight
+        self.opened_at = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+
+    def score(self, default_latency: float) -> float:
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (self.outstanding + 1)
+
+
+class EndpointPool:
+    """Chooses endpoints for requests and records how each request went"""
+
+    def __init__(self, urls: Sequence[str], ewma_weight: float = API_EWMA_WEIGHT,
+                 breaker_failures: int = API_BREAKER_FAILURES, breaker_cooldown: float = API_BREAKER_COOLDOWN,
+                 hedge_after: float = API_HEDGE_AFTER, clock=time.monotonic):
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.ewma_weight = ewma_weight
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.hedge_after = hedge_after
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def choose(self, exclude: Sequence[Endpoint] = (), idempotent: bool = True) -> Optional[Endpoint]:
+        """Healthy endpoint with the lowest score, else the one ejected longest ago"""
+        with self.lock:
+            now = self.clock()
+            candidates = [e for e in self.endpoints if e not in exclude]
+            if not candidates:
+                return None
+            for endpoint in candidates:
+                # Cooled down: the next request is its trial, but only one that is safe to lose
+                if idempotent and endpoint.state == 'open' and now - endpoint.opened_at >= self.breaker_cooldown:
+                    endpoint.state = 'half-open'
+                    endpoint.outstanding += 1
+                    return endpoint
+            healthy = [e for e in candidates if e.state == 'closed']
+            # Until an endpoint has answered, it is assumed to be as fast as the fastest one that has.
+            # So is one that has not answered for a cooldown, so a replica that was avoided for being slow
+            # gets a request now and then to show whether it has recovered.
+            for endpoint in candidates:
+                if endpoint.latency is not None and now - endpoint.answered_at >= self.breaker_cooldown:
+                    endpoint.latency = None
+            measured = [e.latency for e in self.endpoints if e.latency is not None]
+            default_latency = min(measured, default=1.0)
+            # With every endpoint ejected, failing over to the longest-ejected one beats failing outright
+            # Ties go to an unmeasured endpoint
+            endpoint = (min(healthy, key=lambda e: (e.score(default_latency), e.latency is not None)) if healthy
+                        else min(candidates, key=lambda e: e.opened_at))
+            endpoint.outstanding += 1
+            return endpoint
+
+    def record(self, endpoint: Endpoint, seconds: float, ok: bool, penalty: Optional[float] = None) -> None:
+        """Account a finished request (the endpoint was reserved by choose()).
+
+        A failure is charged `penalty` seconds (the request's timeout) instead
+        of how long it took; without one its latency is left as it was.
+        """
+        with self.lock:
+            endpoint.outstanding -= 1
+            endpoint.requests += 1
+            if not ok:
+                seconds = max(seconds, penalty) if penalty is not None else None
+            if seconds is not None:
+                endpoint.latency = seconds if endpoint.latency is None else (
+                    self.ewma_weight * seconds + (1 - self.ewma_weight) * endpoint.latency)
+                endpoint.answered_at = self.clock()
+            if ok:
+                endpoint.failures = 0
+                endpoint.state = 'closed'
+                return
+            endpoint.errors += 1
+            endpoint.failures += 1
+            if endpoint.state == 'half-open' or endpoint.failures >= self.breaker_failures:
+                endpoint.state = 'open'
+                endpoint.opened_at = self.clock()
+
+    def abandon(self, endpoint: Endpoint, seconds: float) -> None:
+        """Account a request cut off because another replica answered first: it was slow, not failed"""
+        with self.lock:
+            endpoint.outstanding -= 1
+            endpoint.requests += 1
+            endpoint.latency = seconds if endpoint.latency is None else (
+                self.ewma_weight * max(seconds, endpoint.latency) + (1 - self.ewma_weight) * endpoint.latency)
+            endpoint.answered_at = self.clock()
+            if endpoint.state == 'half-open':
+                endpoint.state = 'open'  # The trial proved nothing; the next request is another one
+
+    def _call(self, endpoint: Endpoint, method: str, path: str, adapter: Optional[_AbortableAdapter] = None,
+              **kwargs) -> requests.Response:
+        started = time.perf_counter()
+        penalty = _timeout_seconds(kwargs.get('timeout'))
+        try:
+            if adapter is None:
+                response = requests.request(method, endpoint.url + path, **kwargs)
+            else:
+                with requests.Session() as session:
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    response = session.request(method, endpoint.url + path, **kwargs)
+        except requests.RequestException:
+            if adapter is not None and adapter.aborted:
+                self.abandon(endpoint, time.perf_counter() - started)
+            else:
+                self.record(endpoint, time.perf_counter() - started, ok=False, penalty=penalty)
+            raise
+        self.record(endpoint, time.perf_counter() - started, ok=response.status_code < 500, penalty=penalty)
+        return response
+
+    def _hedged(self, used: List[Endpoint], tried: Sequence[Endpoint], method: str, path: str,
+                **kwargs) -> Tuple[requests.Response, Endpoint]:
+        """Send to used[0] on this thread and, if it has not answered within hedge_after, to a second endpoint
+        that is not in tried.
+
+        The second endpoint is appended to used, so the caller knows every
+        endpoint the request went to even when both failed and the first
+        one's error is raised.
+        """
+        primary = used[0]
+        adapter = _AbortableAdapter()
+        call = propagate(self._call)
+        lock = threading.Lock()
+        state: Dict[str, Any] = {'done': False, 'hedge': None}
+
+        def won(future: Future) -> None:
+            if future.exception() is None and future.result().status_code < 500:
+                adapter.abort()
+
+        def hedge() -> None:
+            with lock:
+                if state['done']:
+                    return
+                secondary = self.choose(exclude=[*tried, primary])
+                if secondary is None:
+                    return
+                used.append(secondary)
+                future = _hedge_executor.submit(call, secondary, method, path, **kwargs)
+                state['hedge'] = (future, secondary)
+            with self.lock:
+                primary.hedges += 1
+            future.add_done_callback(won)
+
+        timer = _hedge_timer.schedule(self.hedge_after, hedge)
+        error: Optional[requests.RequestException] = None
+        response = None
+        try:
+            response = self._call(primary, method, path, adapter=adapter, **kwargs)
+        except requests.RequestException as primary_error:
+            error = primary_error
+        finally:
+            _hedge_timer.cancel(timer)
+            with lock:
+                state['done'] = True
+                hedge_sent = state['hedge']
+        if (error is None and response.status_code < 500) or hedge_sent is None:
+            if error is not None:
+                raise error
+            return response, primary
+        future, secondary = hedge_sent
+        try:
+            hedged = future.result()
+        except requests.RequestException:
+            hedged = None
+        if hedged is not None and hedged.status_code < 500:
+            return hedged, secondary
+        # Both failed: report the first request's outcome
+        if error is not None:
+            raise error
+        return response, primary
+
+    def send(self, method: str, path: str, **kwargs) -> Tuple[requests.Response, Endpoint]:
+        """Send a request to the best endpoint.
+
+        GETs are hedged and fail over to the others on any failure; other
+        methods only when the request never reached the server.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        tried: List[Endpoint] = []
+        while True:
+            endpoint = self.choose(exclude=tried, idempotent=idempotent)
+            used = [endpoint]
+            try:
+                if idempotent and self.hedge_after and len(self.endpoints) > 1:
+                    response, endpoint = self._hedged(used, tried, method, path, **kwargs)
+                else:
+                    response = self._call(endpoint, method, path, **kwargs)
+            except requests.RequestException as error:
+                # A failed hedge rules its endpoint out of the failover as well
+                tried.extend(used)
+                if len(tried) < len(self.endpoints) and (idempotent or request_not_sent(error)):
+                    continue
+                raise
+            tried.extend(used)
+            if response.status_code >= 500 and len(tried) < len(self.endpoints) and idempotent:
+                continue
+            return response, endpoint
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Health of every endpoint, for the Diagnostics page"""
+        with self.lock:
+            now = self.clock()
+            return [{'url': e.url, 'state': e.state, 'latency_ms': e.latency * 1000 if e.latency is not None else None,
+                     'outstanding': e.outstanding, 'consecutive_failures': e.failures, 'requests': e.requests,
+                     'errors': e.errors, 'hedged': e.hedges,
+                     'ejected_for': max(0.0, self.breaker_cooldown - (now - e.opened_at)) if e.state == 'open' else 0.0}
+                    for e in self.endpoints]
+
+
+_pools: Dict[Tuple[str, ...], EndpointPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_endpoint_pool(urls: Sequence[str]) -> EndpointPool:
+    """Process-wide pool for a set of endpoints"""
+    key = tuple(urls)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = EndpointPool(key)
+        return _pools[key]
+
+
+def endpoint_pools() -> List[EndpointPool]:
+    with _pools_lock:
+        return list(_pools.values())
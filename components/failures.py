@@ -0,0 +1,132 @@
+import re
+import pandas as pd
+from collections import Counter
+from typing import Dict, Any, Iterable, List
+
+# Placeholders applied in order so message variants collapse to one normalized form.
+# 3-6 digit numbers are kept because they are provider error codes and HTTP statuses.
+# A phone number either starts with '+' (digits, optionally grouped by single spaces or hyphens)
+# or is one run of 10-15 digits, so error codes next to counts are left alone:
+#   "error 131026: message undeliverable to +44 7911 123456" -> "error 131026: message undeliverable to <phone>"
+#   "error 131026 - 2 retries left"                          -> "error 131026 - <n> retries left"
+NORMALIZE_PATTERNS = [
+    (r'https?://\S+', '<url>'),
+    (r'\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}(:\d{2})?\S*', '<time>'),
+    (r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '<id>'),
+    (r'\+\d(?:[\s-]?\d){7,}|\b\d{10,15}\b', '<phone>'),
+    (r'\b(\d{1,2}|\d{7,})\b', '<n>'),
+    (r'\s+', ' '),
+]
+
+# Failure categories as (category, pattern) checked in order; the first match wins
+FAILURE_CATEGORIES = [
+    ('Rate limited', r'rate limit|too many|throttl|130429|131048|131056'),
+    ('Re-engagement window closed', r're-engagement|24 hour|131047'),
+    ('Opted out / blocked', r'opt(ed)?[ -]?out|block|unsubscri|131050'),
+    ('Invalid number', r'invalid (phone|number|recipient)|not a valid|not on whatsapp|'
+                       r'incapable|131026|131030'),
+    ('Template error', r'template|parameter|13200\d|132012|132015|132016'),
+    ('Media error', r'media|download|131052|131053'),
+    ('Authentication', r'auth|token|credential|permission|unauthori[sz]ed|\b401\b|\b403\b'),
+    ('Timeout / network', r'time(d)? ?out|connection|network|unreachable|\b50[234]\b'),
+]
+UNKNOWN_CATEGORY = 'Other'
+
+
+def normalize_errors(errors: pd.Series) -> pd.Series:
+    """Lowercase error messages and replace ids, numbers and URLs with placeholders"""
+    normalized = errors.fillna('').astype(str).str.lower().str.strip()
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        normalized = normalized.str.replace(pattern, replacement, regex=True)
+    return normalized.str.strip().replace('', 'no error message')
+
+
+def categorize(normalized_error: str) -> str:
+    """Map a normalized error message to a failure category"""
+    for category, pattern in FAILURE_CATEGORIES:
+        if re.search(pattern, normalized_error):
+            return category
+    return UNKNOWN_CATEGORY
+
+
+def phone_prefixes(phones: pd.Series, digits: int) -> pd.Series:
+    """Leading digits of each phone number (country code plus operator range)"""
+    cleaned = phones.fillna('').astype(str).str.replace(r'\D', '', regex=True)
+    return ('+' + cleaned.str[:digits]).where(cleaned != '', 'unknown')
+
+
+class FailureAggregator:
+    """Incremental failure counts keyed by (normalized error, phone prefix)"""
+
+    def __init__(self, prefix_digits: int = 4):
+        self.prefix_digits = prefix_digits
+        self.total = 0
+        self.pair_counts = Counter()
+        self.examples = {}
+
+    def add_page(self, messages: List[Dict[str, Any]]) -> None:
+        """Count one page of failed messages"""
+        if not messages:
+            return
+        page = pd.DataFrame(messages)
+        errors = page['error_message'] if 'error_message' in page else pd.Series([None] * len(page))
+        phones = page['phone_number'] if 'phone_number' in page else pd.Series([None] * len(page))
+
+        frame = pd.DataFrame({
+            'error': normalize_errors(errors),
+            'prefix': phone_prefixes(phones, self.prefix_digits),
+        })
+        # Group within the page, then fold into the running counter
+        for (error, prefix), count in frame.value_counts(sort=False).items():
+            self.pair_counts[(error, prefix)] += int(count)
+
+        # Keep the first raw message of each normalized form as a readable example
+        frame['raw'] = errors.fillna('').astype(str).values
+        for error, example in frame.drop_duplicates('error')[['error', 'raw']].itertuples(index=False):
+            self.examples.setdefault(error, example)
+        self.total += len(page)
+
+    def report(self, top_n: int = 10) -> Dict[str, Any]:
+        """Top failure causes, categories and affected phone prefixes"""
+        if not self.pair_counts:
+            return {'total': 0, 'categories': [], 'top_errors': [], 'prefixes': []}
+
+        counts = pd.DataFrame(
+            [(error, prefix, count) for (error, prefix), count in self.pair_counts.items()],
+            columns=['error', 'prefix', 'count']
+        )
+        # Categorize each distinct message once instead of every failed row
+        categories = {error: categorize(error) for error in counts['error'].unique()}
+        counts['category'] = counts['error'].map(categories)
+
+        by_category = counts.groupby('category')['count'].sum().sort_values(ascending=False)
+        by_error = counts.groupby(['error', 'category'])['count'].sum().sort_values(ascending=False)
+        by_prefix = counts.groupby('prefix')['count'].sum().sort_values(ascending=False)
+        top_prefix_category = (counts.groupby(['prefix', 'category'])['count'].sum()
+                               .sort_values(ascending=False).reset_index()
+                               .drop_duplicates('prefix').set_index('prefix')['category'])
+
+        return {
+            'total': self.total,
+            'categories': [
+                {'category': category, 'count': int(count)} for category, count in by_category.items()
+            ],
+            'top_errors': [
+                {'error': self.examples.get(error) or error, 'normalized': error,
+                 'category': category, 'count': int(count)}
+                for (error, category), count in by_error.head(top_n).items()
+            ],
+            'prefixes': [
+                {'prefix': prefix, 'count': int(count), 'top_category': top_prefix_category[prefix]}
+                for prefix, count in by_prefix.head(top_n).items()
+            ],
+        }
+
+
+def compute_failure_breakdown(pages: Iterable[List[Dict[str, Any]]], prefix_digits: int = 4,
+                              top_n: int = 10) -> Dict[str, Any]:
+    """Stream failed message pages and aggregate them by cause and phone prefix"""
+    aggregator = FailureAggregator(prefix_digits)
+    for messages in pages:
+        aggregator.add_page(messages)
+    return aggregator.report(top_n)
@@ -0,0 +1,155 @@
+"""Compact, typed tables of campaign messages.
+
+pd.DataFrame(messages) keeps every field of the API's message dicts as a
+Python object: phone numbers, statuses and error messages as strings and
+timestamps as ISO strings. For a big campaign that costs several times the
+memory of the data itself. MessageTableBuilder decodes pages straight into
+typed columns instead:
+
+    id              int64
+    phone_number    int64 digits (components.suppression.normalize_phones), INVALID when unparseable
+    phone_number_raw categorical: the number as the backend sent it, only where '+' and the digits
+                    would not reproduce it (e.g. '00441234567890', '98765-INVALID'); missing elsewhere
+    status          categorical
+    *_at            datetime64[ms], UTC, NaT when missing
+    error_message   categorical: each distinct message is stored once, rows hold a small code
+
+Other fields of the message dicts are dropped. export_frame() turns a table
+back into the strings the report sheets show, phone numbers exactly as the
+backend recorded them.
+"""
+from typing import Any, Dict, Iterable, List, Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from components.analytics import TIMESTAMP_FIELDS, parse_timestamps
+from components.suppression import INVALID, normalize_phones
+
+MESSAGE_STATUSES = ['queued', 'sending', 'sent', 'delivered', 'read', 'failed']  # Category order of the status column
+SOURCE_FIELDS = ['id', 'phone_number', 'status', *TIMESTAMP_FIELDS, 'error_message']  # Read from the message dicts
+INTERNED_FIELDS = ('status', 'error_message')
+CATEGORICAL_FIELDS = ('phone_number_raw', *INTERNED_FIELDS)
+
+
+class _Interner:
+    """Stable integer codes for the distinct strings of a column, across pages"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values: Union[List[Any], pa.Array]) -> np.ndarray:
+        """int32 codes of values, -1 for missing ones"""
+        if not isinstance(values, pa.Array):
+            values = pa.array(values, type=pa.string())
+        encoded = values.dictionary_encode()
+        # Distinct values are interned once per batch; rows are translated with one take
+        lookup = np.array([self.code(value) for value in encoded.dictionary.to_pylist()] + [-1], dtype=np.int32)
+        indices = encoded.indices.fill_null(len(lookup) - 1).to_numpy(zero_copy_only=False)
+        return lookup[indices]
+
+    def categorical(self, codes: np.ndarray) -> pd.Categorical:
+        return pd.Categorical.from_codes(codes, categories=pd.Index(self.values, dtype=object))
+
+
+def _unlike_digits(values: List[Any], numbers: np.ndarray) -> pa.Array:
+    """Phone values that '+' and their normalized digits would not reproduce; null for the rest"""
+    try:
+        raw = pa.array(values, from_pandas=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # Mixed text and numbers
+        raw = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+    if not pa.types.is_string(raw.type):
+        raw = pc.cast(raw, pa.string())
+    rebuilt = pc.binary_join_element_wise('+', pc.cast(pa.array(numbers), pa.string()), '')
+    same = pc.fill_null(pc.equal(raw, rebuilt), False)
+    return pc.if_else(same, pa.scalar(None, pa.string()), raw)
+
+
+class MessageTableBuilder:
+    """Accumulates pages of message dicts as typed column chunks.
+
+    Raw field values are buffered and decoded batch_rows at a time: the
+    vectorized parsers cost about as much per call as per thousand rows, so
+    decoding every API page on its own would double the build time.
+    """
+
+    def __init__(self, batch_rows: int = 65536):
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._interners = {'status': _Interner(MESSAGE_STATUSES), 'error_message': _Interner(),
+                           'phone_number_raw': _Interner()}
+        self._chunks: Dict[str, List[np.ndarray]] = {field: [] for field in self.columns()}
+        self._pending: Dict[str, List[Any]] = {field: [] for field in SOURCE_FIELDS}
+
+    @staticmethod
+    def columns() -> List[str]:
+        return ['id', 'phone_number', 'phone_number_raw', 'status', *TIMESTAMP_FIELDS, 'error_message']
+
+    def add_page(self, messages: List[Dict[str, Any]]) -> None:
+        """Add one page of messages"""
+        for field, values in self._pending.items():
+            values.extend([m.get(field) for m in messages])
+        self.rows += len(messages)
+        if len(self._pending['id']) >= self.batch_rows:
+            self._decode()
+
+    def _decode(self) -> None:
+        pending = self._pending
+        if not pending['id']:
+            return
+        self._chunks['id'].append(np.array([-1 if i is None else i for i in pending['id']], dtype=np.int64))
+        numbers = normalize_phones(pending['phone_number'])
+        self._chunks['phone_number'].append(numbers)
+        self._chunks['phone_number_raw'].append(
+            self._interners['phone_number_raw'].encode(_unlike_digits(pending['phone_number'], numbers)))
+        for field in INTERNED_FIELDS:
+            self._chunks[field].append(self._interners[field].encode(pending[field]))
+        for field in TIMESTAMP_FIELDS:
+            self._chunks[field].append(parse_timestamps(pending[field]))
+        self._pending = {field: [] for field in SOURCE_FIELDS}
+
+    def build(self) -> pd.DataFrame:
+        """The messages added so far as one DataFrame"""
+        self._decode()
+        columns = {}
+        for field, chunks in self._chunks.items():
+            dtype = (np.int32 if field in CATEGORICAL_FIELDS
+                     else 'datetime64[ms]' if field in TIMESTAMP_FIELDS else np.int64)
+            values = np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+            columns[field] = self._interners[field].categorical(values) if field in CATEGORICAL_FIELDS else values
+        return pd.DataFrame(columns, copy=False)
+
+
+def build_message_table(pages: Iterable[List[Dict[str, Any]]]) -> pd.DataFrame:
+    """Typed table of every message in pages (as yielded by APIClient.iter_campaign_messages)"""
+    builder = MessageTableBuilder()
+    for messages in pages:
+        builder.add_page(messages)
+    return builder.build()
+
+
+def export_frame(table: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """columns of a message table as report sheets show them: phone numbers as sent and ISO timestamps"""
+    frame = {}
+    for column in columns:
+        values = table[column]
+        if column == 'phone_number':
+            raw = table['phone_number_raw'].astype(object)
+            values = ('+' + values.astype(str)).where(values != INVALID, '').where(raw.isna(), raw)
+        elif column in TIMESTAMP_FIELDS:
+            # %S includes the milliseconds
+            values = pd.Series(pc.strftime(pa.array(values), format='%Y-%m-%dT%H:%M:%SZ'), index=table.index,
+                               dtype=object)
+        frame[column] = values
+    return pd.DataFrame(frame)
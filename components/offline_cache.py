@@ -0,0 +1,361 @@
+"""Persistent local copy of campaigns, statistics and messages, for rendering offline.
+
+Loaders write what they fetch through to an embedded SQLite database on a
+background writer thread. Pages go through fetch_or_cached(): it waits up to
+OFFLINE_FRESH_WAIT seconds for the backend and otherwise renders the cached
+copy with a staleness marker, leaving the fetch running so its result is
+there on the next rerun. When the backend fails outright, the cached copy is
+shown instead of an error. Messages are stored row by row with indexes on
+campaign, status and phone, so large tables are filtered, searched and paged
+locally rather than loaded into memory.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import streamlit as st
+from components.tracing import propagate
+from config import (OFFLINE_CACHE_DB_PATH, OFFLINE_FRESH_WAIT, OFFLINE_FETCH_WORKERS,
+                    OFFLINE_RETENTION_DAYS)
+
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    user_key TEXT NOT NULL,
+    campaign_id INTEGER NOT NULL,
+    status TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL,              -- JSON as returned by the API
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (user_key, campaign_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS campaigns_created ON campaigns (user_key, created_at);
+
+CREATE TABLE IF NOT EXISTS stats (
+    user_key TEXT NOT NULL,
+    scope TEXT NOT NULL,             -- 'overall' or 'campaign:<id>'
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (user_key, scope)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS messages (
+    user_key TEXT NOT NULL,
+    campaign_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    status TEXT,
+    phone_number TEXT,
+    sent_at TEXT,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (user_key, campaign_id, message_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS messages_status ON messages (user_key, campaign_id, status, sent_at);
+CREATE INDEX IF NOT EXISTS messages_phone ON messages (user_key, campaign_id, phone_number);
+CREATE INDEX IF NOT EXISTS messages_sent ON messages (user_key, campaign_id, sent_at);
+
+-- Message counts as reported by the backend, so a partial local copy can say how partial it is
+CREATE TABLE IF NOT EXISTS message_totals (
+    user_key TEXT NOT NULL,
+    campaign_id INTEGER NOT NULL,
+    status TEXT NOT NULL,            -- '' for all statuses
+    count INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (user_key, campaign_id, status)
+) WITHOUT ROWID;
+
+-- Campaigns whose messages were all saved for offline use
+CREATE TABLE IF NOT EXISTS message_syncs (
+    user_key TEXT NOT NULL,
+    campaign_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (user_key, campaign_id)
+) WITHOUT ROWID;
+"""
+
+# Orderings the Message Explorer sends to the backend, as local columns
+MESSAGE_ORDER_COLUMNS = {'sent_at': 'sent_at', 'phone_number': 'phone_number', 'status': 'status'}
+
+
+class OfflineCache:
+    """SQLite copy of what the backend last returned, per user"""
+
+    def __init__(self, path: str = OFFLINE_CACHE_DB_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.purge()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    # Campaigns
+    def put_campaigns(self, user_key: str, campaigns: Iterable[Dict[str, Any]],
+                      fetched_at: Optional[float] = None) -> None:
+        fetched_at = fetched_at or time.time()
+        rows = [(user_key, c['id'], c.get('status'), c.get('created_at'), json.dumps(c), fetched_at)
+                for c in campaigns if c.get('id') is not None]
+        if not rows:
+            return
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT OR REPLACE INTO campaigns VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def get_campaign(self, user_key: str, campaign_id: int) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self.lock:
+            row = self.conn.execute("SELECT data, fetched_at FROM campaigns WHERE user_key = ? AND campaign_id = ?",
+                                    (user_key, campaign_id)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def campaign_page(self, user_key: str, page: int, page_size: int) -> Optional[Tuple[Dict[str, Any], float]]:
+        """A page of cached campaigns, newest first, shaped like the API's list response"""
+        with self.lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM campaigns WHERE user_key = ?", (user_key,)).fetchone()[0]
+            rows = self.conn.execute(
+                "SELECT data, fetched_at FROM campaigns WHERE user_key = ? "
+                "ORDER BY created_at DESC, campaign_id DESC LIMIT ? OFFSET ?",
+                (user_key, page_size, (page - 1) * page_size)).fetchall()
+        if not count:
+            return None
+        response = {
+            'results': [json.loads(data) for data, _ in rows],
+            'count': count,
+            'next': page * page_size < count,
+            'previous': page > 1,
+            'success': True,
+        }
+        return response, min((fetched_at for _, fetched_at in rows), default=time.time())
+
+    # Statistics
+    def put_stats(self, user_key: str, scope: str, stats: Dict[str, Any],
+                  fetched_at: Optional[float] = None) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?)",
+                              (user_key, scope, json.dumps(stats), fetched_at or time.time()))
+
+    def get_stats(self, user_key: str, scope: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self.lock:
+            row = self.conn.execute("SELECT data, fetched_at FROM stats WHERE user_key = ? AND scope = ?",
+                                    (user_key, scope)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    # Messages
+    def put_messages(self, user_key: str, campaign_id: int, messages: Iterable[Dict[str, Any]],
+                     fetched_at: Optional[float] = None) -> int:
+        """Store messages that carry an id; returns how many were stored"""
+        fetched_at = fetched_at or time.time()
+        rows = [(user_key, campaign_id, m['id'], m.get('status'), m.get('phone_number'), m.get('sent_at'),
+                 json.dumps(m), fetched_at) for m in messages if m.get('id') is not None]
+        if rows:
+            with self.lock, self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def put_message_total(self, user_key: str, campaign_id: int, status: Optional[str], count: int) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO message_totals VALUES (?, ?, ?, ?, ?)",
+                              (user_key, campaign_id, status or '', count, time.time()))
+
+    def mark_synced(self, user_key: str, campaign_id: int, count: int, synced_at: float) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO message_syncs VALUES (?, ?, ?, ?)",
+                              (user_key, campaign_id, count, synced_at))
+
+    def synced_at(self, user_key: str, campaign_id: int) -> Optional[float]:
+        """When all of a campaign's messages were last saved, if ever"""
+        with self.lock:
+            row = self.conn.execute("SELECT synced_at FROM message_syncs WHERE user_key = ? AND campaign_id = ?",
+                                    (user_key, campaign_id)).fetchone()
+        return row[0] if row else None
+
+    def query_messages(self, user_key: str, campaign_id: int, page: int, page_size: int,
+                       status: Optional[str] = None, search: Optional[str] = None,
+                       ordering: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """One page of cached messages, filtered and sorted like the backend does.
+
+        'count' is the number of cached matches; 'total' is the backend's count
+        for the same status when known, so callers can tell a partial copy.
+        """
+        where = "user_key = ? AND campaign_id = ?"
+        params: List[Any] = [user_key, campaign_id]
+        if status:
+            where += " AND status = ?"
+            params.append(status)
+        if search:
+            if search.startswith('+'):
+                # Every number starts with '+', so this substring match is a prefix match the index serves
+                where += " AND phone_number >= ? AND phone_number < ?"
+                params += [search, search + '\uffff']
+            else:
+                where += " AND instr(phone_number, ?) > 0"
+                params.append(search)
+
+        order = "message_id"
+        field = (ordering or '').lstrip('-')
+        if field in MESSAGE_ORDER_COLUMNS:
+            direction = "DESC" if ordering.startswith('-') else "ASC"
+            order = f"{MESSAGE_ORDER_COLUMNS[field]} {direction}, message_id {direction}"
+
+        with self.lock:
+            if not self.conn.execute("SELECT 1 FROM messages WHERE user_key = ? AND campaign_id = ? LIMIT 1",
+                                     (user_key, campaign_id)).fetchone():
+                return None
+            count = self.conn.execute(f"SELECT COUNT(*) FROM messages WHERE {where}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT data, fetched_at FROM messages WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size]).fetchall()
+            total = None
+            if not search:
+                row = self.conn.execute(
+                    "SELECT count FROM message_totals WHERE user_key = ? AND campaign_id = ? AND status = ?",
+                    (user_key, campaign_id, status or '')).fetchone()
+                total = row[0] if row else None
+        page_data = {
+            'results': [json.loads(data) for data, _ in rows],
+            'count': count,
+            'next': page * page_size < count,
+            'total': total,
+        }
+        return page_data, min((fetched_at for _, fetched_at in rows), default=time.time())
+
+    def purge(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Delete rows not refreshed within OFFLINE_RETENTION_DAYS"""
+        cutoff = (now or time.time()) - OFFLINE_RETENTION_DAYS * DAY
+        removed = {}
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            for table, column in (('campaigns', 'fetched_at'), ('stats', 'fetched_at'), ('messages', 'fetched_at'),
+                                  ('message_totals', 'fetched_at'), ('message_syncs', 'synced_at')):
+                removed[table] = self.conn.execute(f"DELETE FROM {table} WHERE {column} < ?", (cutoff,)).rowcount
+        return removed
+
+
+_cache: Optional[OfflineCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_offline_cache() -> OfflineCache:
+    """Process-wide offline cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OfflineCache()
+        return _cache
+
+
+# Writes happen one at a time off the rerun path; a rerun never waits for the cache
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="offline-cache")
+# Backend fetches a page may stop waiting for; they finish in the background
+_fetch_executor = ThreadPoolExecutor(max_workers=OFFLINE_FETCH_WORKERS, thread_name_prefix="offline-fetch")
+_inflight: Dict[Hashable, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def write_behind(write: Callable[..., Any], *args) -> None:
+    """Run a cache write on the writer thread"""
+    def _write():
+        try:
+            write(*args)
+        except Exception:
+            pass  # The cache is best effort; the next fetch writes again
+
+    _writer.submit(_write)
+
+
+def submit_fetch(key: Hashable, fetch: Callable[..., Any], *args,
+                 executor: Optional[ThreadPoolExecutor] = None) -> Future:
+    """Start a backend fetch, or join the one already running for the same key.
+
+    Reruns that stop waiting on a slow backend would otherwise pile up a
+    fetch each; this keeps one per key.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        future = (executor or _fetch_executor).submit(propagate(fetch), *args)
+        _inflight[key] = future
+    # Outside the lock: on a fetch that already finished, the callback runs right here
+    future.add_done_callback(lambda _: _forget(key, future))
+    return future
+
+
+def fetches_in_flight() -> int:
+    """Backend fetches started with submit_fetch() that have not finished"""
+    with _inflight_lock:
+        return len(_inflight)
+
+
+def _forget(key: Hashable, future: Future) -> None:
+    with _inflight_lock:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+
+class Freshness:
+    """Whether a value came straight from the backend or from the offline cache"""
+
+    def __init__(self, fetched_at: float, stale: bool = False, error: Optional[str] = None):
+        self.fetched_at = fetched_at
+        self.stale = stale
+        self.error = error  # Why the backend's answer was not used; None while it is still loading
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+
+def fetch_or_cached(future: Future, cached: Callable[[], Optional[Tuple[Any, float]]],
+                    wait: float = OFFLINE_FRESH_WAIT) -> Tuple[Any, Freshness]:
+    """The fetch's result if it arrives within `wait` seconds, else the cached copy.
+
+    With nothing cached, waits for the fetch and raises its error like a
+    plain load would.
+    """
+    try:
+        return future.result(timeout=wait), Freshness(time.time())
+    except FutureTimeout:
+        error = None
+    except Exception as e:
+        error = str(e)
+
+    try:
+        hit = cached()
+    except Exception:
+        hit = None  # An unreadable cache must not hide the backend's answer
+    if hit is None:
+        return future.result(), Freshness(time.time())
+    value, fetched_at = hit
+    return value, Freshness(fetched_at, stale=True, error=error)
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds // 60:.0f} min"
+    if seconds < DAY:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / DAY:.1f} days"
+
+
+def show_freshness(freshness: Optional[Freshness], what: str) -> None:
+    """Mark data served from the offline cache; nothing is shown for fresh data"""
+    if freshness is None or not freshness.stale:
+        return
+    age = format_age(freshness.age)
+    if freshness.error:
+        st.warning(f"📴 Backend unavailable ({freshness.error}). Showing {what} saved {age} ago.")
+    else:
+        st.info(f"🕒 Showing {what} saved {age} ago while fresh data loads. Refresh in a moment to update.")
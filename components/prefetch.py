@@ -0,0 +1,114 @@
+"""Background warming of what a user is likely to open next, within a fixed budget.
+
+Pages call warm() once they have rendered: the campaign list warms its
+neighbouring pages and the details and statistics of the campaigns most
+likely to be managed, and the Manage button warms its campaign before the
+rerun starts. Prefetches run through submit_fetch() under the same key as
+the foreground load, so a click that arrives while one is still running
+joins it instead of sending a second request. A finished result is held for
+PREFETCH_TTL seconds and handed to the first foreground load that claim()s
+it. Pages also hold() what they just fetched: a click reruns the script from
+the top before the button's handler runs, and that rerun can reuse the page
+on screen instead of fetching it again.
+
+The budget keeps prefetching from competing with foreground requests: a few
+dedicated threads, a process-wide token bucket, a cap on pending
+prefetches, and nothing at all while more than PREFETCH_MAX_FOREGROUND
+foreground fetches are in flight. A prefetch over budget is skipped, not
+queued.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+from components.concurrency import RateLimiter
+from components.offline_cache import fetches_in_flight, submit_fetch
+from config import (PREFETCH_MAX_WORKERS, PREFETCH_RATE_PER_SECOND, PREFETCH_BURST, PREFETCH_MAX_PENDING,
+                    PREFETCH_MAX_FOREGROUND, PREFETCH_TTL, PREFETCH_MAX_ENTRIES)
+
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_MAX_WORKERS, thread_name_prefix="prefetch")
+_budget = RateLimiter(PREFETCH_RATE_PER_SECOND, PREFETCH_BURST)
+_lock = threading.Lock()
+_pending: Dict[Hashable, Future] = {}
+_keep: Dict[Hashable, bool] = {}  # Whether a pending prefetch's result is held once it finishes
+_results: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # key -> (finished at, value)
+_stats = {'started': 0, 'skipped': 0, 'hits': 0, 'unused': 0, 'failed': 0}
+
+
+def warm(key: Hashable, fetch: Callable[..., Any], *args, keep: bool = True) -> bool:
+    """Start fetch(*args) in the background unless it is over budget; returns whether it started.
+
+    With keep=False the result is not held for claim(); for fetches that
+    fill a cache of their own, such as st.cache_data loaders.
+    """
+    with _lock:
+        held = _results.get(key)
+        if key in _pending or (held is not None and time.monotonic() - held[0] <= PREFETCH_TTL):
+            return False
+        # Prefetches are in submit_fetch's in-flight count too; only foreground fetches count against the limit
+        if (len(_pending) >= PREFETCH_MAX_PENDING or fetches_in_flight() - len(_pending) > PREFETCH_MAX_FOREGROUND
+                or not _budget.try_acquire()):
+            _stats['skipped'] += 1
+            return False
+        _stats['started'] += 1
+        future = submit_fetch(key, fetch, *args, executor=_executor)
+        _pending[key] = future
+        _keep[key] = keep
+    future.add_done_callback(lambda done: _finished(key, done))
+    return True
+
+
+def _finished(key: Hashable, future: Future) -> None:
+    with _lock:
+        if _pending.get(key) is not future:
+            return
+        del _pending[key]
+        keep = _keep.pop(key)
+        if future.exception() is not None:
+            _stats['failed'] += 1  # The foreground load will fetch it again
+            return
+        if keep:
+            _store(key, future.result())
+
+
+def hold(key: Hashable, value: Any) -> None:
+    """Hold a result the foreground just fetched for one later claim() within PREFETCH_TTL"""
+    with _lock:
+        _store(key, value)
+
+
+def _store(key: Hashable, value: Any) -> None:
+    _results[key] = (time.monotonic(), value)
+    _results.move_to_end(key)
+    while len(_results) > PREFETCH_MAX_ENTRIES:
+        _results.popitem(last=False)
+        _stats['unused'] += 1
+
+
+def claim(key: Hashable) -> Optional[Future]:
+    """A finished future holding the prefetched result for key, once; None when there is none.
+
+    A prefetch still running is not returned: the caller's submit_fetch()
+    joins it, and its result is then not held for a later claim.
+    """
+    with _lock:
+        if key in _pending:
+            _keep[key] = False
+            _stats['hits'] += 1
+            return None
+        held = _results.pop(key, None)
+        if held is None:
+            return None
+        if time.monotonic() - held[0] > PREFETCH_TTL:
+            _stats['unused'] += 1
+            return None
+        _stats['hits'] += 1
+    future = Future()
+    future.set_result(held[1])
+    return future
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return {**_stats, 'pending': len(_pending), 'held': len(_results)}
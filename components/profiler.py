@@ -0,0 +1,253 @@
+"""On-demand profiling of page reruns, armed from the Diagnostics page.
+
+An admin arms a target page for the next N reruns (from any session, or only
+their own). Those reruns run under either a sampling profiler (wall-clock
+stacks every few milliseconds, aggregated into folded stacks for a
+flamegraph) or cProfile (exact call counts, exported as a .pstats file).
+Results are aggregated per page. Pages reach this through tracing's
+start_rerun()/end_rerun(); when nothing is armed that costs a dict check.
+"""
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from config import PROFILE_SAMPLE_INTERVAL_MS, PROFILE_MAX_STACK_DEPTH
+
+MODES = ('sampling', 'deterministic')
+
+_lock = threading.Lock()
+_targets: Dict[str, 'ProfileRequest'] = {}  # page -> armed request
+_running: Dict[str, 'ProfileRun'] = {}  # session id -> run in progress
+_results: Dict[str, 'PageProfile'] = {}  # page -> aggregate
+
+
+class ProfileRequest:
+    """Profile the next `reruns` reruns of `page`"""
+
+    def __init__(self, page: str, reruns: int, mode: str, session_id: Optional[str] = None,
+                 interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiler mode: {mode}")
+        self.page = page
+        self.remaining = reruns
+        self.mode = mode
+        self.session_id = session_id  # None profiles every session
+        self.interval_ms = interval_ms
+        self.armed_at = time.time()
+
+
+class PageProfile:
+    """Profiles of one page aggregated across reruns"""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.reruns = 0
+        self.seconds = 0.0
+        self.folded: Counter = Counter()  # "frame;frame;frame" -> samples
+        self.samples = 0
+        self.interval_ms = PROFILE_SAMPLE_INTERVAL_MS
+        self.stats: Optional[pstats.Stats] = None
+        self.outcomes: Counter = Counter()
+
+    def add(self, run: 'ProfileRun', outcome: str) -> None:
+        self.reruns += 1
+        self.seconds += run.seconds
+        self.outcomes[outcome] += 1
+        if run.sampler is not None:
+            self.folded.update(run.sampler.folded)
+            self.samples += sum(run.sampler.folded.values())
+            self.interval_ms = run.sampler.interval_ms
+        if run.profile is not None:
+            if self.stats is None:
+                self.stats = pstats.Stats(run.profile)
+            else:
+                self.stats.add(run.profile)
+
+    def folded_text(self) -> str:
+        """Folded stacks as read by flamegraph.pl, speedscope and inferno"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.folded.most_common())
+
+    def pstats_bytes(self) -> bytes:
+        """The aggregate in the format written by pstats.Stats.dump_stats"""
+        return marshal.dumps(self.stats.stats) if self.stats is not None else b''
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Hottest functions: self/total samples when sampling, tottime/cumtime from cProfile"""
+        rows = []
+        if self.folded:
+            own: Counter = Counter()
+            total: Counter = Counter()
+            for stack, count in self.folded.items():
+                frames = stack.split(';')
+                own[frames[-1]] += count
+                for frame in set(frames):
+                    total[frame] += count
+            ms = self.interval_ms
+            for frame, count in total.most_common(limit):
+                rows.append({'function': frame, 'self_ms': own[frame] * ms, 'total_ms': count * ms,
+                             'total_pct': 100 * count / max(1, self.samples)})
+        elif self.stats is not None:
+            for (filename, line, name), (cc, nc, tt, ct, _) in sorted(
+                    self.stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]:
+                rows.append({'function': _frame_label(name, filename, line), 'calls': nc,
+                             'self_ms': tt * 1000, 'total_ms': ct * 1000})
+        return rows
+
+
+class StackSampler:
+    """Samples one thread's stack on a timer and counts folded stacks"""
+
+    def __init__(self, thread_id: int, interval_ms: float):
+        self.thread_id = thread_id
+        self.interval_ms = interval_ms
+        self.folded: Counter = Counter()
+        self.ended: Optional[float] = None  # When the sampled thread exited
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="rerun-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _loop(self) -> None:
+        interval = self.interval_ms / 1000
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                self.ended = time.perf_counter()  # The script thread has exited
+                return
+            self.folded[_fold(frame)] += 1
+
+
+_STDLIB = sysconfig.get_paths()['stdlib']
+
+
+def _frame_label(name: str, filename: str, line: int) -> str:
+    """function (path:line), with paths shortened to the repo, site-packages or stdlib"""
+    if 'site-packages' in filename:
+        filename = filename.replace('\\', '/').split('site-packages/')[-1]
+    elif filename.startswith(_STDLIB):
+        filename = os.path.relpath(filename, _STDLIB)
+    elif os.path.isabs(filename):
+        try:
+            filename = os.path.relpath(filename)
+        except ValueError:
+            pass  # Different drive on Windows
+    return f"{name} ({filename}:{line})".replace(';', ',')
+
+
+def _fold(frame) -> str:
+    """Stack from the page script down to the sampled frame, outermost first"""
+    stack = []
+    while frame is not None and len(stack) < PROFILE_MAX_STACK_DEPTH:
+        stack.append(frame.f_code)
+        frame = frame.f_back
+    stack.reverse()
+    # Streamlit's script-runner frames above the page's own module frame are the same every time
+    repo = os.getcwd()
+    for start, code in enumerate(stack):
+        if code.co_name == '<module>' and code.co_filename.startswith(repo):
+            stack = stack[start:]
+            break
+    return ';'.join(_frame_label(c.co_name, c.co_filename, c.co_firstlineno) for c in stack)
+
+
+class ProfileRun:
+    """One rerun being profiled"""
+
+    def __init__(self, request: ProfileRequest):
+        self.page = request.page
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.sampler: Optional[StackSampler] = None
+        self.profile: Optional[cProfile.Profile] = None
+        if request.mode == 'sampling':
+            self.sampler = StackSampler(threading.get_ident(), request.interval_ms)
+            self.sampler.start()
+        else:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self) -> None:
+        self.seconds = time.perf_counter() - self.started
+        if self.sampler is not None:
+            self.sampler.stop()
+            if self.sampler.ended is not None:
+                self.seconds = self.sampler.ended - self.started
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.create_stats()
+
+
+def arm(request: ProfileRequest) -> None:
+    """Profile the next reruns of request.page; replaces any request for that page"""
+    with _lock:
+        _targets[request.page] = request
+
+
+def disarm(page: str) -> None:
+    with _lock:
+        _targets.pop(page, None)
+
+
+def armed() -> Dict[str, ProfileRequest]:
+    with _lock:
+        return dict(_targets)
+
+
+def results() -> Dict[str, PageProfile]:
+    with _lock:
+        return dict(_results)
+
+
+def clear_results(page: Optional[str] = None) -> None:
+    with _lock:
+        if page is None:
+            _results.clear()
+        else:
+            _results.pop(page, None)
+
+
+def _finish(session_id: str, outcome: str) -> None:
+    with _lock:
+        run = _running.pop(session_id, None)
+    if run is None:
+        return
+    run.stop()
+    with _lock:
+        _results.setdefault(run.page, PageProfile(run.page)).add(run, outcome)
+
+
+def begin_profile(session_id: str, page: str) -> None:
+    """Called as a rerun starts; profiles it if the page is armed for this session"""
+    if _running:
+        _finish(session_id, 'stopped')  # The session's previous rerun ended early
+    if not _targets:
+        return
+    with _lock:
+        request = _targets.get(page)
+        if request is None or (request.session_id and request.session_id != session_id):
+            return
+        request.remaining -= 1
+        if request.remaining <= 0:
+            del _targets[page]
+        _running[session_id] = ProfileRun(request)
+
+
+def end_profile(session_id: str) -> None:
+    """Called as a rerun completes"""
+    _finish(session_id, 'completed')
+
+
+def is_profiling() -> bool:
+    return bool(_running)
@@ -0,0 +1,299 @@
+"""Rate-shaped campaign starts: a persisted queue drained under a global send budget.
+
+Campaigns are queued with a start time. On every tick the scheduler reads
+each managed campaign's live sent_count, charges what was sent against a
+token bucket that refills at the budget (recipients per minute), and walks
+the due campaigns in queue order. Each one is admitted while the rate it is
+expected to send fits the budget left for the next tick; admitted campaigns
+are started or resumed, the rest are paused until there is room. A
+campaign faster than the whole budget still runs, duty-cycled by the
+bucket. Rates are moving averages of observed sent_count deltas.
+
+The budget is global: sending by campaigns the scheduler does not manage
+(started from the Campaigns page, bulk actions or `cli.py create --start`) is
+charged too, from the sent_count deltas of a local copy of the campaign list
+kept current with incremental syncs. It cannot pause those campaigns, so it
+holds back its own until the budget has room again.
+
+The clock is injectable so the scheduler can be driven in simulated time
+against the mock backend (see benchmarks/start_scheduler.py).
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from components.api_client import APIClient
+from components.campaign_sync import CampaignStore, sync_campaigns
+from components.concurrency import run_concurrently
+from config import (SCHEDULER_DB_PATH, SCHEDULER_BUDGET_PER_MINUTE, SCHEDULER_TICK_SECONDS,
+                    SCHEDULER_BURST_SECONDS, SCHEDULER_DEFAULT_RATE, SCHEDULER_RATE_SMOOTHING,
+                    SCHEDULER_MAX_WORKERS)
+
+# queued: waiting to be started; running: started or resumed by the scheduler;
+# throttled: paused by the scheduler; held: paused by someone else, left alone;
+# done/failed/cancelled: no longer managed
+ACTIVE_STATES = ('queued', 'running', 'throttled')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_starts (
+    campaign_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,              -- Queue order among equal start times
+    start_at REAL NOT NULL,            -- Epoch seconds
+    state TEXT NOT NULL,
+    total_recipients INTEGER,
+    sent_count INTEGER,                -- As of checked_at
+    checked_at REAL,
+    rate REAL,                         -- Moving average, recipients per second
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scheduled_starts_state ON scheduled_starts (state, start_at, seq);
+
+CREATE TABLE IF NOT EXISTS scheduler_state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+COLUMNS = ['campaign_id', 'seq', 'start_at', 'state', 'total_recipients', 'sent_count', 'checked_at',
+           'rate', 'error', 'updated_at']
+
+
+class ScheduleStore:
+    """SQLite queue of scheduled starts and the scheduler's budget state"""
+
+    def __init__(self, path: str = SCHEDULER_DB_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def add(self, campaign_id: int, start_at: float, now: Optional[float] = None) -> None:
+        """Queue a campaign, or move its start time if it is already queued"""
+        now = now or time.time()
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            row = self.conn.execute("SELECT state FROM scheduled_starts WHERE campaign_id = ?",
+                                    (campaign_id,)).fetchone()
+            if row and row[0] in ACTIVE_STATES:
+                self.conn.execute("UPDATE scheduled_starts SET start_at = ?, updated_at = ? WHERE campaign_id = ?",
+                                  (start_at, now, campaign_id))
+                return
+            seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM scheduled_starts").fetchone()[0]
+            self.conn.execute("INSERT OR REPLACE INTO scheduled_starts (campaign_id, seq, start_at, state, updated_at) "
+                              "VALUES (?, ?, ?, 'queued', ?)", (campaign_id, seq, start_at, now))
+
+    def cancel(self, campaign_id: int, now: Optional[float] = None) -> bool:
+        """Stop managing a campaign; it keeps whatever status it has"""
+        with self.lock, self.conn:
+            return self.conn.execute(
+                "UPDATE scheduled_starts SET state = 'cancelled', updated_at = ? "
+                f"WHERE campaign_id = ? AND state IN ({','.join('?' * len(ACTIVE_STATES))})",
+                (now or time.time(), campaign_id) + ACTIVE_STATES).rowcount > 0
+
+    def entries(self, states: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """Entries in queue order"""
+        query = f"SELECT {', '.join(COLUMNS)} FROM scheduled_starts"
+        params: tuple = ()
+        if states:
+            query += f" WHERE state IN ({','.join('?' * len(states))})"
+            params = tuple(states)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY start_at, seq", params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def save(self, entries: List[Dict[str, Any]], state: Dict[str, float]) -> None:
+        """Write back a tick's entries and budget state together"""
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "UPDATE scheduled_starts SET state = ?, total_recipients = ?, sent_count = ?, checked_at = ?, "
+                "rate = ?, error = ?, updated_at = ? WHERE campaign_id = ?",
+                [(e['state'], e['total_recipients'], e['sent_count'], e['checked_at'], e['rate'], e['error'],
+                  e['updated_at'], e['campaign_id']) for e in entries])
+            self.conn.executemany("INSERT OR REPLACE INTO scheduler_state VALUES (?, ?)", list(state.items()))
+
+    def state(self) -> Dict[str, float]:
+        with self.lock:
+            return dict(self.conn.execute("SELECT key, value FROM scheduler_state").fetchall())
+
+
+class StartScheduler:
+    """Starts, pauses and resumes queued campaigns to keep total sending under a budget"""
+
+    def __init__(self, api: APIClient, store: Optional[ScheduleStore] = None,
+                 budget_per_minute: float = SCHEDULER_BUDGET_PER_MINUTE,
+                 tick_seconds: float = SCHEDULER_TICK_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.api = api
+        self.store = store or ScheduleStore()
+        self.budget_per_minute = budget_per_minute
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._campaigns = CampaignStore()  # Every campaign, for sending outside the queue
+        self._outside: Dict[int, int] = {}  # sent_count of unmanaged campaigns at the last tick
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _call(self, action: str, campaign_id: int) -> Dict[str, Any]:
+        method = {'start': self.api.start_campaign, 'pause': self.api.pause_campaign,
+                  'resume': self.api.resume_campaign}[action]
+        return method(campaign_id)
+
+    def _observe(self, entry: Dict[str, Any], campaign: Dict[str, Any], now: float) -> int:
+        """Update an entry from the campaign's live counters; returns recipients sent since the last tick"""
+        sent = campaign.get('sent_count', 0)
+        sent_delta = max(0, sent - entry['sent_count']) if entry['sent_count'] is not None else 0
+        if entry['state'] == 'running' and entry['checked_at'] is not None and now > entry['checked_at']:
+            sample = sent_delta / (now - entry['checked_at'])
+            entry['rate'] = sample if entry['rate'] is None else (
+                SCHEDULER_RATE_SMOOTHING * sample + (1 - SCHEDULER_RATE_SMOOTHING) * entry['rate'])
+        entry.update(sent_count=sent, checked_at=now, total_recipients=campaign.get('total_recipients'))
+
+        status = campaign.get('status')
+        if status == 'completed' or (entry['total_recipients'] and sent >= entry['total_recipients']):
+            entry['state'] = 'done'
+        elif status == 'failed':
+            entry['state'] = 'failed'
+        elif status == 'paused' and entry['state'] == 'running':
+            entry['state'] = 'held'
+        elif status == 'running' and entry['state'] in ('queued', 'throttled'):
+            entry['state'] = 'running'  # Started or resumed outside the scheduler
+        return sent_delta
+
+    def _outside_sent(self, managed: set) -> int:
+        """Recipients sent since the last tick by campaigns the scheduler does not manage"""
+        sync_campaigns(self.api, self._campaigns, force=True)
+        counts = {c['id']: c.get('sent_count') or 0 for c in self._campaigns.values() if c['id'] not in managed}
+        # A campaign seen for the first time (or just released by the scheduler) only sets its baseline
+        sent = sum(max(0, count - self._outside[campaign_id])
+                   for campaign_id, count in counts.items() if campaign_id in self._outside)
+        self._outside = counts
+        return sent
+
+    def tick(self) -> Dict[str, Any]:
+        """Observe, charge the budget, and start/pause/resume to fit it; returns what happened"""
+        now = self.clock()
+        state = self.store.state()
+        last_tick = state.get('last_tick')
+        elapsed = max(0.0, now - last_tick) if last_tick is not None else 0.0
+        per_second = self.budget_per_minute / 60
+
+        entries = self.store.entries(ACTIVE_STATES)
+        watched = [e for e in entries if e['state'] != 'queued' or e['start_at'] <= now]
+        results = run_concurrently(lambda e: self.api.get_campaign(e['campaign_id']), watched,
+                                   max_workers=SCHEDULER_MAX_WORKERS)
+        sent = 0
+        for entry, campaign, error in results:
+            if error is not None:
+                entry['error'] = f"{type(error).__name__}: {str(error)}"
+                continue
+            if campaign.get('success') is False or not campaign.get('id'):
+                if campaign.get('status_code') == 404:
+                    entry.update(state='failed', error='Campaign not found')
+                else:
+                    entry['error'] = campaign.get('error', 'Failed to load campaign')
+                continue
+            entry['error'] = None
+            sent += self._observe(entry, campaign, now)
+
+        outside_sent, outside_error = 0, None
+        try:
+            outside_sent = self._outside_sent({e['campaign_id'] for e in watched})
+        except Exception as e:
+            outside_error = f"Failed to list campaigns: {str(e)}"
+        sent += outside_sent
+
+        credits = min(per_second * SCHEDULER_BURST_SECONDS, state.get('credits', 0.0) + per_second * elapsed) - sent
+
+        # Admit due campaigns in queue order while their expected sending fits the next tick's budget
+        spendable = credits + per_second * self.tick_seconds
+        planned = 0.0
+        admitted = 0
+        actions = []
+        for entry in watched:
+            if entry['state'] not in ACTIVE_STATES:
+                continue
+            remaining = max(0, (entry['total_recipients'] or 0) - (entry['sent_count'] or 0))
+            rate = entry['rate'] if entry['rate'] else SCHEDULER_DEFAULT_RATE / 60
+            expected = min(rate * self.tick_seconds, remaining) if entry['total_recipients'] else rate * self.tick_seconds
+            admit = planned + expected <= spendable or (not admitted and credits >= 0)
+            if admit:
+                planned += expected
+                admitted += 1
+            action = None
+            if admit and entry['state'] == 'queued':
+                action, new_state = 'start', 'running'
+            elif admit and entry['state'] == 'throttled':
+                action, new_state = 'resume', 'running'
+            elif not admit and entry['state'] == 'running':
+                action, new_state = 'pause', 'throttled'
+            if action is None:
+                continue
+
+            try:
+                response = self._call(action, entry['campaign_id'])
+            except Exception as e:
+                response = {'success': False, 'error': f"{type(e).__name__}: {str(e)}"}
+            if response.get('success'):
+                entry.update(state=new_state, error=None)
+            elif response.get('status_code') in (400, 404):
+                # The backend refused for good, e.g. the campaign is a draft or was deleted
+                entry.update(state='failed', error=response.get('error', f"Failed to {action}"))
+            else:
+                entry['error'] = response.get('error', f"Failed to {action}")  # Retried next tick
+            actions.append({'campaign_id': entry['campaign_id'], 'action': action,
+                            'success': bool(response.get('success')), 'message': entry['error'] or ''})
+
+        for entry in watched:
+            entry['updated_at'] = now
+        self.store.save(watched, {'credits': credits, 'last_tick': now})
+        return {
+            'at': now,
+            'sent': sent,
+            'outside_sent': outside_sent,
+            'outside_error': outside_error,
+            'rate_per_minute': sent * 60 / elapsed if elapsed else 0.0,
+            'credits': credits,
+            'running': [e['campaign_id'] for e in watched if e['state'] == 'running'],
+            'throttled': [e['campaign_id'] for e in watched if e['state'] == 'throttled'],
+            'queued': sum(1 for e in entries if e['state'] == 'queued'),
+            'actions': actions,
+        }
+
+    def _loop(self, on_tick: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            report = self.tick()
+            if on_tick is not None:
+                on_tick(report)
+            self._stop.wait(max(0.0, self.tick_seconds - (time.monotonic() - started)))
+
+    def run(self, on_tick: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """Tick until stop() is called, in the calling thread"""
+        self._stop.clear()
+        self._loop(on_tick)
+
+    def start(self, on_tick: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """Tick in a background thread"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(on_tick,), name="start-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop after the current tick"""
+        self._stop.set()
@@ -0,0 +1,263 @@
+"""Per-session memory accounting for st.session_state, with caps that spill or evict.
+
+Every rerun measures its session's state per key and records the result in a
+process-wide registry (shown on the Diagnostics page). Large values of keys in
+SESSION_SPILL_KEYS are written to disk and replaced by a SpilledEntry, so
+pages read those keys through get()/open_bytes()/entry_size() instead of
+st.session_state directly. When a session is over SESSION_MEMORY_CAP_MB, or
+the process is over SESSION_PROCESS_CAP_MB, spillable keys are spilled and
+SESSION_EVICTABLE_KEYS are dropped, largest first.
+"""
+import io
+import os
+import pickle
+import sys
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, BinaryIO, Dict, List, Optional
+import streamlit as st
+from config import (SESSION_MEMORY_CAP_MB, SESSION_PROCESS_CAP_MB, SESSION_SPILL_THRESHOLD_MB,
+                    SESSION_SPILL_DIR, SESSION_SPILL_KEYS, SESSION_EVICTABLE_KEYS, SESSION_TIMEOUT)
+
+MB = 2 ** 20
+_SAMPLE_ITEMS = 64  # Container items measured before the rest is extrapolated
+_PRUNE_INTERVAL = 10  # Seconds between checks for disconnected sessions during reruns
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpilledEntry:
+    """A session-state value moved to disk; the file is deleted when the entry is dropped"""
+
+    def __init__(self, value: Any):
+        os.makedirs(SESSION_SPILL_DIR, exist_ok=True)
+        self.path = os.path.join(SESSION_SPILL_DIR, f"{uuid.uuid4().hex}.spill")
+        self.is_bytes = isinstance(value, (bytes, bytearray))
+        with open(self.path, 'wb') as f:
+            if self.is_bytes:
+                f.write(value)
+            else:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.size = os.path.getsize(self.path)
+        self._finalizer = weakref.finalize(self, _remove, self.path)
+
+    def load(self) -> Any:
+        with open(self.path, 'rb') as f:
+            return f.read() if self.is_bytes else pickle.load(f)
+
+    def open(self) -> BinaryIO:
+        # FileIO, unlike a buffered file, lets callers set .name/.type as they do on BytesIO
+        return io.FileIO(self.path, 'rb')
+
+    def discard(self) -> None:
+        self._finalizer()
+
+
+class SessionUsage:
+    """Last measured state size of one session"""
+
+    def __init__(self, session_id: str, user: str, sizes: Dict[str, int], spilled: Dict[str, int],
+                 uploads: int):
+        self.session_id = session_id
+        self.user = user
+        self.sizes = sizes  # key -> bytes held in memory
+        self.spilled = spilled  # key -> bytes on disk
+        self.uploads = uploads  # Bytes of files Streamlit holds for this session's uploaders
+        self.updated = time.time()
+        self.evicted: List[str] = []
+
+    @property
+    def total(self) -> int:
+        return sum(self.sizes.values())
+
+
+_lock = threading.Lock()
+_usage: Dict[str, SessionUsage] = {}
+_pruned_at = 0.0
+
+
+def deep_size(value: Any, _seen: Optional[set] = None) -> int:
+    """Approximate bytes retained by value; large containers are sampled and extrapolated"""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    if isinstance(value, SpilledEntry):
+        return sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return sys.getsizeof(value)
+    if isinstance(value, io.BytesIO):
+        return sys.getsizeof(value) + value.getbuffer().nbytes
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):  # pandas DataFrame
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, 'nbytes') and hasattr(value, 'dtype'):  # numpy array or pandas Series
+        return int(value.nbytes)
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(value.items())
+        measure = lambda item: deep_size(item[0], _seen) + deep_size(item[1], _seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        measure = lambda item: deep_size(item, _seen)
+    else:
+        attributes = getattr(value, '__dict__', None)
+        return size + (deep_size(attributes, _seen) if attributes is not None else 0)
+
+    if len(items) <= _SAMPLE_ITEMS:
+        return size + sum(measure(item) for item in items)
+    step = len(items) / _SAMPLE_ITEMS
+    sample = [items[int(i * step)] for i in range(_SAMPLE_ITEMS)]
+    return size + int(sum(measure(item) for item in sample) * len(items) / _SAMPLE_ITEMS)
+
+
+def put(key: str, value: Any) -> None:
+    """Store value in session state, spilling it to disk right away if it is large"""
+    discard(key)
+    if key in SESSION_SPILL_KEYS and value is not None and deep_size(value) > SESSION_SPILL_THRESHOLD_MB * MB:
+        value = SpilledEntry(value)
+    st.session_state[key] = value
+
+
+def get(key: str, default: Any = None) -> Any:
+    """Read a value stored with put(), loading it back if it was spilled"""
+    value = st.session_state.get(key, default)
+    return value.load() if isinstance(value, SpilledEntry) else value
+
+
+def open_bytes(key: str) -> Optional[BinaryIO]:
+    """A readable binary file for a bytes value, without loading a spilled one into memory"""
+    value = st.session_state.get(key)
+    if isinstance(value, SpilledEntry):
+        return value.open()
+    return io.BytesIO(value) if value is not None else None
+
+
+def entry_size(key: str) -> int:
+    value = st.session_state.get(key)
+    if isinstance(value, SpilledEntry):
+        return value.size
+    return len(value) if isinstance(value, (bytes, bytearray)) else deep_size(value)
+
+
+def discard(key: str) -> None:
+    """Drop a key and any spill file behind it"""
+    value = st.session_state.get(key)
+    if isinstance(value, SpilledEntry):
+        value.discard()
+    if key in st.session_state:
+        del st.session_state[key]
+
+
+def _uploads_size(ctx) -> int:
+    """Bytes of uploaded files Streamlit keeps in memory for the session"""
+    storage = getattr(ctx.uploaded_file_mgr, 'file_storage', None)
+    if storage is None:
+        return 0
+    return sum(len(record.data) for record in list(storage.get(ctx.session_id, {}).values()))
+
+
+def _prune(now: float) -> None:
+    """Forget sessions that disconnected or went idle"""
+    global _pruned_at
+    from streamlit.runtime import Runtime
+    runtime = Runtime.instance() if Runtime.exists() else None
+    with _lock:
+        _pruned_at = now
+        for session_id, usage in list(_usage.items()):
+            gone = runtime is not None and not runtime.is_active_session(session_id)
+            if gone or now - usage.updated > SESSION_TIMEOUT:
+                del _usage[session_id]
+
+
+def process_totals() -> Dict[str, Any]:
+    """Sums over every session measured recently"""
+    _prune(time.time())
+    with _lock:
+        sessions = list(_usage.values())
+    return {
+        'sessions': len(sessions),
+        'state_bytes': sum(u.total for u in sessions),
+        'spilled_bytes': sum(sum(u.spilled.values()) for u in sessions),
+        'upload_bytes': sum(u.uploads for u in sessions),
+        'rss_bytes': process_rss(),
+    }
+
+
+def sessions() -> List[SessionUsage]:
+    with _lock:
+        return sorted(_usage.values(), key=lambda u: u.total + u.uploads, reverse=True)
+
+
+def process_rss() -> Optional[int]:
+    """Resident set size of this process (Linux); None where /proc is unavailable"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def account_session(ctx) -> Optional[SessionUsage]:
+    """Measure this session's state, enforce the caps and record the result"""
+    sizes: Dict[str, int] = {}
+    spilled: Dict[str, int] = {}
+    for key in list(st.session_state.keys()):
+        value = st.session_state[key]
+        sizes[key] = deep_size(value)
+        if isinstance(value, SpilledEntry):
+            spilled[key] = value.size
+
+    def spill(key: str) -> None:
+        entry = SpilledEntry(st.session_state[key])
+        st.session_state[key] = entry
+        sizes[key], spilled[key] = deep_size(entry), entry.size
+
+    spillable = [key for key in SESSION_SPILL_KEYS
+                 if key in sizes and st.session_state[key] is not None and key not in spilled]
+    for key in spillable:
+        if sizes[key] > SESSION_SPILL_THRESHOLD_MB * MB:  # Stored without put(), e.g. by older code
+            spill(key)
+
+    # Disconnected sessions would otherwise count against the process cap until Diagnostics is opened
+    now = time.time()
+    if now - _pruned_at >= _PRUNE_INTERVAL:
+        _prune(now)
+    with _lock:
+        others = sum(u.total for s, u in _usage.items() if s != ctx.session_id)
+
+    def over_cap() -> bool:
+        total = sum(sizes.values())
+        return total > SESSION_MEMORY_CAP_MB * MB or others + total > SESSION_PROCESS_CAP_MB * MB
+
+    evicted = []
+    if over_cap():
+        # Largest first, until the session and the process fit (or nothing else may go)
+        for key in sorted(sizes, key=sizes.get, reverse=True):
+            if not over_cap():
+                break
+            if key in spillable and key not in spilled:
+                spill(key)
+            elif key in SESSION_EVICTABLE_KEYS:
+                del st.session_state[key]
+                del sizes[key]
+                evicted.append(key)
+
+    user = (st.session_state.get('user') or {}).get('username', 'anonymous')
+    usage = SessionUsage(ctx.session_id, user, sizes, spilled, _uploads_size(ctx))
+    usage.evicted = evicted
+    with _lock:
+        _usage[ctx.session_id] = usage
+    return usage
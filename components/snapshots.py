@@ -0,0 +1,315 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, Optional, Tuple
+import pandas as pd
+from components.api_client import APIClient
+from components.auth import user_key_for
+from components.campaign_index import get_campaign_index, refresh_campaign_index
+from config import (SNAPSHOT_DB_PATH, SNAPSHOT_INTERVAL, SNAPSHOT_RAW_RETENTION_DAYS,
+                    SNAPSHOT_HOURLY_RETENTION_DAYS, SNAPSHOT_DAILY_RETENTION_DAYS)
+
+HOUR = 3600
+DAY = 86400
+
+# Counters copied from each campaign into its snapshots
+CAMPAIGN_COUNTERS = ['sent_count', 'delivered_count', 'read_count', 'failed_count']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats_snapshots (
+    user_key TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    total_campaigns INTEGER NOT NULL,
+    active_campaigns INTEGER NOT NULL,
+    messages_sent INTEGER NOT NULL,
+    messages_delivered INTEGER NOT NULL,
+    success_rate REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stats_snapshots_user_ts ON stats_snapshots (user_key, ts);
+
+CREATE TABLE IF NOT EXISTS stats_rollups (
+    user_key TEXT NOT NULL,
+    bucket TEXT NOT NULL,            -- 'hour' or 'day'
+    bucket_start INTEGER NOT NULL,   -- Epoch seconds, UTC
+    samples INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    messages_sent INTEGER NOT NULL,  -- Cumulative counters as of last_ts
+    messages_delivered INTEGER NOT NULL,
+    success_rate_sum REAL NOT NULL,
+    active_campaigns_sum INTEGER NOT NULL,
+    active_campaigns_max INTEGER NOT NULL,
+    PRIMARY KEY (user_key, bucket, bucket_start)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS campaign_snapshots (
+    user_key TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    campaign_id INTEGER NOT NULL,
+    status TEXT,
+    sent_count INTEGER NOT NULL,
+    delivered_count INTEGER NOT NULL,
+    read_count INTEGER NOT NULL,
+    failed_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS campaign_snapshots_campaign_ts ON campaign_snapshots (user_key, campaign_id, ts);
+CREATE INDEX IF NOT EXISTS campaign_snapshots_ts ON campaign_snapshots (user_key, ts);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO stats_rollups (user_key, bucket, bucket_start, samples, last_ts, messages_sent,
+                           messages_delivered, success_rate_sum, active_campaigns_sum, active_campaigns_max)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_key, bucket, bucket_start) DO UPDATE SET
+    samples = samples + 1,
+    last_ts = MAX(last_ts, excluded.last_ts),
+    messages_sent = CASE WHEN excluded.last_ts >= last_ts THEN excluded.messages_sent ELSE messages_sent END,
+    messages_delivered = CASE WHEN excluded.last_ts >= last_ts THEN excluded.messages_delivered ELSE messages_delivered END,
+    success_rate_sum = success_rate_sum + excluded.success_rate_sum,
+    active_campaigns_sum = active_campaigns_sum + excluded.active_campaigns_sum,
+    active_campaigns_max = MAX(active_campaigns_max, excluded.active_campaigns_max)
+"""
+
+# Per-bucket activity derived from the cumulative counters of consecutive buckets
+TREND_QUERY = """
+SELECT bucket_start,
+       messages_sent - LAG(messages_sent) OVER w AS sent,
+       messages_delivered - LAG(messages_delivered) OVER w AS delivered,
+       success_rate_sum / samples AS overall_success_rate,
+       active_campaigns_max AS active_campaigns
+FROM stats_rollups
+WHERE user_key = ? AND bucket = ? AND bucket_start >= ?
+WINDOW w AS (ORDER BY bucket_start)
+ORDER BY bucket_start
+"""
+
+
+class SnapshotStore:
+    """Time series of /stats/ and campaign counters in an embedded SQLite database (WAL mode)"""
+
+    def __init__(self, path: str = SNAPSHOT_DB_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL lets the Dashboard read while the recorder writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Last recorded counters per user and campaign, so unchanged campaigns are skipped
+        self._latest: Dict[str, Dict[int, Tuple]] = {}
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def record_stats(self, user_key: str, stats: Dict[str, Any], ts: Optional[int] = None) -> None:
+        """Store one /stats/ snapshot and fold it into the hourly and daily rollups"""
+        ts = int(ts if ts is not None else time.time())
+        row = (
+            int(stats.get('total_campaigns', 0)),
+            int(stats.get('active_campaigns', 0)),
+            int(stats.get('total_messages_sent', 0)),
+            int(stats.get('total_messages_delivered', 0)),
+            float(stats.get('overall_success_rate', 0.0)),
+        )
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("INSERT INTO stats_snapshots VALUES (?, ?, ?, ?, ?, ?, ?)", (user_key, ts) + row)
+            for bucket, width in (('hour', HOUR), ('day', DAY)):
+                self.conn.execute(ROLLUP_UPSERT, (user_key, bucket, ts - ts % width, ts,
+                                                  row[2], row[3], row[4], row[1], row[1]))
+
+    def _latest_counters(self, user_key: str) -> Dict[int, Tuple]:
+        if user_key not in self._latest:
+            # SQLite returns the bare columns of the row holding MAX(ts)
+            self._latest[user_key] = {
+                row[0]: row[2:]
+                for row in self.conn.execute(
+                    """SELECT campaign_id, MAX(ts), status, sent_count, delivered_count, read_count, failed_count
+                       FROM campaign_snapshots WHERE user_key = ? GROUP BY campaign_id""",
+                    (user_key,))
+            }
+        return self._latest[user_key]
+
+    def record_campaigns(self, user_key: str, campaigns: Iterable[Dict[str, Any]],
+                         ts: Optional[int] = None) -> int:
+        """Store counters of campaigns that changed since their last snapshot; returns rows written"""
+        ts = int(ts if ts is not None else time.time())
+        with self.lock, self.conn:
+            latest = self._latest_counters(user_key)
+            rows = []
+            for campaign in campaigns:
+                values = (campaign.get('status'),) + tuple(int(campaign.get(c) or 0) for c in CAMPAIGN_COUNTERS)
+                if latest.get(campaign['id']) != values:
+                    rows.append((user_key, ts, campaign['id']) + values)
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT INTO campaign_snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            latest.update((row[2], row[3:]) for row in rows)
+        return len(rows)
+
+    def downsample(self, now: Optional[int] = None) -> Dict[str, int]:
+        """Thin out old data; returns the number of rows removed per table.
+
+        Raw snapshots older than the raw retention are reduced to the last one
+        per hour, and dropped once only the rollups are needed. Hourly rollups
+        expire before daily ones.
+        """
+        now = int(now if now is not None else time.time())
+        raw_cutoff = now - SNAPSHOT_RAW_RETENTION_DAYS * DAY
+        hourly_cutoff = now - SNAPSHOT_HOURLY_RETENTION_DAYS * DAY
+        daily_cutoff = now - SNAPSHOT_DAILY_RETENTION_DAYS * DAY
+        removed = {}
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN")
+            removed['stats_snapshots'] = self.conn.execute(
+                """DELETE FROM stats_snapshots
+                   WHERE ts < ? AND (ts < ? OR rowid NOT IN (
+                       SELECT MAX(rowid) FROM stats_snapshots WHERE ts < ?
+                       GROUP BY user_key, ts / 3600))""",
+                (raw_cutoff, hourly_cutoff, raw_cutoff)).rowcount
+            removed['campaign_snapshots'] = self.conn.execute(
+                """DELETE FROM campaign_snapshots
+                   WHERE ts < ? AND rowid NOT IN (
+                       SELECT MAX(rowid) FROM campaign_snapshots WHERE ts < ?
+                       GROUP BY user_key, campaign_id, ts / (CASE WHEN ts < ? THEN 86400 ELSE 3600 END))""",
+                (raw_cutoff, raw_cutoff, hourly_cutoff)).rowcount
+            removed['stats_rollups'] = self.conn.execute(
+                """DELETE FROM stats_rollups
+                   WHERE (bucket = 'hour' AND bucket_start < ?) OR (bucket = 'day' AND bucket_start < ?)""",
+                (hourly_cutoff, daily_cutoff)).rowcount
+        return removed
+
+    def trend(self, user_key: str, bucket: str = 'day', days: int = 30,
+              now: Optional[int] = None) -> pd.DataFrame:
+        """Messages sent/delivered and success rate per hour or day.
+
+        The first bucket has no predecessor, so its activity is unknown (NaN).
+        success_rate is delivered/sent within the bucket; overall_success_rate
+        is the backend's cumulative rate averaged over the bucket.
+        """
+        now = int(now if now is not None else time.time())
+        width = DAY if bucket == 'day' else HOUR
+        # Start one bucket early so the first requested bucket gets a delta
+        since = now - now % width - days * DAY - width
+        with self.lock:
+            df = pd.read_sql_query(TREND_QUERY, self.conn, params=(user_key, bucket, since))
+        df['period'] = pd.to_datetime(df['bucket_start'], unit='s')
+        sent = df['sent'].where(df['sent'] > 0)
+        df['success_rate'] = (df['delivered'] / sent * 100).clip(upper=100)
+        return df[df['bucket_start'] >= since + width].reset_index(drop=True)
+
+    def campaign_history(self, user_key: str, campaign_id: int) -> pd.DataFrame:
+        """Recorded counters of one campaign, oldest first"""
+        with self.lock:
+            df = pd.read_sql_query(
+                """SELECT ts, status, sent_count, delivered_count, read_count, failed_count
+                   FROM campaign_snapshots WHERE user_key = ? AND campaign_id = ? ORDER BY ts""",
+                self.conn, params=(user_key, campaign_id))
+        df['time'] = pd.to_datetime(df['ts'], unit='s')
+        return df
+
+    def last_snapshot(self, user_key: str) -> Optional[int]:
+        """Time of the latest /stats/ snapshot, if any"""
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(ts) FROM stats_snapshots WHERE user_key = ?",
+                                    (user_key,)).fetchone()
+        return row[0]
+
+
+_store: Optional[SnapshotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """Process-wide snapshot store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
+
+
+class SnapshotRecorder:
+    """Records a user's /stats/ and campaign counters every SNAPSHOT_INTERVAL seconds"""
+
+    def __init__(self, token: Optional[str], user_key: str, store: Optional[SnapshotStore] = None):
+        self.token = token
+        self.user_key = user_key
+        self.store = store or get_snapshot_store()
+        self.last_error: Optional[str] = None
+        self.last_downsample = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def record(self) -> Tuple[bool, int]:
+        """Take one snapshot; returns (stats recorded, campaign rows written)"""
+        api = APIClient(token=self.token)
+        try:
+            response = api.get_stats()
+            if not response.get('success'):
+                raise RuntimeError(response.get('error', 'Failed to load statistics'))
+            now = int(time.time())
+            self.store.record_stats(self.user_key, response.get('statistics', {}), ts=now)
+            # The campaign index is kept current by delta syncs, so this is cheap
+            index = get_campaign_index(self.token)
+            refresh_campaign_index(api, index)
+            written = self.store.record_campaigns(self.user_key, index.records(), ts=now)
+            if now - self.last_downsample >= HOUR:
+                self.store.downsample(now)
+                self.last_downsample = now
+        except Exception as e:
+            self.last_error = f"Snapshot failed: {str(e)}"
+            return False, 0
+        self.last_error = None
+        return True, written
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            last = self.store.last_snapshot(self.user_key) or 0
+            wait = last + SNAPSHOT_INTERVAL - time.time()
+            if wait <= 0:
+                self.record()
+                wait = SNAPSHOT_INTERVAL
+            self._stop.wait(wait)
+
+    def start(self) -> None:
+        """Start recording in a background thread"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="snapshot-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+
+
+_recorders: Dict[str, SnapshotRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def get_snapshot_recorder(token: Optional[str], user_key: str) -> SnapshotRecorder:
+    """Recorder shared by all sessions of the same user"""
+    with _recorders_lock:
+        recorder = _recorders.get(user_key)
+        if recorder is None:
+            recorder = _recorders[user_key] = SnapshotRecorder(token, user_key)
+        elif recorder.token != token:
+            # A new login replaces the token the recorder fetches with
+            recorder.token = token
+        return recorder
+
+
+def stop_snapshot_recorder(user_key: str) -> None:
+    """Stop and forget a user's recorder (e.g. on logout)"""
+    with _recorders_lock:
+        recorder = _recorders.pop(user_key, None)
+    if recorder is not None:
+        recorder.stop()
@@ -0,0 +1,342 @@
+"""Global suppression list of phone numbers that recipient uploads are screened against.
+
+Numbers come from imported opt-out files and from previous failures (opt-outs
+and invalid numbers after one failure, any other cause after
+SUPPRESSION_MIN_FAILURES campaigns). They are kept as E.164 digits in int64:
+a sorted array on disk (numbers.npy, memory-mapped) plus a Bloom filter of
+SUPPRESSION_BLOOM_BITS bits per number that is held in memory. Screening
+normalizes a whole phone column at once, drops most rows with a few vectorized
+Bloom probes, and confirms the rest by binary search in the mapped array, so
+only the filter (about 1.25 bytes per number) and the pages that are actually
+hit are resident. Writes replace the files atomically; readers in other
+processes pick up the new version on their next lookup.
+"""
+import csv
+import io
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+from components.concurrency import run_concurrently
+from components.failures import categorize, normalize_errors
+from config import (SUPPRESSION_DIR, SUPPRESSION_BLOOM_BITS, SUPPRESSION_FAILURE_CATEGORIES,
+                    SUPPRESSION_MIN_FAILURES, SUPPRESSION_PHONE_COLUMN, SUPPRESSION_SAMPLE_SIZE)
+
+INVALID = -1  # Normalized value of anything that is not a 1-15 digit number
+MAX_DIGITS = 15  # E.164 limit; keeps every number exact in int64 (and float64)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_LOW32 = np.uint64(0xFFFFFFFF)
+
+
+def normalize_phones(values: Iterable[Any]) -> np.ndarray:
+    """Digits of each phone number as int64, or INVALID.
+
+    '+', spaces, dashes and brackets are ignored, so '+91 98765-43210' and
+    '919876543210' are the same number. Already clean values (optionally with
+    a leading '+') are parsed directly; only the rest goes through a regex.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if isinstance(values, pd.Series) and pd.api.types.is_numeric_dtype(values.dtype):
+        # Numeric columns (e.g. Excel cells without '+'): float64 is exact for 15 digits
+        floats = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        whole = np.isfinite(floats) & (floats > 0) & (floats < 10 ** MAX_DIGITS) & (floats == np.floor(floats))
+        return np.where(whole, floats, INVALID).astype(np.int64)
+
+    try:
+        array = pa.array(values, from_pandas=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # Mixed text and numbers in one column
+        values = pd.Series(values, dtype=object)
+        array = pa.array(values.astype(str).where(values.notna(), None), from_pandas=True)
+    if not pa.types.is_string(array.type):
+        array = pc.cast(array, pa.string())
+    digits = pc.utf8_ltrim(array, '+')
+    clean = pc.fill_null(pc.ascii_is_decimal(digits), False).to_numpy(zero_copy_only=False)
+
+    numbers = np.full(len(array), INVALID, dtype=np.int64)
+    numbers[clean] = _parse_digits(pc.filter(digits, pa.array(clean)))
+    rest = np.flatnonzero(~clean)
+    if len(rest):
+        stripped = pc.replace_substring_regex(pc.take(digits, pa.array(rest)), r'\D+', '')
+        numbers[rest] = _parse_digits(stripped)
+    return numbers
+
+
+def _parse_digits(digits: pa.Array) -> np.ndarray:
+    length = pc.binary_length(digits)
+    valid = pc.fill_null(pc.and_(pc.greater(length, 0), pc.less_equal(length, MAX_DIGITS)), False)
+    return pc.cast(pc.if_else(valid, digits, str(INVALID)), pa.int64()).to_numpy(zero_copy_only=False)
+
+
+def _hashes(numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Two independent 32-bit hashes per number (splitmix64 finalizer)"""
+    z = numbers.astype(np.uint64) + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    z ^= z >> np.uint64(31)
+    return z & _LOW32, (z >> np.uint64(32)) | np.uint64(1)
+
+
+def _probe(h1: np.ndarray, h2: np.ndarray, i: int, bits: int) -> np.ndarray:
+    # Double hashing, mapped onto [0, bits) by multiply-shift instead of a modulo
+    return (((h1 + np.uint64(i) * h2) & _LOW32) * np.uint64(bits)) >> np.uint64(32)
+
+
+class BloomFilter:
+    """Bit array with k probes per number; false positives only, never false negatives"""
+
+    def __init__(self, bits: int, hashes: int, array: Optional[np.ndarray] = None):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = array if array is not None else np.zeros((bits + 7) // 8, dtype=np.uint8)
+
+    @classmethod
+    def build(cls, numbers: np.ndarray, bits_per_number: int = SUPPRESSION_BLOOM_BITS) -> 'BloomFilter':
+        # k = ln 2 * bits per number minimizes the false positive rate (about 1% at 10 bits)
+        bloom = cls(max(64, len(numbers) * bits_per_number), max(1, round(bits_per_number * 0.693)))
+        h1, h2 = _hashes(numbers)
+        for i in range(bloom.hashes):
+            index = _probe(h1, h2, i, bloom.bits)
+            np.bitwise_or.at(bloom.array, index >> np.uint64(3),
+                             np.left_shift(1, (index & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+        return bloom
+
+    def might_contain(self, numbers: np.ndarray) -> np.ndarray:
+        """Mask of numbers that may be in the set"""
+        maybe = np.ones(len(numbers), dtype=bool)
+        candidates = np.arange(len(numbers))
+        h1, h2 = _hashes(numbers)
+        for i in range(self.hashes):
+            # Only numbers that passed every earlier probe are probed again
+            index = _probe(h1, h2, i, self.bits)
+            hit = (self.array[index >> np.uint64(3)] >> (index & np.uint64(7)).astype(np.uint8)) & 1
+            keep = hit.astype(bool)
+            maybe[candidates[~keep]] = False
+            candidates, h1, h2 = candidates[keep], h1[keep], h2[keep]
+            if not len(candidates):
+                break
+        return maybe
+
+
+class SuppressionList:
+    """On-disk sorted set of suppressed numbers with an in-memory Bloom prefilter"""
+
+    def __init__(self, directory: str = SUPPRESSION_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()  # One writer at a time; lookups are never blocked by a write
+        self._version = None
+        self._numbers = np.empty(0, dtype=np.int64)
+        self._bloom = BloomFilter.build(self._numbers)
+        self._manifest: Dict[str, Any] = {'count': 0, 'sources': {}, 'updated_at': None}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> Tuple[np.ndarray, BloomFilter]:
+        """Current numbers and filter, reloaded when another writer replaced them"""
+        try:
+            version = os.stat(self._path('manifest.json')).st_mtime_ns
+        except FileNotFoundError:
+            version = None
+        with self.lock:
+            if version is not None and version != self._version:
+                with open(self._path('manifest.json')) as f:
+                    manifest = json.load(f)
+                self._numbers = np.load(self._path('numbers.npy'), mmap_mode='r')
+                self._bloom = BloomFilter(manifest['bloom_bits'], manifest['bloom_hashes'],
+                                          np.load(self._path('bloom.npy')))
+                self._manifest = manifest
+                self._version = version
+            return self._numbers, self._bloom
+
+    def __len__(self) -> int:
+        return len(self._load()[0])
+
+    def stats(self) -> Dict[str, Any]:
+        self._load()
+        return dict(self._manifest)
+
+    def contains(self, numbers: np.ndarray) -> np.ndarray:
+        """Mask of normalized numbers that are suppressed"""
+        suppressed, bloom = self._load()
+        numbers = np.asarray(numbers, dtype=np.int64)
+        found = np.zeros(len(numbers), dtype=bool)
+        if not len(suppressed) or not len(numbers):
+            return found
+        candidates = np.flatnonzero(bloom.might_contain(numbers) & (numbers != INVALID))
+        if len(candidates):
+            values = numbers[candidates]
+            position = np.minimum(np.searchsorted(suppressed, values), len(suppressed) - 1)
+            found[candidates] = suppressed[position] == values
+        return found
+
+    def add(self, numbers: np.ndarray, source: str) -> int:
+        """Suppress numbers; returns how many were not suppressed already"""
+        numbers = np.unique(np.asarray(numbers, dtype=np.int64))
+        numbers = numbers[numbers != INVALID]
+        with self.write_lock:
+            # Merged into whatever was written last, possibly by another process
+            current = np.asarray(self._load()[0])
+            merged = np.union1d(current, numbers)
+            added = len(merged) - len(current)
+            if added:
+                sources = dict(self._manifest.get('sources', {}))
+                sources[source] = sources.get(source, 0) + added
+                self._write(merged, sources)
+        return added
+
+    def remove(self, numbers: np.ndarray) -> int:
+        """Stop suppressing numbers; returns how many were suppressed"""
+        with self.write_lock:
+            current = np.asarray(self._load()[0])
+            kept = np.setdiff1d(current, np.asarray(numbers, dtype=np.int64), assume_unique=False)
+            removed = len(current) - len(kept)
+            if removed:
+                self._write(kept, dict(self._manifest.get('sources', {})))
+        return removed
+
+    def _write(self, numbers: np.ndarray, sources: Dict[str, int]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        bloom = BloomFilter.build(numbers)
+        manifest = {'count': int(len(numbers)), 'sources': sources, 'updated_at': time.time(),
+                    'bloom_bits': bloom.bits, 'bloom_hashes': bloom.hashes}
+        # The manifest goes last: readers reload when it changes, by which time both arrays are in place
+        for name, array in (('numbers.npy', numbers), ('bloom.npy', bloom.array)):
+            with open(self._path(name + '.tmp'), 'wb') as f:
+                np.save(f, array)
+            os.replace(self._path(name + '.tmp'), self._path(name))
+        with open(self._path('manifest.json.tmp'), 'w') as f:
+            json.dump(manifest, f)
+        os.replace(self._path('manifest.json.tmp'), self._path('manifest.json'))
+        with self.lock:
+            self._numbers = np.load(self._path('numbers.npy'), mmap_mode='r')
+            self._bloom = bloom
+            self._manifest = manifest
+            self._version = os.stat(self._path('manifest.json')).st_mtime_ns
+
+
+_suppression: Optional[SuppressionList] = None
+_suppression_lock = threading.Lock()
+
+
+def get_suppression_list() -> SuppressionList:
+    """Process-wide suppression list"""
+    global _suppression
+    with _suppression_lock:
+        if _suppression is None:
+            _suppression = SuppressionList()
+        return _suppression
+
+
+def read_recipients(content: bytes, file_name: str) -> pa.Table:
+    """Recipient file with every cell as text, so a rewritten file keeps its values as uploaded"""
+    if file_name.lower().endswith('.csv'):
+        first_line, newline, _ = content.partition(b'\n')
+        if not newline:
+            content += b'\n'  # Arrow cannot read a header-only file without its line end
+        header = next(csv.reader(io.StringIO(first_line.decode('utf-8-sig'))), [])
+        return pa_csv.read_csv(io.BytesIO(content), convert_options=pa_csv.ConvertOptions(
+            column_types={column: pa.string() for column in header}))
+    frame = pd.read_excel(io.BytesIO(content), dtype=str, keep_default_na=False)
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def read_phone_file(source, file_name: str, column: str = SUPPRESSION_PHONE_COLUMN) -> np.ndarray:
+    """Normalized numbers from an opt-out file: a CSV/Excel with a phone column, or one number per line"""
+    if file_name.lower().endswith(('.xlsx', '.xls')):
+        frame = pd.read_excel(source, dtype=str)
+    else:
+        frame = pd.read_csv(source, dtype=str, header=None)
+        # A header row is only assumed when its first cell is not a number
+        if len(frame) and normalize_phones(frame.iloc[:1, 0])[0] == INVALID:
+            frame = frame.iloc[1:].set_axis(frame.iloc[0].astype(str).str.strip(), axis=1)
+    if column not in frame.columns:
+        column = frame.columns[0]
+    numbers = normalize_phones(frame[column])
+    return numbers[numbers != INVALID]
+
+
+def screen_upload(content: bytes, file_name: str, suppression: Optional[SuppressionList] = None,
+                  column: str = SUPPRESSION_PHONE_COLUMN) -> Dict[str, Any]:
+    """Drop suppressed recipients from an upload.
+
+    Returns the row counts, a sample of the suppressed numbers and, when any
+    row was dropped, the remaining rows as CSV bytes under a .csv file name
+    (Excel uploads are rewritten as CSV). With an empty list the upload is
+    not read at all and total is None.
+    """
+    suppression = suppression or get_suppression_list()
+    if not len(suppression):
+        return {'total': None, 'suppressed': 0, 'sample': [], 'content': None, 'file_name': file_name}
+    table = read_recipients(content, file_name)
+    result = {'total': table.num_rows, 'suppressed': 0, 'sample': [], 'content': None, 'file_name': file_name}
+    if column not in table.column_names:
+        return result
+
+    started = time.perf_counter()
+    mask = suppression.contains(normalize_phones(table[column]))
+    result['seconds'] = time.perf_counter() - started
+    result['suppressed'] = int(mask.sum())
+    if result['suppressed']:
+        result['sample'] = pc.filter(table[column], pa.array(mask)).slice(0, SUPPRESSION_SAMPLE_SIZE).to_pylist()
+        kept = io.BytesIO()
+        pa_csv.write_csv(table.filter(pa.array(~mask)), kept)
+        result['content'] = kept.getvalue()
+        result['file_name'] = os.path.splitext(file_name)[0] + '.csv'
+    return result
+
+
+def failing_numbers(api, campaign_ids: List[int], categories: Iterable[str] = SUPPRESSION_FAILURE_CATEGORIES,
+                    min_failures: int = SUPPRESSION_MIN_FAILURES, page_size: int = 1000,
+                    max_workers: int = 4) -> Dict[str, Any]:
+    """Numbers to suppress from the failed messages of campaigns.
+
+    A failure in one of `categories` suppresses the number straight away; any
+    other failure counts once per campaign, and numbers that failed in
+    `min_failures` campaigns are suppressed as well.
+    """
+    categories = set(categories)
+
+    def collect(campaign_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        permanent, failed = [], []
+        for messages in api.iter_campaign_messages(campaign_id, status='failed', page_size=page_size):
+            page = pd.DataFrame(messages)
+            if 'phone_number' not in page:
+                continue
+            numbers = normalize_phones(page['phone_number'])
+            errors = normalize_errors(page['error_message'] if 'error_message' in page
+                                      else pd.Series([None] * len(page)))
+            # Categorize each distinct message once, as the failure breakdown does
+            category = errors.map({error: categorize(error) for error in errors.unique()})
+            permanent.append(numbers[category.isin(categories).to_numpy()])
+            failed.append(numbers)
+        combine = lambda arrays: np.unique(np.concatenate(arrays)) if arrays else np.empty(0, dtype=np.int64)
+        return combine(permanent), combine(failed)
+
+    permanent, failed, errors = [], [], []
+
+    def record(campaign_id, result, error):
+        if error is not None:
+            errors.append({'campaign_id': campaign_id, 'message': f"{type(error).__name__}: {str(error)}"})
+            return
+        permanent.append(result[0])
+        failed.append(result[1])
+
+    run_concurrently(collect, campaign_ids, max_workers=max_workers, on_result=record)
+    numbers, counts = np.unique(np.concatenate(failed), return_counts=True) if failed else (np.empty(0, np.int64), [])
+    repeated = numbers[np.asarray(counts) >= min_failures]
+    permanent = np.unique(np.concatenate(permanent)) if permanent else np.empty(0, dtype=np.int64)
+    suppress = np.union1d(permanent, repeated)
+    return {'numbers': suppress[suppress != INVALID], 'permanent': int(len(permanent)),
+            'repeated': int(len(repeated)), 'campaigns': len(campaign_ids) - len(errors), 'errors': errors}
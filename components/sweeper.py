@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from components.api_client import APIClient
+from components.campaign_index import get_campaign_index, refresh_campaign_index
+from components.concurrency import RateLimiter, run_concurrently
+from config import (SWEEPER_INTERVAL, SWEEPER_MAX_WORKERS, SWEEPER_RATE_PER_SECOND,
+                    SWEEPER_HISTORY, SWEEPER_MAX_ENTRIES, SWEEPER_TTL)
+
+
+class TokenRejected(Exception):
+    """The backend answered 401: the login this sweeper runs for has expired or was revoked"""
+
+
+def is_stuck(campaign: Dict[str, Any]) -> bool:
+    """Campaign is still 'running' although every message has been sent"""
+    total = campaign.get('total_recipients', 0)
+    return (campaign.get('status') == 'running' and total > 0
+            and campaign.get('sent_count', 0) >= total)
+
+
+class StuckCampaignSweeper:
+    """Periodically finds stuck campaigns and asks the backend to re-check their status"""
+
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self.lock = threading.Lock()
+        self.outcomes = deque(maxlen=SWEEPER_HISTORY)
+        self.last_run: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_suspects = 0
+        self.last_used = time.monotonic()  # Updated by get_sweeper; an unused sweeper stops after SWEEPER_TTL
+        self._sweeping = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _check(self, api: APIClient, campaign: Dict[str, Any]) -> Dict[str, Any]:
+        response = api.check_campaign_status(campaign['id'])
+        if response.get('status_code') == 401:
+            raise TokenRejected(response.get('error', 'Unauthorized'))
+        if not response.get('success'):
+            raise RuntimeError(response.get('error', response.get('detail', 'Check failed')))
+        return response
+
+    def sweep(self) -> List[Dict[str, Any]]:
+        """Check every suspect campaign once and record the outcomes.
+
+        A sweep requested while another one is running (in the background or
+        from another session) waits for it instead of checking everything again.
+        """
+        if not self._sweeping.acquire(blocking=False):
+            with self._sweeping:
+                return []  # Its outcomes are in the history
+        try:
+            return self._sweep()
+        finally:
+            self._sweeping.release()
+
+    def _token_rejected(self, api: APIClient) -> bool:
+        try:
+            return api.get_user().get('status_code') == 401
+        except Exception:
+            return False  # Unreachable backend: the token may still be good
+
+    def _reject(self) -> None:
+        """Stop for good once the backend no longer accepts the token"""
+        self.last_error = "The backend rejected this login; sweeping stopped. Log in again to resume."
+        self.stop()
+        _forget(self)
+
+    def _sweep(self) -> List[Dict[str, Any]]:
+        api = APIClient(token=self.token)
+        # Listing campaigns with a rejected token comes back empty rather than failing, so ask first
+        if self._token_rejected(api):
+            self._reject()
+            return []
+        try:
+            index = get_campaign_index(self.token)
+            refresh_campaign_index(api, index, force=True)
+            rows = index.query(statuses=['running'])
+            suspects = [c for c in index.records(rows) if is_stuck(c)]
+        except Exception as e:
+            self.last_error = f"Failed to list campaigns: {str(e)}"
+            return []
+
+        limiter = RateLimiter(SWEEPER_RATE_PER_SECOND)
+        results = run_concurrently(lambda c: self._check(api, c), suspects,
+                                   max_workers=SWEEPER_MAX_WORKERS, rate_limiter=limiter)
+
+        if any(isinstance(error, TokenRejected) for _, _, error in results):
+            self._reject()
+            return []
+
+        checked_at = datetime.now()
+        outcomes = []
+        for campaign, response, error in results:
+            if error is not None:
+                outcome, detail = 'error', str(error)
+            elif response.get('updated'):
+                outcome, detail = 'completed', response.get('message', 'Status updated to completed')
+            else:
+                outcome = 'still running'
+                pending = response.get('pending_messages', 0)
+                detail = f"{pending} pending messages" if pending else response.get('message', 'Status checked')
+            outcomes.append({
+                'campaign_id': campaign['id'],
+                'template_name': campaign.get('template_name', ''),
+                'outcome': outcome,
+                'detail': detail,
+                'checked_at': checked_at,
+            })
+
+        with self.lock:
+            self.outcomes.extendleft(reversed(outcomes))
+            self.last_run = checked_at
+            self.last_suspects = len(suspects)
+            self.last_error = None
+        return outcomes
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            if started - self.last_used > SWEEPER_TTL:
+                # Nobody has opened it for a session's length
+                self.stop()
+                _forget(self)
+                break
+            self.sweep()
+            self._stop.wait(max(0.0, SWEEPER_INTERVAL - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        """Start sweeping in a background thread"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="stuck-campaign-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread after its current sweep"""
+        self._stop.set()
+
+    def history(self) -> List[Dict[str, Any]]:
+        """Recorded outcomes, newest first"""
+        with self.lock:
+            return list(self.outcomes)
+
+
+_sweepers: "OrderedDict[Optional[str], StuckCampaignSweeper]" = OrderedDict()  # Least recently used first
+_sweepers_lock = threading.Lock()
+
+
+def get_sweeper(token: Optional[str]) -> StuckCampaignSweeper:
+    """Sweeper shared by all sessions of the same login; bounded, since every login has its own token"""
+    now = time.monotonic()
+    with _sweepers_lock:
+        dropped = [s for s in _sweepers.values() if now - s.last_used > SWEEPER_TTL]
+        for sweeper in dropped:
+            del _sweepers[sweeper.token]
+        if token not in _sweepers:
+            _sweepers[token] = StuckCampaignSweeper(token)
+        _sweepers.move_to_end(token)
+        sweeper = _sweepers[token]
+        sweeper.last_used = now
+        while len(_sweepers) > SWEEPER_MAX_ENTRIES:
+            dropped.append(_sweepers.popitem(last=False)[1])
+    for old in dropped:
+        old.stop()
+    return sweeper
+
+
+def _forget(sweeper: StuckCampaignSweeper) -> None:
+    """Drop a sweeper from the registry unless its token already has a newer one"""
+    with _sweepers_lock:
+        if _sweepers.get(sweeper.token) is sweeper:
+            del _sweepers[sweeper.token]
+
+
+def stop_sweeper(token: Optional[str]) -> None:
+    """Stop and forget a user's sweeper (e.g. on logout)"""
+    with _sweepers_lock:
+        sweeper = _sweepers.pop(token, None)
+    if sweeper is not None:
+        sweeper.stop()
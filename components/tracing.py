@@ -0,0 +1,266 @@
+"""Lightweight per-rerun tracing, exported as OTLP/JSON lines.
+
+Each traced rerun of a page is one trace. The page calls start_rerun() at the
+top, marks its parts with section() (or wraps a block in span()), and calls
+end_rerun() at the bottom; APIClient requests become child spans of whatever
+is current. A rerun cut short by st.stop()/st.rerun() is exported when the
+session's next rerun starts, or after TRACE_IDLE_SECONDS.
+
+Sampling is decided once per rerun (TRACE_SAMPLE_RATE); an unsampled rerun
+costs one random() call and every span() is a no-op. Each exported line is an
+OTLP ExportTraceServiceRequest in JSON, the format written by the
+OpenTelemetry collector's file exporter, so the file can be replayed into any
+OTLP backend or read line by line with json.loads.
+"""
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from components.profiler import begin_profile, end_profile, is_profiling
+from components.session_memory import account_session
+from config import TRACE_SAMPLE_RATE, TRACE_EXPORT_PATH, TRACE_MAX_FILE_MB, TRACE_IDLE_SECONDS
+
+SERVICE_NAME = 'whatsapp-campaign-manager'
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+_CAMPAIGN_PATH = re.compile(r'/campaigns/(\d+)/')
+
+
+class Span:
+    """A timed operation inside a trace"""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, trace: 'Trace', name: str, parent: Optional['Span'], kind: int,
+                 attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else ''
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.touch(self.end_ns)
+
+
+class Trace:
+    """All spans of one rerun; worker threads may add spans concurrently"""
+
+    def __init__(self, session_id: str, page: str, attributes: Dict[str, Any]):
+        self.trace_id = os.urandom(16).hex()
+        self.session_id = session_id
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+        self.finished = False
+        self.last_activity_ns = 0
+        self.root = self.start_span(f"rerun {page}", None, SPAN_KIND_INTERNAL,
+                                    {'page': page, 'session.id': session_id, **attributes})
+        self.section: Optional[Span] = None
+
+    def start_span(self, name: str, parent: Optional[Span], kind: int, attributes: Dict[str, Any]) -> Span:
+        span = Span(self, name, parent, kind, attributes)
+        self.touch(span.start_ns)
+        with self.lock:
+            if not self.finished:
+                self.spans.append(span)
+        return span
+
+    def touch(self, now_ns: int) -> None:
+        self.last_activity_ns = max(self.last_activity_ns, now_ns)
+
+    def finish(self, outcome: str) -> None:
+        """Close any open spans and export; `outcome` says how the rerun ended"""
+        with self.lock:
+            if self.finished:
+                return
+            self.finished = True
+            # A rerun that stopped early ends with its last recorded activity, not when we noticed
+            end_ns = time.time_ns() if outcome == 'completed' else self.last_activity_ns
+            for span in self.spans:
+                if span.end_ns is None:
+                    span.end_ns = end_ns
+            api_spans = [s for s in self.spans if s.kind == SPAN_KIND_CLIENT]
+            self.root.set(**{'rerun.outcome': outcome, 'api.calls': len(api_spans),
+                             'api.ms': round(sum(s.end_ns - s.start_ns for s in api_spans) / 1e6, 3)})
+        _export(self)
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('trace_span', default=None)
+_open_traces: Dict[str, Trace] = {}  # Streamlit session id -> its latest unfinished trace
+_open_lock = threading.Lock()
+_export_lock = threading.Lock()
+
+
+def _script_ctx():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return get_script_run_ctx(suppress_warning=True)
+
+
+def _session_id() -> Optional[str]:
+    ctx = _script_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _finish_idle(now_ns: int) -> None:
+    """Export traces of reruns that stopped early and were never followed by another"""
+    cutoff = now_ns - TRACE_IDLE_SECONDS * 1_000_000_000
+    with _open_lock:
+        idle = [s for s, t in _open_traces.items() if t.last_activity_ns < cutoff]
+        traces = [_open_traces.pop(s) for s in idle]
+    for trace in traces:
+        trace.finish('abandoned')
+
+
+def start_rerun(page: str, **attributes) -> None:
+    """Per-rerun bookkeeping: memory accounting, profiling and (if sampled) the trace; call at the top of a page"""
+    ctx = _script_ctx()
+    if ctx is None:
+        return
+    session_id = ctx.session_id
+    account_session(ctx)
+    with _open_lock:
+        previous = _open_traces.pop(session_id, None)
+    if previous is not None:
+        previous.finish('stopped')
+    begin_profile(session_id, page)
+    if TRACE_SAMPLE_RATE > 0:
+        _finish_idle(time.time_ns())
+
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        _current_span.set(None)
+        return
+    trace = Trace(session_id, page, attributes)
+    with _open_lock:
+        _open_traces[session_id] = trace
+    _current_span.set(trace.root)
+
+
+def end_rerun() -> None:
+    """Finish and export this rerun's trace; call at the bottom of a page"""
+    if is_profiling():
+        end_profile(_session_id())
+    span = _current_span.get()
+    if span is None:
+        return
+    _current_span.set(None)
+    with _open_lock:
+        if _open_traces.get(span.trace.session_id) is span.trace:
+            del _open_traces[span.trace.session_id]
+    span.trace.finish('completed')
+
+
+def section(name: str, **attributes) -> None:
+    """End the current page section and start the next one"""
+    span = _current_span.get()
+    if span is None:
+        return
+    trace = span.trace
+    if trace.section is not None:
+        trace.section.end()
+    trace.section = trace.start_span(name, trace.root, SPAN_KIND_INTERNAL, attributes)
+    _current_span.set(trace.section)
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span; yields None when the rerun is not traced"""
+    parent = _current_span.get()
+    if parent is None or parent.trace.finished:
+        yield None
+        return
+    child = parent.trace.start_span(name, parent, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def set_attributes(**attributes) -> None:
+    """Attach attributes to the current span, e.g. the campaign being shown"""
+    span = _current_span.get()
+    if span is not None:
+        span.set(**attributes)
+
+
+def api_span(method: str, url: str, base_url: str):
+    """Span for one backend request, named by its route with the campaign id factored out"""
+    path = url[len(base_url):] if url.startswith(base_url) else url
+    attributes: Dict[str, Any] = {'http.method': method}
+    match = _CAMPAIGN_PATH.search(path)
+    if match:
+        attributes['campaign.id'] = int(match.group(1))
+        path = _CAMPAIGN_PATH.sub('/campaigns/{id}/', path, count=1)
+    attributes['http.route'] = path
+    return span(f"{method} {path}", kind=SPAN_KIND_CLIENT, **attributes)
+
+
+def _any_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}  # OTLP/JSON encodes int64 as a string
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_span(span: Span, trace_id: str) -> Dict[str, Any]:
+    record = {
+        'traceId': trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': span.kind,
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.end_ns),
+        'attributes': [{'key': k, 'value': _any_value(v)} for k, v in span.attributes.items() if v is not None],
+    }
+    if span.parent_id:
+        record['parentSpanId'] = span.parent_id
+    if span.error:
+        record['status'] = {'code': STATUS_ERROR, 'message': span.error}
+    return record
+
+
+def _export(trace: Trace) -> None:
+    line = json.dumps({'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+        'scopeSpans': [{'scope': {'name': __name__}, 'spans': [_otlp_span(s, trace.trace_id) for s in trace.spans]}],
+    }]}, separators=(',', ':'))
+    with _export_lock:
+        directory = os.path.dirname(TRACE_EXPORT_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            if os.path.getsize(TRACE_EXPORT_PATH) > TRACE_MAX_FILE_MB * 2 ** 20:
+                os.replace(TRACE_EXPORT_PATH, TRACE_EXPORT_PATH + '.1')
+        except OSError:
+            pass  # No file yet
+        with open(TRACE_EXPORT_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def propagate(func):
+    """Wrap func so it runs in the caller's trace context when submitted to a worker thread"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
@@ -1,14 +1,40 @@
 
 import os
+import tempfile
+from functools import lru_cache
 from dotenv import load_dotenv
-import streamlit as st
 
 # Load environment variables
 load_dotenv()
 
 # API Configuration
-# API_BASE_URL = os.getenv('API_BASE_URL')
-API_BASE_URL = st.secrets["API_BASE_URL"]
+API_TIMEOUT = 60  # Seconds before a backend request is abandoned
+
+
+@lru_cache(maxsize=None)
+def get_api_base_url() -> str:
+    """Backend URL (or comma-separated replica URLs), resolved on first use and then reused for the life of the process"""
+    # The environment takes precedence so scripts can run without a secrets.toml
+    url = os.getenv('API_BASE_URL')
+    if not url:
+        import streamlit as st
+        url = st.secrets["API_BASE_URL"]
+    return url
+
+
+def __getattr__(name):
+    # Keeps `from config import API_BASE_URL` working without a secrets lookup at import time
+    if name == 'API_BASE_URL':
+        return get_api_base_url()
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
+
+
+# Backend Endpoint Configuration
+API_EWMA_WEIGHT = 0.3  # Weight of the newest response time in each replica's moving-average latency
+API_BREAKER_FAILURES = 3  # Consecutive failures (connection errors, timeouts, 5xx) that eject a replica
+API_BREAKER_COOLDOWN = 30  # Seconds an ejected replica gets no traffic before a single trial request
+API_HEDGE_AFTER = 0.5  # Seconds before a slow GET is also sent to a second replica (0 disables hedging)
+API_HEDGE_WORKERS = 32  # Threads running hedged GETs across all sessions
 
 # App Configuration
 APP_NAME = "WhatsApp Campaign Manager"
@@ -17,6 +43,126 @@ APP_ICON = "📱"
 # Session Configuration
 SESSION_TIMEOUT = 3600  # 1 hour in seconds
 
+# Cache Configuration
+MESSAGE_SAMPLE_SIZE = 10  # Rows shown in the "View Messages (Sample)" section
+MESSAGE_SAMPLE_TTL = 30  # Seconds before a cached message sample is refetched
+MESSAGE_PAGE_SIZES = [50, 100, 250, 500]  # Page sizes offered by the message explorer
+MESSAGE_PAGE_TTL = 30  # Seconds before a cached message page is refetched
+MESSAGE_PAGE_CACHE_ENTRIES = 32  # Message pages kept in memory across all users
+DASHBOARD_STATS_TTL = 30  # Seconds before the shared /stats/ result is refetched
+DASHBOARD_CAMPAIGNS_TTL = 15  # Seconds before the dashboard's recent campaigns are refetched
+DASHBOARD_MAX_WORKERS = 8  # Threads fetching dashboard data concurrently across all sessions
+
+# Analytics Configuration
+ANALYTICS_PAGE_SIZE = 1000  # Messages requested per page while streaming analytics
+ANALYTICS_MEMORY_BUDGET_MB = 64  # Upper bound for the timestamp arrays of one campaign
+ANALYTICS_TTL = 300  # Seconds before cached analytics are recomputed
+FAILURE_PREFIX_DIGITS = 4  # Leading phone digits used to group failures (country code + range)
+FAILURE_TOP_N = 10  # Rows shown in the failure cause and prefix tables
+
+# Campaign Index Configuration
+CAMPAIGN_INDEX_PAGE_SIZE = 20  # Campaigns listed per page when reading from the index
+CAMPAIGN_INDEX_MAX_ENTRIES = 32  # Per-token indexes kept in memory; the least recently used is dropped
+CAMPAIGN_INDEX_TTL = SESSION_TIMEOUT  # Seconds an index is kept after it was built (logins expire with the session)
+
+# Campaign Picker Configuration
+CAMPAIGN_SEARCH_MIN_CHARS = 2  # Characters typed before the picker queries the backend
+CAMPAIGN_SEARCH_DEBOUNCE_MS = 300  # Keystroke pause before a search is sent
+CAMPAIGN_SEARCH_LIMIT = 20  # Matches offered by the picker
+CAMPAIGN_SEARCH_TTL = 60  # Seconds search results stay cached
+
+# Campaign Sync Configuration
+CAMPAIGN_SYNC_INTERVAL = 15  # Seconds between incremental syncs of the local campaign store
+CAMPAIGN_SYNC_FULL_INTERVAL = 600  # Seconds between full resyncs (also drops deleted campaigns)
+CAMPAIGN_SYNC_OVERLAP = 5  # Seconds subtracted from the watermark to tolerate clock skew
+CAMPAIGN_SYNC_MAX_DELTA = 2000  # Changed rows above which a full resync is cheaper
+CAMPAIGN_SYNC_PAGE_SIZE = 500  # Page size requested during syncs
+CAMPAIGN_SYNC_SCAN_PAGES = 5  # Newest pages checked when the backend has no delta support
+
+# Stuck Campaign Sweeper Configuration
+SWEEPER_INTERVAL = 120  # Seconds between background sweeps
+SWEEPER_MAX_WORKERS = 4  # Concurrent check-status calls
+SWEEPER_RATE_PER_SECOND = 5  # Maximum check-status calls per second
+SWEEPER_HISTORY = 200  # Outcomes kept for the sweeper panel
+SWEEPER_MAX_ENTRIES = 32  # Per-token sweepers kept; the least recently used is stopped and dropped
+SWEEPER_TTL = SESSION_TIMEOUT  # Seconds a sweeper keeps running after its login last opened the sweeper panel
+
+# Bulk Control Configuration
+BULK_MAX_WORKERS = 16  # Default concurrent control calls
+BULK_CALL_TIMEOUT = 10  # Default seconds before one control call is abandoned
+BULK_RETRIES = 2  # Retries for transient errors (timeouts, connection errors, 429/5xx)
+BULK_RETRY_BACKOFF = 0.5  # Seconds before the first retry; doubles on each attempt
+
+# Start Scheduler Configuration
+SCHEDULER_DB_PATH = os.getenv('SCHEDULER_DB_PATH', os.path.join('data', 'scheduler.sqlite3'))  # Persisted start queue
+SCHEDULER_BUDGET_PER_MINUTE = 1000  # Recipients sent per minute across every scheduled campaign
+SCHEDULER_TICK_SECONDS = 15  # Seconds between rebalances
+SCHEDULER_BURST_SECONDS = 60  # Unused budget is carried over for at most this long
+SCHEDULER_DEFAULT_RATE = 600  # Recipients per minute assumed for a campaign until its rate is observed
+SCHEDULER_RATE_SMOOTHING = 0.5  # Weight of the newest sample in each campaign's moving-average send rate
+SCHEDULER_MAX_WORKERS = 4  # Concurrent campaign lookups per rebalance
+
+# Suppression List Configuration
+SUPPRESSION_DIR = os.getenv('SUPPRESSION_DIR', os.path.join('data', 'suppression'))  # Suppressed numbers and their Bloom filter
+SUPPRESSION_BLOOM_BITS = 10  # Bloom filter bits per suppressed number (about 1% false positives, confirmed on disk)
+SUPPRESSION_FAILURE_CATEGORIES = ('Opted out / blocked', 'Invalid number')  # Failure causes suppressed after one failure
+SUPPRESSION_MIN_FAILURES = 3  # Campaigns a number must have failed in, for any other cause, to be suppressed
+SUPPRESSION_PHONE_COLUMN = 'phone'  # Recipient file column screened against the list
+SUPPRESSION_SAMPLE_SIZE = 20  # Suppressed numbers listed on the Create Campaign page
+
+# CLI Configuration
+CLI_MAX_WORKERS = 8  # Default concurrent operations of cli.py
+CLI_RECIPIENT_PATTERNS = ('*.csv', '*.xlsx', '*.xls')  # Files picked up by `cli.py create <directory>`
+CLI_EXPORT_PAGE_SIZE = 1000  # Messages requested per page while exporting a report
+
+# Snapshot Store Configuration
+SNAPSHOT_DB_PATH = os.getenv('SNAPSHOT_DB_PATH', os.path.join('data', 'snapshots.sqlite3'))  # SQLite file for dashboard history
+SNAPSHOT_INTERVAL = 300  # Seconds between recorded /stats/ and campaign snapshots
+SNAPSHOT_RAW_RETENTION_DAYS = 2  # Raw snapshots older than this are thinned to one per hour
+SNAPSHOT_HOURLY_RETENTION_DAYS = 31  # Hourly rollups (and hourly raw snapshots) are kept this long
+SNAPSHOT_DAILY_RETENTION_DAYS = 730  # Daily rollups are kept this long
+SNAPSHOT_TREND_RANGES = {"Last 24 hours": ('hour', 1), "Last 7 days": ('hour', 7),
+                         "Last 30 days": ('day', 30), "Last 90 days": ('day', 90)}  # Trend chart ranges: (bucket, days)
+
+# Tracing Configuration
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))  # Fraction of reruns traced (0 disables tracing)
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', os.path.join('data', 'traces.jsonl'))  # OTLP/JSON lines, one trace per line
+TRACE_MAX_FILE_MB = 50  # Export file size at which it is rotated to <path>.1
+TRACE_IDLE_SECONDS = 60  # Unfinished traces (e.g. a rerun stopped early) are exported after this long
+
+# Profiler Configuration
+PROFILE_SAMPLE_INTERVAL_MS = 5  # Stack sampling interval of the sampling profiler
+PROFILE_MAX_STACK_DEPTH = 128  # Frames kept per sampled stack
+PROFILE_MAX_RERUNS = 100  # Most reruns one profiling request may cover
+
+# Session Memory Configuration
+SESSION_MEMORY_CAP_MB = 64  # Session state above this is spilled to disk or evicted, largest entries first
+SESSION_PROCESS_CAP_MB = 512  # Across all sessions; above this every session spills and evicts what it can
+SESSION_SPILL_THRESHOLD_MB = 8  # Spillable values larger than this go straight to disk
+SESSION_SPILL_DIR = os.getenv('SESSION_SPILL_DIR', os.path.join(tempfile.gettempdir(), 'campaign-manager-spill'))  # Spill files
+SESSION_SPILL_KEYS = ('file_content', 'screened_content', 'validation_response')  # Keys read through components.session_memory
+SESSION_EVICTABLE_KEYS = ('campaigns_bulk_summary',)  # Keys that may simply be dropped
+
+# Offline Cache Configuration
+OFFLINE_CACHE_DB_PATH = os.getenv('OFFLINE_CACHE_DB_PATH', os.path.join('data', 'offline_cache.sqlite3'))  # Local copy of fetched data
+OFFLINE_FRESH_WAIT = 0.5  # Seconds a page waits for the backend before rendering its cached copy
+OFFLINE_FETCH_WORKERS = 4  # Threads running backend fetches that pages may stop waiting for
+OFFLINE_RETENTION_DAYS = 30  # Cached rows not refreshed for this long are deleted
+OFFLINE_SYNC_PAGE_SIZE = 1000  # Messages requested per page when saving a campaign for offline use
+
+# Prefetch Configuration
+PREFETCH_MAX_WORKERS = 2  # Threads running background prefetches across all sessions
+PREFETCH_RATE_PER_SECOND = 4  # Prefetches started per second across all sessions; the rest are skipped
+PREFETCH_BURST = 8  # Prefetches that may start at once after a quiet period
+PREFETCH_MAX_PENDING = 8  # Prefetches queued or running at once
+PREFETCH_MAX_FOREGROUND = 4  # Backend fetches pages are waiting on above which nothing is prefetched
+PREFETCH_TTL = 20  # Seconds a prefetched result may be served in place of a fetch
+PREFETCH_MAX_ENTRIES = 128  # Prefetched results held across all sessions
+PREFETCH_ROWS = 3  # Campaigns on a list page whose details and statistics are warmed
+
+# Chart Configuration
+CHART_CACHE_ENTRIES = 128  # Built Plotly figures kept in memory, keyed by a hash of their data
+
 # UI Configuration
 PAGE_ICON = "📱"
 LAYOUT = "wide"
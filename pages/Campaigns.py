@@ -2,16 +2,30 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime
+from datetime import datetime, timedelta
 import time
 import io
-from components.auth import require_auth, logout
+from components.auth import require_auth, logout, user_key_for
+from components.tracing import start_rerun, section, span, set_attributes, end_rerun
 from components.api_client import APIClient
-from config import STATUS_COLORS, STATUS_ICONS
+from components.campaign_index import get_campaign_index, refresh_campaign_index
+from components.campaign_picker import campaign_picker
+from components.data_loader import (load_message_sample, load_latency_report, load_failure_breakdown,
+                                    load_campaign_page_offline, load_campaign_offline,
+                                    load_campaign_statistics_offline, prefetch_campaign_pages,
+                                    prefetch_campaign)
+from components.offline_cache import get_offline_cache, write_behind, show_freshness
+from components.sweeper import get_sweeper, is_stuck
+from components.bulk import BULK_ACTIONS, eligible_campaigns, run_bulk_action
+from components.charts import render_chart, latency_histogram, latency_curve, failure_causes_bar
+from components.message_table import build_message_table, export_frame
+from components.utils import format_duration
+from config import (STATUS_COLORS, STATUS_ICONS, MESSAGE_SAMPLE_SIZE, CAMPAIGN_INDEX_PAGE_SIZE,
+                    SWEEPER_INTERVAL, BULK_MAX_WORKERS, BULK_CALL_TIMEOUT, PREFETCH_ROWS)
 
 # Check authentication
 require_auth()
+start_rerun('Campaigns', show_all=st.session_state.get('show_all_campaigns', False))
 
 # Page header
 st.title("📈 Campaign Management")
@@ -47,14 +61,22 @@ if st.session_state.selected_campaign and st.session_state.show_manage:
 
 
 # Get campaigns from API with error handling
+section('load campaigns', page=st.session_state.current_page)
 api = APIClient()
+user_key = user_key_for(st.session_state.user)
 
 try:
     # Fetch campaigns - either paginated or all
     if st.session_state.show_all_campaigns:
-        campaigns_response = api.get_all_campaigns()
+        # "Show All" is served from the in-memory campaign index
+        campaign_index = get_campaign_index(st.session_state.auth_token)
+        refresh_campaign_index(api, campaign_index)
+        campaigns_response = {'results': campaign_index.records(), 'count': len(campaign_index), 'success': True}
     else:
-        campaigns_response = api.get_campaigns(page=st.session_state.current_page)
+        # Slow or failing backend: the page renders from the offline cache with a marker
+        campaigns_response, campaigns_freshness = load_campaign_page_offline(
+            api, st.session_state.auth_token, user_key, st.session_state.current_page)
+        show_freshness(campaigns_freshness, "campaigns")
     if not campaigns_response.get('success', True):  # Some APIs don't return success field
         st.error("Failed to load campaigns from server.")
         campaigns_response = {'results': [], 'count': 0}
@@ -67,13 +89,14 @@ if campaigns_response.get('results'):
     campaigns = campaigns_response['results']
     
     # Create tab selection
-    tab_options = ["📊 All Campaigns", "🎯 Manage Single Campaign"]
+    tab_options = ["📊 All Campaigns", "🎯 Manage Single Campaign", "🧹 Stuck Campaigns", "⚡ Bulk Control"]
     
     # Determine which tab to show based on session state
     default_index = 1 if (st.session_state.show_manage and st.session_state.selected_campaign) else 0
     selected_tab = st.radio("Select View", tab_options, index=default_index, horizontal=True, key="tab_selector")
     
     if selected_tab == "📊 All Campaigns":
+        section('campaign list', rows=len(campaigns))
         st.session_state.show_manage = False
         # Campaign Overview Table
         st.markdown("### 📋 All Campaigns Overview")
@@ -81,22 +104,77 @@ if campaigns_response.get('results'):
         # Show total count and pagination info
         total_count = campaigns_response.get('count', len(campaigns))
         page_size = 20  # This matches Django's PAGE_SIZE setting
-        total_pages = (total_count + page_size - 1) // page_size if not st.session_state.show_all_campaigns else 1
+        total_pages = (total_count + page_size - 1) // page_size
+        has_next_page = bool(campaigns_response.get('next'))
+        
+        if st.session_state.show_all_campaigns:
+            # Search, filter and sort the index locally - no backend calls per keystroke
+            status_facets = campaign_index.status_facets()
+            sort_options = {
+                "Newest first": ('created_at', True),
+                "Oldest first": ('created_at', False),
+                "Template (A-Z)": ('template_name', False),
+                "Most recipients": ('total_recipients', True),
+                "Most sent": ('sent_count', True),
+                "Most delivered": ('delivered_count', True),
+                "Most read": ('read_count', True),
+                "Most failed": ('failed_count', True),
+                "Highest success rate": ('success_rate', True),
+            }
+            
+            col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+            with col1:
+                index_search = st.text_input("Search template", placeholder="Template name",
+                                             key="campaigns_index_search")
+                index_prefix = st.checkbox("Starts with", key="campaigns_index_prefix")
+            with col2:
+                index_statuses = st.multiselect(
+                    "Status",
+                    options=list(status_facets.keys()),
+                    format_func=lambda s: f"{s} ({status_facets[s]})",
+                    key="campaigns_index_statuses"
+                )
+            with col3:
+                index_dates = st.date_input("Created between", value=[], key="campaigns_index_dates")
+            with col4:
+                index_sort = st.selectbox("Sort by", options=list(sort_options.keys()),
+                                          key="campaigns_index_sort")
+            
+            created_from = index_dates[0] if len(index_dates) > 0 else None
+            created_to = index_dates[1] + timedelta(days=1) if len(index_dates) > 1 else None
+            sort_by, descending = sort_options[index_sort]
+            matching_rows = campaign_index.query(index_search, prefix=index_prefix, statuses=index_statuses,
+                                                 created_from=created_from, created_to=created_to,
+                                                 sort_by=sort_by, descending=descending)
+            
+            # Go back to the first page whenever the query changes
+            index_filters = (index_search, index_prefix, tuple(index_statuses), tuple(index_dates), index_sort)
+            if st.session_state.get('campaigns_index_filters') != index_filters:
+                st.session_state.campaigns_index_filters = index_filters
+                st.session_state.current_page = 1
+            
+            page_size = CAMPAIGN_INDEX_PAGE_SIZE
+            total_count = len(matching_rows)
+            total_pages = max(1, (total_count + page_size - 1) // page_size)
+            st.session_state.current_page = min(st.session_state.current_page, total_pages)
+            page_start = (st.session_state.current_page - 1) * page_size
+            campaigns = campaign_index.records(matching_rows[page_start:page_start + page_size])
+            has_next_page = st.session_state.current_page < total_pages
         
         col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
         with col1:
-            st.caption(f"Total campaigns: {total_count}")
-        with col2:
-            if not st.session_state.show_all_campaigns:
-                st.caption(f"Page {st.session_state.current_page} of {total_pages}")
+            if st.session_state.show_all_campaigns:
+                st.caption(f"Matching campaigns: {total_count} of {len(campaign_index)}")
             else:
-                st.caption("Showing all campaigns")
+                st.caption(f"Total campaigns: {total_count}")
+        with col2:
+            st.caption(f"Page {st.session_state.current_page} of {total_pages}")
         with col3:
             st.caption(f"Displaying: {len(campaigns)}")
         with col4:
             # Toggle between paginated and all campaigns
             show_all = st.checkbox("Show All", value=st.session_state.show_all_campaigns,
-                                  help="Toggle between paginated view and showing all campaigns")
+                                  help="Search, filter and sort all campaigns instead of paging through them")
             if show_all != st.session_state.show_all_campaigns:
                 st.session_state.show_all_campaigns = show_all
                 st.session_state.current_page = 1  # Reset to first page when toggling
@@ -145,6 +223,8 @@ if campaigns_response.get('results'):
                         if st.button("Manage", key=f"manage_{campaign_id}"):
                             st.session_state.selected_campaign = campaign_id
                             st.session_state.show_manage = True
+                            # Loads while the rerun renders everything above the manage view
+                            prefetch_campaign(api, user_key, campaign_id)
                             st.rerun()
                     
                     with button_col2:
@@ -162,7 +242,7 @@ if campaigns_response.get('results'):
                                     messages_response = api.get_campaign_messages(campaign_id)
                                     
                                     if messages_response.get('results'):
-                                        messages_df = pd.DataFrame(messages_response['results'])
+                                        messages_df = build_message_table([messages_response['results']])
                                         
                                         # Add campaign info to the report
                                         report_data = {
@@ -182,20 +262,21 @@ if campaigns_response.get('results'):
                                         # Create Excel file
                                         output = io.BytesIO()
                                         
-                                        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                                            # Summary sheet
-                                            summary_df = pd.DataFrame([report_data])
-                                            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+                                        with span('xlsx export', **{'campaign.id': campaign_id, 'rows': len(messages_df)}):
+                                            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                                                # Summary sheet
+                                                summary_df = pd.DataFrame([report_data])
+                                                summary_df.to_excel(writer, sheet_name='Summary', index=False)
                                             
-                                            # Messages detail sheet
-                                            if not messages_df.empty:
-                                                # Select relevant columns
-                                                export_columns = ['phone_number', 'status', 'sent_at', 
-                                                                'delivered_at', 'read_at', 'failed_at', 
-                                                                'error_message']
-                                                available_cols = [col for col in export_columns if col in messages_df.columns]
-                                                messages_export = messages_df[available_cols].copy()
-                                                messages_export.to_excel(writer, sheet_name='Messages', index=False)
+                                                # Messages detail sheet
+                                                if not messages_df.empty:
+                                                    # Select relevant columns
+                                                    export_columns = ['phone_number', 'status', 'sent_at', 
+                                                                    'delivered_at', 'read_at', 'failed_at', 
+                                                                    'error_message']
+                                                    messages_export = export_frame(messages_df, export_columns)
+                                                    messages_export.to_excel(writer, sheet_name='Messages', index=False)
+                                            set_attributes(**{'xlsx.bytes': output.tell()})
                                         
                                         # Generate download
                                         output.seek(0)
@@ -218,8 +299,8 @@ if campaigns_response.get('results'):
                 
                 st.markdown("---")
         
-        # Pagination controls (only show when not displaying all)
-        if not st.session_state.show_all_campaigns:
+        # Pagination controls
+        if total_pages > 1 or not st.session_state.show_all_campaigns:
             st.markdown("---")
             col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
             
@@ -251,7 +332,7 @@ if campaigns_response.get('results'):
             
             with col4:
                 if st.button("▶️ Next", key="campaigns_next_page",
-                            disabled=not campaigns_response.get('next')):
+                            disabled=not has_next_page):
                     st.session_state.current_page += 1
                     st.rerun()
             
@@ -261,12 +342,24 @@ if campaigns_response.get('results'):
                     st.session_state.current_page = total_pages
                     st.rerun()
         
+        # Warm what the next click most likely needs: a neighbouring page, or a campaign to manage
+        section('prefetch')
+        if not st.session_state.show_all_campaigns:
+            prefetch_campaign_pages(api, st.session_state.auth_token, user_key,
+                                    st.session_state.current_page, total_pages)
+        # Running and paused campaigns are the ones usually opened to manage
+        for campaign in sorted(campaigns, key=lambda c: c.get('status') not in ('running', 'paused'))[:PREFETCH_ROWS]:
+            prefetch_campaign(api, user_key, campaign['id'])
+        
         # Refresh button
         st.markdown("---")
         if st.button("🔄 Refresh", key="campaigns_refresh"):
+            if st.session_state.show_all_campaigns:
+                refresh_campaign_index(api, campaign_index, force=True)
             st.rerun()
     
     elif selected_tab == "🎯 Manage Single Campaign":
+        section('manage campaign')
         # Set the flag when this tab is selected
         st.session_state.show_manage = True
         
@@ -276,28 +369,10 @@ if campaigns_response.get('results'):
         col1, col2, col3 = st.columns([3, 1, 1])
         
         with col1:
-            # Create campaign options
-            campaign_options = {
-                f"{c['id']} - {c['template_name']} ({c['status']})": c['id'] 
-                for c in campaigns
-            }
-            
-            # Find the index of the selected campaign if one is already selected
-            selected_index = 0
-            if st.session_state.selected_campaign:
-                for idx, (option_text, campaign_id) in enumerate(campaign_options.items()):
-                    if campaign_id == st.session_state.selected_campaign:
-                        selected_index = idx
-                        break
-            
-            selected_option = st.selectbox(
-                "Choose a campaign",
-                options=list(campaign_options.keys()),
-                index=selected_index
-            )
-            
-            if selected_option:
-                st.session_state.selected_campaign = campaign_options[selected_option]
+            # Search-as-you-type picker; the selected ID resolves via get_campaign
+            picked_id, picked_campaign = campaign_picker(api, campaigns, key="campaigns_picker")
+            if picked_id:
+                st.session_state.selected_campaign = picked_id
         
         with col2:
             auto_refresh = st.checkbox("Auto Refresh", value=st.session_state.auto_refresh)
@@ -315,21 +390,26 @@ if campaigns_response.get('results'):
         # Display selected campaign details
         if st.session_state.selected_campaign:
             campaign_id = st.session_state.selected_campaign
+            set_attributes(**{'campaign.id': campaign_id})
             
             # Get campaign details with error handling
             try:
-                campaign_response = api.get_campaign(campaign_id)
+                if picked_campaign:
+                    campaign_response, campaign_freshness = picked_campaign, None
+                    write_behind(get_offline_cache().put_campaigns, user_key, [picked_campaign])
+                else:
+                    campaign_response, campaign_freshness = load_campaign_offline(api, user_key, campaign_id)
                 if not campaign_response.get('id'):
                     st.error("Failed to load campaign details.")
                     st.stop()
                 campaign = campaign_response
+                show_freshness(campaign_freshness, "campaign details")
             except Exception as e:
                 st.error(f"Error loading campaign: {str(e)}")
                 st.stop()
             
             try:
-                stats_response = api.get_campaign_statistics(campaign_id)
-                stats = stats_response.get('statistics', {}) if stats_response.get('success') else {}
+                stats, _ = load_campaign_statistics_offline(api, user_key, campaign_id)
             except Exception as e:
                 st.warning(f"Could not load campaign statistics: {str(e)}")
                 stats = {}
@@ -386,11 +466,9 @@ if campaigns_response.get('results'):
             st.markdown("### 🎮 Campaign Controls")
             
             # Check if campaign is stuck (running but all messages sent)
-            is_stuck = (campaign['status'] == 'running' and 
-                       campaign.get('sent_count', 0) == campaign.get('total_recipients', 0) and 
-                       campaign.get('total_recipients', 0) > 0)
+            campaign_stuck = is_stuck(campaign)
             
-            if is_stuck:
+            if campaign_stuck:
                 st.warning("⚠️ This campaign appears to be stuck in 'running' state even though all messages have been sent.")
             
             col1, col2, col3, col4, col5, col6 = st.columns(6)
@@ -446,7 +524,7 @@ if campaigns_response.get('results'):
             
             with col5:
                 # Check Campaign Status button for stuck campaigns
-                if is_stuck or campaign['status'] == 'running':
+                if campaign_stuck or campaign['status'] == 'running':
                     if st.button("🔍 Check Status", key="campaigns_check_status",
                                 help="Check and update campaign completion status"):
                         with st.spinner("Checking campaign status..."):
@@ -484,7 +562,7 @@ if campaigns_response.get('results'):
                             messages_response = api.get_campaign_messages(campaign_id)
                             
                             if messages_response.get('results'):
-                                messages_df = pd.DataFrame(messages_response['results'])
+                                messages_df = build_message_table([messages_response['results']])
                                 
                                 # Add campaign info to the report
                                 report_data = {
@@ -505,20 +583,21 @@ if campaigns_response.get('results'):
                                 # Create Excel file with multiple sheets
                                 output = io.BytesIO()
                                 
-                                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                                    # Summary sheet
-                                    summary_df = pd.DataFrame([report_data])
-                                    summary_df.to_excel(writer, sheet_name='Summary', index=False)
+                                with span('xlsx export', **{'campaign.id': campaign_id, 'rows': len(messages_df)}):
+                                    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                                        # Summary sheet
+                                        summary_df = pd.DataFrame([report_data])
+                                        summary_df.to_excel(writer, sheet_name='Summary', index=False)
                                     
-                                    # Messages detail sheet
-                                    if not messages_df.empty:
-                                        # Select relevant columns
-                                        export_columns = ['phone_number', 'status', 'sent_at', 
-                                                        'delivered_at', 'read_at', 'failed_at', 
-                                                        'error_message']
-                                        available_cols = [col for col in export_columns if col in messages_df.columns]
-                                        messages_export = messages_df[available_cols].copy()
-                                        messages_export.to_excel(writer, sheet_name='Messages', index=False)
+                                        # Messages detail sheet
+                                        if not messages_df.empty:
+                                            # Select relevant columns
+                                            export_columns = ['phone_number', 'status', 'sent_at', 
+                                                            'delivered_at', 'read_at', 'failed_at', 
+                                                            'error_message']
+                                            messages_export = export_frame(messages_df, export_columns)
+                                            messages_export.to_excel(writer, sheet_name='Messages', index=False)
+                                    set_attributes(**{'xlsx.bytes': output.tell()})
                                 
                                 # Generate download
                                 output.seek(0)
@@ -585,6 +664,86 @@ if campaigns_response.get('results'):
                             st.progress(pct / 100)
                         with col3:
                             st.caption(f"{count} ({pct:.1f}%)")
+                
+                # Delivery latency analytics - streams every message, so only on demand
+                show_latency = st.toggle("⏱️ Delivery Latency Analysis", value=False,
+                                         key=f"campaigns_show_latency_{campaign_id}")
+                if show_latency:
+                    report_version = (campaign.get('sent_count', 0), campaign.get('delivered_count', 0),
+                                      campaign.get('read_count', 0), campaign.get('failed_count', 0))
+                    try:
+                        with st.spinner("Analyzing message timestamps..."):
+                            latency_report = load_latency_report(st.session_state.auth_token, campaign_id,
+                                                                 report_version)
+                    except Exception as e:
+                        st.error(f"Failed to load latency analytics: {str(e)}")
+                        latency_report = None
+                    
+                    if latency_report:
+                        st.caption(f"Based on {latency_report['messages_analyzed']:,} messages")
+                        if latency_report['truncated']:
+                            st.warning("Campaign exceeds the analytics memory budget; "
+                                       "results cover the first messages only.")
+                        
+                        for stage in latency_report['stages']:
+                            summary = stage['summary']
+                            if not summary['count']:
+                                continue
+                            
+                            st.markdown(f"#### {stage['label']}")
+                            col1, col2, col3, col4, col5 = st.columns(5)
+                            with col1:
+                                st.metric("Messages", f"{summary['count']:,}")
+                            with col2:
+                                st.metric("Median", format_duration(summary['p50']))
+                            with col3:
+                                st.metric("p90", format_duration(summary['p90']))
+                            with col4:
+                                st.metric("p99", format_duration(summary['p99']))
+                            with col5:
+                                st.metric("Max", format_duration(summary['max']))
+                            
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                render_chart(latency_histogram, stage['histogram'],
+                                             key=f"latency_hist_{campaign_id}_{stage['label']}")
+                            with col2:
+                                render_chart(latency_curve, stage['curve'],
+                                             key=f"latency_curve_{campaign_id}_{stage['label']}")
+                
+                # Failure breakdown - streams only the failed messages, on demand
+                if campaign.get('failed_count', 0) > 0:
+                    show_failures = st.toggle("❌ Failure Breakdown", value=False,
+                                              key=f"campaigns_show_failures_{campaign_id}")
+                    if show_failures:
+                        try:
+                            with st.spinner("Aggregating failed messages..."):
+                                failure_report = load_failure_breakdown(st.session_state.auth_token, campaign_id,
+                                                                        campaign.get('failed_count', 0))
+                        except Exception as e:
+                            st.error(f"Failed to load failure breakdown: {str(e)}")
+                            failure_report = None
+                        
+                        if failure_report and failure_report['total']:
+                            st.caption(f"Based on {failure_report['total']:,} failed messages")
+                            
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                st.markdown("#### Failures by Cause")
+                                render_chart(failure_causes_bar, failure_report['categories'],
+                                             key=f"failure_causes_{campaign_id}")
+                            with col2:
+                                st.markdown("#### Affected Phone Prefixes")
+                                prefixes_df = pd.DataFrame(failure_report['prefixes'])
+                                prefixes_df.columns = ['Prefix', 'Failures', 'Main Cause']
+                                st.dataframe(prefixes_df, hide_index=True, width="stretch")
+                            
+                            st.markdown("#### Top Error Messages")
+                            errors_df = pd.DataFrame(failure_report['top_errors'])[['error', 'category', 'count']]
+                            errors_df.columns = ['Example Error', 'Cause', 'Failures']
+                            st.dataframe(errors_df, hide_index=True, width="stretch")
+                        elif failure_report:
+                            st.info("No failed messages found")
             
             # Campaign Timeline
             if campaign.get('started_at'):
@@ -621,11 +780,19 @@ if campaigns_response.get('results'):
                     with col2:
                         st.markdown(f"**{item['Event']}**  \n{item['Time']}")
             
-            # Messages Preview (Optional)
-            with st.expander("📨 View Messages (Sample)", expanded=False):
-                messages_response = api.get_campaign_messages(campaign_id)
-                if messages_response.get('results'):
-                    messages_df = pd.DataFrame(messages_response['results'][:10])
+            # Messages Preview (Optional) - only fetched while the toggle is on
+            show_sample = st.toggle("📨 View Messages (Sample)", value=False,
+                                    key=f"campaigns_show_sample_{campaign_id}")
+            if show_sample:
+                try:
+                    sample_messages = load_message_sample(st.session_state.auth_token, campaign_id,
+                                                          MESSAGE_SAMPLE_SIZE)
+                except Exception as e:
+                    st.error(f"Failed to load messages: {str(e)}")
+                    sample_messages = []
+                
+                if sample_messages:
+                    messages_df = pd.DataFrame(sample_messages)
                     
                     if not messages_df.empty:
                         display_columns = ['phone_number', 'status', 'sent_at', 'delivered_at']
@@ -642,12 +809,154 @@ if campaigns_response.get('results'):
                 else:
                     st.info("No messages found")
             
+            if st.button("🔎 Explore All Messages", key="campaigns_explore_messages"):
+                st.switch_page("pages/Message_Explorer.py")
+            
+    elif selected_tab == "🧹 Stuck Campaigns":
+        section('stuck campaigns')
+        st.session_state.show_manage = False
+        st.markdown("### 🧹 Stuck Campaign Sweeper")
+        st.caption("Finds campaigns still 'running' after all messages were sent and re-checks their status.")
+        
+        sweeper = get_sweeper(st.session_state.auth_token)
+        
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            background = st.toggle("Sweep in background", value=sweeper.running,
+                                   help=f"Re-check all running campaigns every {SWEEPER_INTERVAL} seconds")
+            if background and not sweeper.running:
+                sweeper.start()
+            elif not background and sweeper.running:
+                sweeper.stop()
+        with col2:
+            if st.button("🧹 Sweep Now", key="campaigns_sweep_now"):
+                with st.spinner("Checking running campaigns..."):
+                    sweeper.sweep()
+        with col3:
+            if st.button("🔄 Refresh", key="campaigns_sweep_refresh"):
+                st.rerun()
+        
+        if sweeper.last_error:
+            st.error(sweeper.last_error)
+        
+        if sweeper.last_run:
+            st.caption(f"Last sweep: {sweeper.last_run.strftime('%Y-%m-%d %H:%M:%S')} — "
+                       f"{sweeper.last_suspects} suspect campaign(s)")
+            
+            history = sweeper.history()
+            if history:
+                history_df = pd.DataFrame(history)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Completed", int((history_df['outcome'] == 'completed').sum()))
+                with col2:
+                    st.metric("Still Running", int((history_df['outcome'] == 'still running').sum()))
+                with col3:
+                    st.metric("Errors", int((history_df['outcome'] == 'error').sum()))
+                
+                history_df['checked_at'] = history_df['checked_at'].dt.strftime('%Y-%m-%d %H:%M:%S')
+                history_df.columns = ['ID', 'Template', 'Outcome', 'Detail', 'Checked']
+                st.dataframe(history_df, hide_index=True, width="stretch")
+            else:
+                st.success("No stuck campaigns found")
+        else:
+            st.info("No sweep has run yet. Click 'Sweep Now' or enable background sweeping.")
+    
+    elif selected_tab == "⚡ Bulk Control":
+        section('bulk control')
+        st.session_state.show_manage = False
+        st.markdown("### ⚡ Bulk Campaign Control")
+        st.caption("Start, pause or resume many campaigns at once. Calls run in parallel with a per-call timeout and retries.")
+        
+        # Select from the campaign index so every campaign is eligible, not just the current page
+        bulk_index = get_campaign_index(st.session_state.auth_token)
+        try:
+            refresh_campaign_index(api, bulk_index)
+        except Exception as e:
+            st.error(f"Failed to load campaigns: {str(e)}")
+        
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            bulk_action = st.selectbox(
+                "Action",
+                options=list(BULK_ACTIONS.keys()),
+                format_func=lambda action: BULK_ACTIONS[action]['label'],
+                key="campaigns_bulk_action"
+            )
+        with col2:
+            bulk_search = st.text_input("Filter by template name", key="campaigns_bulk_search")
+        
+        rows = bulk_index.query(search=bulk_search, statuses=BULK_ACTIONS[bulk_action]['statuses'])
+        candidates = eligible_campaigns(bulk_action, bulk_index.records(rows))
+        
+        if not candidates:
+            st.info(f"No campaigns are eligible for '{bulk_action}' (needs status: {', '.join(BULK_ACTIONS[bulk_action]['statuses'])}).")
+        else:
+            candidate_labels = {c['id']: f"{c['id']} - {c.get('template_name', '')} ({c.get('status', '')})"
+                                for c in candidates}
+            select_all = st.checkbox(f"Select all {len(candidates)} eligible campaigns", key="campaigns_bulk_all")
+            if select_all:
+                selected_ids = list(candidate_labels.keys())
+            else:
+                selected_ids = st.multiselect(
+                    "Campaigns",
+                    options=list(candidate_labels.keys()),
+                    format_func=lambda campaign_id: candidate_labels[campaign_id],
+                    key=f"campaigns_bulk_select_{bulk_action}"
+                )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                bulk_workers = st.slider("Parallel calls", min_value=1, max_value=32,
+                                         value=BULK_MAX_WORKERS, key="campaigns_bulk_workers")
+            with col2:
+                bulk_timeout = st.number_input("Timeout per call (seconds)", min_value=1, max_value=120,
+                                               value=BULK_CALL_TIMEOUT, key="campaigns_bulk_timeout")
+            
+            confirmed = st.checkbox(f"I want to {bulk_action} {len(selected_ids)} campaign(s)",
+                                    key="campaigns_bulk_confirm")
+            if st.button(f"{BULK_ACTIONS[bulk_action]['label']} Selected", type="primary",
+                         disabled=not (selected_ids and confirmed), key="campaigns_bulk_apply"):
+                progress = st.progress(0.0, text=f"0 / {len(selected_ids)} done")
+                done = []
+                
+                def on_bulk_result(result):
+                    done.append(result)
+                    progress.progress(len(done) / len(selected_ids), text=f"{len(done)} / {len(selected_ids)} done")
+                
+                st.session_state.campaigns_bulk_summary = run_bulk_action(
+                    st.session_state.auth_token, bulk_action, selected_ids,
+                    max_workers=bulk_workers, timeout=bulk_timeout, on_result=on_bulk_result
+                )
+                # Statuses changed on the backend; pick them up before the next render
+                refresh_campaign_index(api, bulk_index, force=True)
+        
+        summary = st.session_state.get('campaigns_bulk_summary')
+        if summary:
+            st.markdown("#### Last Bulk Run")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Action", summary['action'].title())
+            with col2:
+                st.metric("Succeeded", summary['succeeded'])
+            with col3:
+                st.metric("Failed", summary['failed'])
+            with col4:
+                st.metric("Duration", format_duration(summary['elapsed']))
+            
+            results_df = pd.DataFrame(summary['results'])[['campaign_id', 'success', 'message', 'attempts', 'elapsed']]
+            results_df['success'] = results_df['success'].map({True: '✅', False: '❌'})
+            results_df['elapsed'] = results_df['elapsed'].round(2)
+            results_df.columns = ['ID', 'OK', 'Message', 'Attempts', 'Seconds']
+            st.dataframe(results_df, hide_index=True, width="stretch")
+            
 else:
     st.info("No campaigns found. Create your first campaign to get started!")
     if st.button("➕ Create Your First Campaign", key="campaigns_create_first"):
         st.switch_page("pages/Create_Campaign.py")
 
 # Add workflow explanation at the bottom
+section('workflow guide')
 st.markdown("---")
 with st.expander("📚 Campaign Workflow Guide", expanded=False):
     st.markdown("""
@@ -681,4 +990,6 @@ with st.expander("📚 Campaign Workflow Guide", expanded=False):
     - **Test API Connection** → Use the "Test API Connection" button
     - **View Raw Data** → Expand debug sections to see API responses
     - **Detailed Start Process** → Debug mode shows step-by-step start campaign process
-    """)
\ No newline at end of file
+    """)
+
+end_rerun()
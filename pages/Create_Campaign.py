@@ -2,12 +2,15 @@
 
 import streamlit as st
 import pandas as pd
-import io
 from components.auth import require_auth, logout
+from components.tracing import start_rerun, section, end_rerun
 from components.api_client import APIClient
+from components import session_memory
+from components.suppression import get_suppression_list, read_phone_file, screen_upload
 
 # Check authentication
 require_auth()
+start_rerun('Create_Campaign')
 
 # Page header
 st.title("➕ Create New Campaign")
@@ -56,6 +59,20 @@ with st.sidebar:
         width="stretch"
     )
 
+    st.markdown("---")
+    st.markdown("### 🚫 Suppression List")
+    suppression = get_suppression_list()
+    st.caption(f"{len(suppression):,} numbers are skipped in every upload")
+    opt_out_file = st.file_uploader("Import opt-outs", type=['csv', 'txt', 'xlsx', 'xls'], key="create_opt_out_file",
+                                    help="A file with a phone column, or one number per line")
+    if opt_out_file is not None and st.button("➕ Add to Suppression List", key="create_import_opt_outs"):
+        try:
+            added = suppression.add(read_phone_file(opt_out_file, opt_out_file.name), source='opt-out import')
+            st.session_state.screened_file = None  # Screen the current upload again
+            st.success(f"Added {added:,} new numbers")
+        except Exception as e:
+            st.error(f"❌ Could not import opt-outs: {str(e)}")
+
 # Initialize session state
 if 'file_validated' not in st.session_state:
     st.session_state.file_validated = False
@@ -68,7 +85,26 @@ if 'file_content' not in st.session_state:
 if 'file_name' not in st.session_state:
     st.session_state.file_name = None
 
+
+
+def upload_file():
+    """The stored upload as an open file for the caller to close, without suppressed numbers unless kept"""
+    screening = st.session_state.get('screening')
+    if st.session_state.get('create_skip_suppressed', True) and st.session_state.get('screened_content') is not None:
+        upload, name = session_memory.open_bytes('screened_content'), screening['file_name']
+    else:
+        upload, name = session_memory.open_bytes('file_content'), st.session_state.file_name
+    upload.name = name
+    # Determine MIME type
+    if name.endswith('.csv'):
+        upload.type = 'text/csv'
+    else:
+        upload.type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return upload
+
+
 # Campaign creation form
+section('form')
 st.markdown("### 📋 Campaign Details")
 
 # Step 1: Template Name
@@ -90,50 +126,64 @@ uploaded_file = st.file_uploader(
 )
 
 # File validation
+section('file validation')
 if uploaded_file is not None:
     # Store file content in session state when first uploaded
     if st.session_state.file_name != uploaded_file.name:
         # Read the file content into bytes
         file_bytes = uploaded_file.read()
-        st.session_state.file_content = file_bytes
+        session_memory.put('file_content', file_bytes)  # Large uploads are kept on disk, not in memory
+        del file_bytes
         st.session_state.file_name = uploaded_file.name
         st.session_state.file_validated = False  # Reset validation when new file is uploaded
         
         # Reset file pointer for display
         uploaded_file.seek(0)
+
+    # Screen the file against the suppression list once, before it is validated or uploaded
+    if st.session_state.get('screened_file') != st.session_state.file_name:
+        try:
+            screening = screen_upload(session_memory.get('file_content'), st.session_state.file_name)
+        except Exception as e:
+            st.warning(f"Could not check the file against the suppression list: {str(e)}")
+            screening = None
+        session_memory.put('screened_content', screening.pop('content') if screening else None)
+        st.session_state.screening = screening
+        st.session_state.screened_file = st.session_state.file_name
+        st.session_state.file_validated = False
     
     # Show file info
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("File Name", uploaded_file.name)
     with col2:
-        file_size = len(st.session_state.file_content) / 1024  # Convert to KB
+        file_size = session_memory.entry_size('file_content') / 1024  # Convert to KB
         st.metric("File Size", f"{file_size:.2f} KB")
     with col3:
         file_type = uploaded_file.name.split('.')[-1].upper()
         st.metric("File Type", file_type)
     
+    screening = st.session_state.get('screening')
+    if screening and screening['suppressed']:
+        st.warning(f"🚫 {screening['suppressed']:,} of {screening['total']:,} recipients are on the suppression list")
+        st.checkbox("Skip suppressed numbers", value=True, key="create_skip_suppressed",
+                    on_change=lambda: st.session_state.update(file_validated=False))
+        with st.expander("View suppressed numbers (sample)", expanded=False):
+            st.dataframe(pd.DataFrame({'phone': screening['sample']}), hide_index=True)
+
     # Validate button
     if st.button("🔍 Validate File", key="create_validate_file"):
         with st.spinner("Validating file..."):
-            # Create a file-like object from stored content
-            file_to_send = io.BytesIO(st.session_state.file_content)
-            file_to_send.name = st.session_state.file_name
-            
-            # Determine MIME type
-            if uploaded_file.name.endswith('.csv'):
-                file_to_send.type = 'text/csv'
-            else:
-                file_to_send.type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            
             api = APIClient()
             try:
-                response = api.validate_file(file_to_send)
+                # Create a file-like object from stored content; closed once sent, it may be a spill file
+                with upload_file() as file_to_send:
+                    response = api.validate_file(file_to_send)
                 
                 if response.get('success'):
                     st.session_state.file_validated = True
                     st.session_state.file_data = response.get('file_info', {})
-                    st.session_state.validation_response = response
+                    session_memory.put('validation_response', response)
                     st.success("✅ File validated successfully!")
                 else:
                     st.error(f"❌ Validation failed: {response.get('error', 'Unknown error')}")
@@ -162,7 +212,7 @@ if uploaded_file is not None:
             st.metric("Success Rate", f"{success_rate:.1f}%")
         
         # Show validation errors if any
-        validation_response = st.session_state.get('validation_response', {})
+        validation_response = session_memory.get('validation_response', {})
         if validation_response and 'validation_errors' in validation_response and validation_response['validation_errors']:
             with st.expander("⚠️ View Validation Errors", expanded=False):
                 errors_df = pd.DataFrame(validation_response['validation_errors'])
@@ -172,13 +222,12 @@ if uploaded_file is not None:
         if st.session_state.file_content:
             try:
                 # Create file-like object from stored content for preview
-                file_for_preview = io.BytesIO(st.session_state.file_content)
-                
-                # Read based on file type
-                if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(file_for_preview)
-                else:
-                    df = pd.read_excel(file_for_preview)
+                with session_memory.open_bytes('file_content') as file_for_preview:
+                    # Read based on file type
+                    if uploaded_file.name.endswith('.csv'):
+                        df = pd.read_csv(file_for_preview)
+                    else:
+                        df = pd.read_excel(file_for_preview)
                 
                 with st.expander("👁️ Preview Data (First 5 rows)", expanded=True):
                     st.dataframe(df.head(), hide_index=True)
@@ -196,6 +245,7 @@ if uploaded_file is not None:
 st.markdown("---")
 
 # Create Campaign Button
+section('create')
 col1, col2, col3 = st.columns([2, 1, 2])
 
 with col2:
@@ -209,19 +259,11 @@ with col2:
 
 if create_button:
     with st.spinner("Creating campaign..."):
-        # Create a fresh file-like object from stored content
-        file_to_upload = io.BytesIO(st.session_state.file_content)
-        file_to_upload.name = st.session_state.file_name
-        
-        # Set MIME type
-        if st.session_state.file_name.endswith('.csv'):
-            file_to_upload.type = 'text/csv'
-        else:
-            file_to_upload.type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        
         api = APIClient()
         try:
-            response = api.create_campaign(template_name, file_to_upload)
+            # Create a fresh file-like object from stored content
+            with upload_file() as file_to_upload:
+                response = api.create_campaign(template_name, file_to_upload)
             
             if response.get('success'):
                 st.success("✅ Campaign created successfully!")
@@ -230,9 +272,11 @@ if create_button:
                 # Clear session state immediately after success
                 st.session_state.file_validated = False
                 st.session_state.file_data = None
-                st.session_state.validation_response = None
-                st.session_state.file_content = None
+                session_memory.put('validation_response', None)
+                session_memory.put('file_content', None)
+                session_memory.put('screened_content', None)
                 st.session_state.file_name = None
+                st.session_state.screened_file = None
                 
                 # Show campaign details
                 campaign = response.get('campaign', {})
@@ -282,6 +326,7 @@ if create_button:
             st.error(f"❌ Connection error during campaign creation: {str(e)}")
 
 # Instructions
+section('instructions')
 st.markdown("---")
 st.info("""
 **📌 Instructions:**
@@ -314,4 +359,5 @@ with st.expander("📄 File Format Example", expanded=False):
         'media_url': ['', 'https://example.com/welcome.jpg', '']
     })
     st.dataframe(example_df, hide_index=True)
-    
\ No newline at end of file
+
+end_rerun()
@@ -1,15 +1,19 @@
 
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 from datetime import datetime, timedelta
 from components.auth import require_auth, logout
-from components.api_client import APIClient
-from config import STATUS_COLORS
+from components.tracing import start_rerun, section, end_rerun
+from components.data_loader import load_dashboard_data, clear_dashboard_data
+from components.charts import (render_chart, status_pie, delivery_bar, messages_trend,
+                               success_rate_trend)
+from components.offline_cache import show_freshness
+from components.snapshots import get_snapshot_store, get_snapshot_recorder, user_key_for
+from config import STATUS_COLORS, SNAPSHOT_INTERVAL, SNAPSHOT_TREND_RANGES
 
 # Check authentication
 require_auth()
+start_rerun('Dashboard')
 
 # Page header
 st.title("📊 Campaign Dashboard")
@@ -23,31 +27,26 @@ with st.sidebar:
 col1, col2, col3 = st.columns([6, 1, 1])
 with col3:
     if st.button("🔄 Refresh", key="dashboard_refresh"):
+        clear_dashboard_data(st.session_state.auth_token)
         st.rerun()
 
-# Get statistics from API with error handling
-api = APIClient()
-
-try:
-    stats_response = api.get_stats()
-    if stats_response.get('success'):
-        stats = stats_response.get('statistics', {})
-    else:
-        st.error("Failed to load statistics from server.")
-        stats = {}
-except Exception as e:
-    st.error(f"Connection error: {str(e)}")
-    stats = {}
-
-try:
-    campaigns_response = api.get_campaigns()
-    if not campaigns_response.get('results') and campaigns_response.get('success') is False:
-        st.error("Failed to load campaigns from server.")
-except Exception as e:
-    st.error(f"Connection error while loading campaigns: {str(e)}")
-    campaigns_response = {'results': []}
+section('load data')
+# Statistics and campaigns load concurrently and are shared with the home page;
+# a part the backend is slow to return is shown from the offline cache
+user_key = user_key_for(st.session_state.user)
+dashboard_data = load_dashboard_data(st.session_state.auth_token, user_key)
+stats = dashboard_data['stats']
+campaigns_response = dashboard_data['campaigns']
+
+if 'stats' in dashboard_data['errors']:
+    st.error(f"Failed to load statistics from server: {dashboard_data['errors']['stats']}")
+if 'campaigns' in dashboard_data['errors']:
+    st.error(f"Connection error while loading campaigns: {dashboard_data['errors']['campaigns']}")
+show_freshness(dashboard_data['freshness'].get('stats'), "statistics")
+show_freshness(dashboard_data['freshness'].get('campaigns'), "campaigns")
 
 # Display main metrics
+section('metrics')
 st.markdown("### 📈 Overall Statistics")
 
 col1, col2, col3, col4 = st.columns(4)
@@ -81,6 +80,7 @@ with col4:
     )
 
 # Charts section
+section('charts')
 st.markdown("---")
 st.markdown("### 📊 Analytics")
 
@@ -92,18 +92,7 @@ with col1:
     
     status_data = stats.get('campaigns_by_status', {})
     if status_data:
-        fig = go.Figure(data=[go.Pie(
-            labels=list(status_data.keys()),
-            values=list(status_data.values()),
-            hole=0.3,
-            marker_colors=[STATUS_COLORS.get(k, '#999') for k in status_data.keys()]
-        )])
-        fig.update_layout(
-            height=300,
-            margin=dict(t=0, b=0, l=0, r=0),
-            showlegend=True
-        )
-        st.plotly_chart(fig)
+        render_chart(status_pie, status_data)
     else:
         st.info("No campaign data available")
 
@@ -125,24 +114,45 @@ with col2:
     }
     
     if delivery_data['Sent'] > 0:
-        fig = go.Figure(data=[
-            go.Bar(
-                x=list(delivery_data.keys()),
-                y=list(delivery_data.values()),
-                marker_color=['#2196F3', '#4CAF50', '#FF9800']
-            )
-        ])
-        fig.update_layout(
-            height=300,
-            margin=dict(t=0, b=0, l=0, r=0),
-            yaxis_title="Messages",
-            showlegend=False
-        )
-        st.plotly_chart(fig)
+        render_chart(delivery_bar, delivery_data)
     else:
         st.info("No message data available")
 
+# Historical trends, served from the local snapshot store
+section('trends')
+st.markdown("---")
+st.markdown("### 📉 Trends")
+
+recorder = get_snapshot_recorder(st.session_state.auth_token, user_key)
+recorder.start()
+if recorder.last_error:
+    st.warning(recorder.last_error)
+
+trend_range = st.selectbox("Range", list(SNAPSHOT_TREND_RANGES.keys()), index=2, key="dashboard_trend_range")
+trend_bucket, trend_days = SNAPSHOT_TREND_RANGES[trend_range]
+try:
+    trend_df = get_snapshot_store().trend(user_key, bucket=trend_bucket, days=trend_days)
+except Exception as e:
+    st.error(f"Failed to load history: {str(e)}")
+    trend_df = pd.DataFrame()
+
+if trend_df.empty:
+    st.info(f"History is recorded every {SNAPSHOT_INTERVAL // 60} minutes. Trends appear once two "
+            f"{trend_bucket}s have been captured.")
+else:
+    period_label = "Hour" if trend_bucket == 'hour' else "Day"
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown(f"#### Messages per {period_label}")
+        render_chart(messages_trend, trend_df)
+    
+    with col2:
+        st.markdown("#### Success Rate Over Time")
+        render_chart(success_rate_trend, {'trend': trend_df, 'period_label': period_label})
+
 # Recent Campaigns Table
+section('recent campaigns')
 st.markdown("---")
 st.markdown("### 📋 Recent Campaigns")
 
@@ -187,6 +197,7 @@ else:
         st.switch_page("pages/Create_Campaign.py")
 
 # Recent Activity
+section('recent activity')
 st.markdown("---")
 st.markdown("### 📋 Recent Activity")
 
@@ -221,4 +232,6 @@ if campaigns_response.get('results'):
 else:
     st.info("No recent campaigns found. Create your first campaign to get started!")
     if st.button("➕ Create First Campaign", key="dashboard_create_first_recent"):
-        st.switch_page("pages/Create_Campaign.py")
\ No newline at end of file
+        st.switch_page("pages/Create_Campaign.py")
+
+end_rerun()
@@ -0,0 +1,200 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from components.auth import require_auth, logout
+from components.tracing import start_rerun, section, end_rerun
+from components import profiler, session_memory
+from components.endpoints import endpoint_pools
+from config import (PROFILE_SAMPLE_INTERVAL_MS, PROFILE_MAX_RERUNS, SESSION_MEMORY_CAP_MB,
+                    SESSION_PROCESS_CAP_MB, SESSION_SPILL_THRESHOLD_MB, API_BREAKER_FAILURES,
+                    API_BREAKER_COOLDOWN, API_HEDGE_AFTER)
+
+# Check authentication
+require_auth()
+if not (st.session_state.get('user') or {}).get('is_staff'):
+    st.error("Diagnostics are available to admins only.")
+    st.stop()
+start_rerun('Diagnostics')
+
+# Page header
+st.title("🩺 Diagnostics")
+
+# Add logout button in sidebar
+with st.sidebar:
+    if st.button("🚪 Logout", key="diagnostics_logout"):
+        logout()
+
+# Pages that report their reruns to the profiler, as passed to start_rerun()
+PROFILE_TARGETS = {
+    'Campaigns': 'pages/Campaigns.py',
+    'Dashboard': 'pages/Dashboard.py',
+    'Create_Campaign': 'pages/Create_Campaign.py',
+    'Message_Explorer': 'pages/Message_Explorer.py',
+    'home': 'app.py',
+}
+
+# Arm the profiler
+section('profiler controls')
+st.markdown("### ⏱️ Rerun Profiler")
+st.caption("Profiles the next reruns of a page, from every user's session or only yours. "
+           "Reruns that are not armed pay nothing.")
+
+with st.form("diagnostics_profiler_form"):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        target = st.selectbox("Page", options=list(PROFILE_TARGETS),
+                              format_func=lambda page: PROFILE_TARGETS[page], key="diagnostics_target")
+        reruns = st.number_input("Reruns to profile", min_value=1, max_value=PROFILE_MAX_RERUNS,
+                                 value=5, key="diagnostics_reruns")
+    with col2:
+        mode = st.radio("Profiler", options=list(profiler.MODES), key="diagnostics_mode",
+                        help="Sampling records wall-clock stacks for a flamegraph and barely slows the page. "
+                             "Deterministic (cProfile) counts every call but can make the rerun several times slower.")
+        interval_ms = st.number_input("Sampling interval (ms)", min_value=1, max_value=100,
+                                      value=PROFILE_SAMPLE_INTERVAL_MS, key="diagnostics_interval")
+    with col3:
+        scope = st.radio("Sessions", options=["All sessions", "Only my session"], key="diagnostics_scope")
+    arm_button = st.form_submit_button("▶️ Arm Profiler", type="primary")
+
+if arm_button:
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if scope == "Only my session" and ctx is not None else None
+    profiler.arm(profiler.ProfileRequest(target, int(reruns), mode, session_id, interval_ms))
+    st.success(f"Profiling the next {int(reruns)} reruns of {PROFILE_TARGETS[target]}")
+
+armed = profiler.armed()
+if armed:
+    st.markdown("#### Armed")
+    for page, request in armed.items():
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.write(f"**{PROFILE_TARGETS.get(page, page)}**: {request.remaining} reruns left, {request.mode}, "
+                     f"{'your session' if request.session_id else 'all sessions'}, armed at "
+                     f"{datetime.fromtimestamp(request.armed_at).strftime('%H:%M:%S')}")
+        with col2:
+            if st.button("✖️ Disarm", key=f"diagnostics_disarm_{page}"):
+                profiler.disarm(page)
+                st.rerun()
+
+# Results
+section('profiler results')
+st.markdown("---")
+st.markdown("### 🔥 Profiles")
+
+col1, col2 = st.columns([5, 1])
+with col2:
+    if st.button("🔄 Refresh", key="diagnostics_refresh"):
+        st.rerun()
+
+results = profiler.results()
+if not results:
+    st.info("No profiles yet. Arm the profiler, then use the target page.")
+
+for page, result in results.items():
+    with st.expander(f"{PROFILE_TARGETS.get(page, page)}: {result.reruns} reruns", expanded=True):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Reruns", result.reruns)
+        with col2:
+            st.metric("Avg Rerun", f"{result.seconds * 1000 / max(1, result.reruns):.0f} ms")
+        with col3:
+            st.metric("Samples", f"{result.samples:,}" if result.folded else "-")
+        with col4:
+            st.metric("Stopped Early", result.outcomes.get('stopped', 0),
+                      help="Reruns ended by st.rerun() or st.stop() before reaching the bottom of the page")
+
+        rows = result.top_functions()
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, width='stretch',
+                         column_config={'self_ms': st.column_config.NumberColumn("Self (ms)", format="%.1f"),
+                                        'total_ms': st.column_config.NumberColumn("Total (ms)", format="%.1f"),
+                                        'total_pct': st.column_config.NumberColumn("Total %", format="%.1f")})
+
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if result.folded:
+                st.download_button("📥 Flamegraph (folded stacks)", data=result.folded_text(),
+                                   file_name=f"{page}_{stamp}.folded.txt", mime="text/plain",
+                                   key=f"diagnostics_folded_{page}",
+                                   help="Open in speedscope.app, or render with flamegraph.pl / inferno")
+        with col2:
+            if result.stats is not None:
+                st.download_button("📥 pstats", data=result.pstats_bytes(),
+                                   file_name=f"{page}_{stamp}.pstats", mime="application/octet-stream",
+                                   key=f"diagnostics_pstats_{page}",
+                                   help="Load with `python -m pstats`, snakeviz or gprof2dot")
+        with col3:
+            if st.button("🗑️ Clear", key=f"diagnostics_clear_{page}"):
+                profiler.clear_results(page)
+                st.rerun()
+
+# Memory
+section('session memory')
+st.markdown("---")
+st.markdown("### 🧠 Session Memory")
+st.caption(f"Session state is measured on every rerun. A session above {SESSION_MEMORY_CAP_MB} MB, or any session "
+           f"while all sessions together exceed {SESSION_PROCESS_CAP_MB} MB, spills uploads and validation "
+           f"results to disk and drops disposable entries; uploads above {SESSION_SPILL_THRESHOLD_MB} MB "
+           "always go to disk.")
+
+totals = session_memory.process_totals()
+col1, col2, col3, col4, col5 = st.columns(5)
+with col1:
+    st.metric("Sessions", totals['sessions'])
+with col2:
+    st.metric("Session State", f"{totals['state_bytes'] / 2 ** 20:.1f} MB")
+with col3:
+    st.metric("Spilled to Disk", f"{totals['spilled_bytes'] / 2 ** 20:.1f} MB")
+with col4:
+    st.metric("Uploads Held", f"{totals['upload_bytes'] / 2 ** 20:.1f} MB",
+              help="Files Streamlit keeps in memory for file uploaders until the user removes them")
+with col5:
+    rss = totals['rss_bytes']
+    st.metric("Process RSS", f"{rss / 2 ** 20:.0f} MB" if rss is not None else "n/a")
+
+usages = session_memory.sessions()
+if usages:
+    ctx = get_script_run_ctx()
+    rows = []
+    for usage in usages:
+        largest = max(usage.sizes, key=usage.sizes.get) if usage.sizes else ''
+        rows.append({
+            'user': usage.user + (" (you)" if ctx is not None and usage.session_id == ctx.session_id else ""),
+            'state_mb': usage.total / 2 ** 20,
+            'largest_key': largest,
+            'largest_mb': usage.sizes.get(largest, 0) / 2 ** 20,
+            'spilled_mb': sum(usage.spilled.values()) / 2 ** 20,
+            'uploads_mb': usage.uploads / 2 ** 20,
+            'evicted': ", ".join(usage.evicted),
+            'measured': datetime.fromtimestamp(usage.updated).strftime('%H:%M:%S'),
+        })
+    mb = lambda label: st.column_config.NumberColumn(label, format="%.2f")
+    st.dataframe(pd.DataFrame(rows), hide_index=True, width='stretch',
+                 column_config={'state_mb': mb("State (MB)"), 'largest_mb': mb("Largest (MB)"),
+                                'spilled_mb': mb("Spilled (MB)"), 'uploads_mb': mb("Uploads (MB)")})
+
+    mine = next((u for u in usages if ctx is not None and u.session_id == ctx.session_id), None)
+    if mine is not None:
+        with st.expander("🔍 This session by key", expanded=False):
+            keys_df = pd.DataFrame([{'key': key, 'kb': size / 1024, 'on_disk_kb': mine.spilled.get(key, 0) / 1024}
+                                    for key, size in sorted(mine.sizes.items(), key=lambda kv: kv[1], reverse=True)])
+            st.dataframe(keys_df, hide_index=True, width='stretch')
+
+# Backend replicas
+section('endpoints')
+st.markdown("---")
+st.markdown("### 🌐 Backend Endpoints")
+st.caption(f"Requests go to the replica with the lowest moving-average latency × outstanding requests. "
+           f"{API_BREAKER_FAILURES} consecutive failures eject a replica for {API_BREAKER_COOLDOWN}s; "
+           f"GETs still unanswered after {API_HEDGE_AFTER}s are also sent to a second replica.")
+endpoint_rows = [row for pool in endpoint_pools() for row in pool.snapshot()]
+if endpoint_rows:
+    st.dataframe(pd.DataFrame(endpoint_rows), hide_index=True, width='stretch',
+                 column_config={'latency_ms': st.column_config.NumberColumn("Latency (ms)", format="%.0f"),
+                                'ejected_for': st.column_config.NumberColumn("Ejected for (s)", format="%.0f")})
+else:
+    st.info("No backend requests made yet.")
+
+end_rerun()
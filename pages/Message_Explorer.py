@@ -0,0 +1,207 @@
+import time
+import streamlit as st
+import pandas as pd
+from components.auth import require_auth, logout, user_key_for
+from components.tracing import start_rerun, section, end_rerun
+from components.data_loader import (load_message_page_offline, query_saved_messages, save_campaign_messages,
+                                    prefetch_message_page)
+from components.offline_cache import get_offline_cache, show_freshness, format_age
+from config import STATUS_ICONS, MESSAGE_PAGE_SIZES
+
+# Check authentication
+require_auth()
+start_rerun('Message_Explorer')
+
+# Page header
+st.title("📨 Message Explorer")
+
+# Add logout button in sidebar
+with st.sidebar:
+    if st.button("🚪 Logout", key="explorer_logout"):
+        logout()
+
+    st.markdown("---")
+    st.markdown("### 🎯 Quick Actions")
+    if st.button("📈 Manage Campaigns", key="explorer_manage_campaigns"):
+        st.switch_page("pages/Campaigns.py")
+
+# Initialize session state
+if 'explorer_page' not in st.session_state:
+    st.session_state.explorer_page = 1
+if 'explorer_filters' not in st.session_state:
+    st.session_state.explorer_filters = None
+
+# Sort options mapped to the backend ordering parameter
+SORT_OPTIONS = {
+    "Newest sent first": "-sent_at",
+    "Oldest sent first": "sent_at",
+    "Phone number (A-Z)": "phone_number",
+    "Phone number (Z-A)": "-phone_number",
+    "Status": "status",
+}
+
+# Filters
+section('filters')
+col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 2, 1])
+
+with col1:
+    campaign_id = st.number_input(
+        "Campaign ID",
+        min_value=1,
+        value=int(st.session_state.get('selected_campaign') or 1),
+        step=1,
+        key="explorer_campaign_id"
+    )
+
+with col2:
+    status_options = ["All"] + list(STATUS_ICONS.keys())
+    status_choice = st.selectbox(
+        "Status",
+        options=status_options,
+        format_func=lambda s: s if s == "All" else f"{STATUS_ICONS[s]} {s}",
+        key="explorer_status"
+    )
+
+with col3:
+    search = st.text_input("Search phone", placeholder="e.g. +9198765", key="explorer_search")
+
+with col4:
+    sort_choice = st.selectbox("Sort by", options=list(SORT_OPTIONS.keys()), key="explorer_sort")
+
+with col5:
+    page_size = st.selectbox("Rows per page", options=MESSAGE_PAGE_SIZES, key="explorer_page_size")
+
+status = None if status_choice == "All" else status_choice
+search = search.replace(" ", "").strip() or None
+ordering = SORT_OPTIONS[sort_choice]
+
+# Go back to the first page whenever the query changes
+filters = (campaign_id, status, search, ordering, page_size)
+if st.session_state.explorer_filters != filters:
+    st.session_state.explorer_filters = filters
+    st.session_state.explorer_page = 1
+
+page = st.session_state.explorer_page
+user_key = user_key_for(st.session_state.user)
+
+# Offline copy: every message of the campaign saved locally and queried through its indexes
+section('offline copy')
+synced_at = get_offline_cache().synced_at(user_key, campaign_id)
+col1, col2 = st.columns([3, 1])
+with col1:
+    use_saved = st.toggle(
+        "Query saved copy" + (f" (saved {format_age(time.time() - synced_at)} ago)" if synced_at else ""),
+        disabled=synced_at is None,
+        key="explorer_use_saved",
+        help="Filter, search and page this campaign's saved messages locally, without the backend"
+    ) and synced_at is not None
+with col2:
+    if st.button("💾 Save for offline", key="explorer_save_offline"):
+        progress = st.empty()
+        try:
+            saved = save_campaign_messages(st.session_state.auth_token, user_key, campaign_id,
+                                           on_page=lambda n: progress.caption(f"Saved {n:,} messages..."))
+            progress.empty()
+            st.success(f"Saved {saved:,} messages")
+            st.rerun()
+        except Exception as e:
+            progress.empty()
+            st.error(f"Failed to save messages: {str(e)}")
+
+section('load page', **{'campaign.id': campaign_id, 'page': page, 'page_size': page_size,
+                        'saved_copy': use_saved})
+try:
+    if use_saved:
+        page_data, freshness = query_saved_messages(user_key, campaign_id, page, page_size,
+                                                    status, search, ordering)
+    else:
+        page_data, freshness = load_message_page_offline(st.session_state.auth_token, user_key, campaign_id,
+                                                         page, page_size, status, search, ordering)
+except Exception as e:
+    st.error(f"Connection error: {str(e)}")
+    st.stop()
+
+if use_saved:
+    st.caption(f"🗄️ Showing the copy saved {format_age(freshness.age)} ago")
+else:
+    show_freshness(freshness, "messages")
+    if freshness.stale and page_data.get('total') and page_data['total'] > page_data['count']:
+        st.caption(f"Only {page_data['count']:,} of {page_data['total']:,} messages are saved locally. "
+                   "Use 💾 Save for offline to keep them all.")
+
+total_count = page_data['count']
+total_pages = max(1, (total_count + page_size - 1) // page_size)
+
+section('message table', rows=len(page_data['results']))
+st.markdown("---")
+
+if page_data['results']:
+    first_row = (page - 1) * page_size + 1
+    last_row = first_row + len(page_data['results']) - 1
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption(f"Showing messages {first_row:,}–{last_row:,} of {total_count:,}")
+    with col2:
+        st.caption(f"Page {page} of {total_pages}")
+
+    messages_df = pd.DataFrame(page_data['results'])
+    display_columns = ['phone_number', 'status', 'sent_at', 'delivered_at', 'read_at',
+                       'failed_at', 'error_message']
+    available_columns = [col for col in display_columns if col in messages_df.columns]
+    messages_display = messages_df[available_columns].copy()
+
+    if 'status' in messages_display.columns:
+        messages_display['status'] = messages_display['status'].map(
+            lambda s: f"{STATUS_ICONS.get(s, '')} {s}".strip()
+        )
+
+    # Fixed height keeps the table virtualized in the browser
+    st.dataframe(messages_display, width="stretch", height=560, hide_index=True)
+else:
+    st.info("No messages match the current filters")
+
+# Pagination controls
+section('pagination')
+st.markdown("---")
+col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+
+with col1:
+    if st.button("⏮️ First", key="explorer_first_page", disabled=page == 1):
+        st.session_state.explorer_page = 1
+        st.rerun()
+
+with col2:
+    if st.button("◀️ Previous", key="explorer_prev_page", disabled=page == 1):
+        st.session_state.explorer_page -= 1
+        st.rerun()
+
+with col3:
+    new_page = st.number_input(
+        "Go to page",
+        min_value=1,
+        max_value=total_pages,
+        value=min(page, total_pages),
+        step=1,
+        label_visibility="collapsed"
+    )
+    if new_page != page:
+        st.session_state.explorer_page = new_page
+        st.rerun()
+
+with col4:
+    if st.button("▶️ Next", key="explorer_next_page", disabled=not page_data['next']):
+        st.session_state.explorer_page += 1
+        st.rerun()
+
+with col5:
+    if st.button("⏭️ Last", key="explorer_last_page", disabled=page == total_pages):
+        st.session_state.explorer_page = total_pages
+        st.rerun()
+
+# Warm the next page so "Next" renders from cache
+if page_data['next'] and not freshness.stale:
+    prefetch_message_page(st.session_state.auth_token, campaign_id, page + 1, page_size,
+                          status, search, ordering, user_key)
+
+end_rerun()
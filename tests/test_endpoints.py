@@ -0,0 +1,47 @@
+"""Failover of requests across backend replicas, against the mock backend"""
+import io
+import os
+import socket
+
+os.environ.setdefault('API_BASE_URL', 'http://127.0.0.1')
+
+import pytest  # noqa: E402
+from benchmarks.mock_backend import MockBackend  # noqa: E402
+from components.api_client import APIClient  # noqa: E402
+
+CSV = b"phone_number\n+14155550101\n+14155550102\n+14155550103\n"
+
+
+def _dead_url() -> str:
+    """URL of a port nothing listens on: connections to it are refused"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/api"
+
+
+def _upload(content: bytes) -> io.BytesIO:
+    upload = io.BytesIO(content)
+    upload.name = 'recipients.csv'
+    upload.type = 'text/csv'
+    return upload
+
+
+@pytest.fixture
+def client():
+    backend = MockBackend(campaigns=1).start()
+    # The dead replica comes first, so it is tried first while neither has answered yet
+    api = APIClient(token='test', base_url=f"{_dead_url()},{backend.url}", timeout=5)
+    yield api
+    backend.stop()
+
+
+def test_failed_over_upload_arrives_whole(client):
+    result = client.validate_file(_upload(CSV))
+    assert result['file_info']['total_rows'] == 3
+    assert client.pool.endpoints[0].errors == 1
+
+
+def test_failed_over_campaign_gets_every_recipient(client):
+    result = client.create_campaign('welcome', _upload(CSV))
+    assert result['campaign']['total_recipients'] == 3